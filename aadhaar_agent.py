@@ -29,14 +29,26 @@ Author: Avinav Mishra
 Repository: https://github.com/avinav86/Aadhar_Agent
 """
 
-from pdf_processor import PDFProcessor
+from pdf_processor import PDFProcessor, DEFAULT_CACHE_DIRECTORY
+from disk_cache import DiskCache
+from index_manifest import IndexManifest
+from ingest_pipeline import IngestPipeline
 from vector_db import VectorDatabase
-from openai_chat import OpenAIChat
+from openai_chat import OpenAIChat, AsyncOpenAIChat, ERROR_PREFIX
+from answer_cache import SemanticAnswerCache
+from reranker import CrossEncoderReranker
+from metrics import metrics, timed, request_profile, profile_table
+from display import print_streamed
 from rich.console import Console
 from rich.panel import Panel
 from rich.text import Text
+import asyncio
 import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
+from typing import Dict, Iterator, List, Optional
 
 class AadhaarChatAgent:
     """
@@ -63,45 +75,155 @@ class AadhaarChatAgent:
         console (Console): Rich console for terminal output
         pdf_processor (PDFProcessor): PDF text extraction handler
         vector_db (VectorDatabase): Vector database for semantic search
+        manifest (Optional[IndexManifest]): Record of indexed files used for
+            incremental updates (created by initialize)
+        ingest_pipeline (Optional[IngestPipeline]): Streaming PDF → chunk →
+            embedding → Chroma pipeline (created by initialize)
         chat (OpenAIChat): OpenAI integration for response generation
+        answer_cache (SemanticAnswerCache): Answers reused for near-duplicate questions
+        async_chat (Optional[AsyncOpenAIChat]): Per-session async chat, created
+            by the first answer_question_async call
+        retrieval_executor (ThreadPoolExecutor): Threads running retrieval for the async API
         is_initialized (bool): Flag to track initialization status
+        timings (Dict[str, float]): Seconds spent in each startup phase
     """
     
-    def __init__(self, pdf_directory: str = "Supporting Documents"):
+    def __init__(self, pdf_directory: str = "Supporting Documents", extract_workers: int = 1,
+                 embed_processes: int = 0, backend: str = "chroma",
+                 embedding_dtype: str = "float32", retrieval_workers: int = 4,
+                 rerank: bool = False, embedding_backend: str = "torch", onnx_threads: int = 0,
+                 full_precision: Optional[bool] = None, search_mode: str = "vector",
+                 pdf_cache_directory: str = DEFAULT_CACHE_DIRECTORY):
         self.console = Console()
-        self.pdf_processor = PDFProcessor(pdf_directory)
-        self.vector_db = VectorDatabase()
+        # Extracted page text is cached by file hash (./pdf_cache unless given)
+        self.pdf_processor = PDFProcessor(
+            pdf_directory,
+            max_workers=extract_workers,
+            cache=DiskCache(pdf_cache_directory)
+        )
+        # The embedding model and collection load on first use (in initialize)
+        # With rerank, a cross-encoder keeps only the retrieved chunks that are relevant
+        self.vector_db = VectorDatabase(embed_processes=embed_processes, backend=backend,
+                                        embedding_dtype=embedding_dtype, full_precision=full_precision,
+                                        embedding_backend=embedding_backend, onnx_threads=onnx_threads,
+                                        search_mode=search_mode,
+                                        reranker=CrossEncoderReranker() if rerank else None)
+        self.manifest = None
+        self.ingest_pipeline = None
+        self.timings: Dict[str, float] = {}
         self.chat = OpenAIChat()
+        self.answer_cache = SemanticAnswerCache()
         self.is_initialized = False
+        metrics.register_cache("answer", self.answer_cache.stats)
+        metrics.register_cache("pdf_text", self.pdf_processor.cache.stats)
+        self._init_lock = threading.Lock()
+        
+        # Async API: OpenAI calls run on the event loop, retrieval (embedding
+        # and search are CPU-bound) runs on this thread pool
+        self.async_chat: Optional[AsyncOpenAIChat] = None
+        self.retrieval_executor = ThreadPoolExecutor(
+            max_workers=max(1, retrieval_workers),
+            thread_name_prefix="retrieval"
+        )
         
     def initialize(self):
         """Initialize the agent by processing PDFs and setting up vector database"""
-        if self.is_initialized:
-            return
+        # Concurrent callers (server sessions, the async API) wait for one initialization
+        with self._init_lock:
+            if self.is_initialized:
+                return
             
-        self.console.print(Panel.fit("🚀 Initializing Aadhaar Chat Agent...", style="bold blue"))
+            self.console.print(Panel.fit("🚀 Initializing Aadhaar Chat Agent...", style="bold blue"))
+            start_time = time.perf_counter()
         
-        # Check if vector database already exists
-        if self.vector_db.collection.count() == 0:
-            self.console.print("📄 Processing PDF documents...")
-            documents = self.pdf_processor.process_all_pdfs()
-            
-            if not documents:
+            # The manifest path and signature depend on the model that resolves
+            self.manifest = IndexManifest(
+                os.path.join(self.vector_db.index_directory, "index_manifest.json"),
+                signature=self.vector_db.index_signature()
+            )
+            self.ingest_pipeline = IngestPipeline(self.pdf_processor, self.vector_db, self.manifest)
+        
+            pdf_files = self.pdf_processor.list_pdfs()
+            if not pdf_files and self.vector_db.collection.count() == 0:
                 self.console.print("[red]No PDF documents found in the specified directory![/red]")
                 return
-            
-            self.console.print(f"✅ Found {len(documents)} PDF documents")
-            
-            # Add documents to vector database
-            self.vector_db.add_documents(documents)
-        else:
-            self.console.print("✅ Vector database already initialized")
         
-        self.is_initialized = True
-        self.console.print(Panel.fit("🎉 Agent ready! Ask me anything about Aadhaar.", style="bold green"))
+            # Bring the collection in line with the PDFs on disk
+            self._sync_index(pdf_files)
+        
+            self.timings.update(self.vector_db.timings)
+            self.timings["initialize_seconds"] = time.perf_counter() - start_time
+            metrics.observe("initialize", self.timings["initialize_seconds"])
+            self.is_initialized = True
+            self.console.print(Panel.fit("🎉 Agent ready! Ask me anything about Aadhaar.", style="bold green"))
+    
+    def _sync_index(self, pdf_files):
+        """
+        Incrementally update the vector database to match the PDF directory.
+        
+        The index manifest is diffed against the files on disk: unchanged files
+        are skipped, removed files have their chunks deleted, and added or
+        changed files are streamed through the ingest pipeline.
+        If the manifest was written with another embedding model or chunker,
+        the collection is emptied first and every file is indexed again.
+        
+        Args:
+            pdf_files (List[Path]): PDF files currently in the document directory
+        """
+        if self.manifest.signature_changed:
+            # Indexed with another model or chunker: drop every old chunk (and
+            # any half-finished ingest of them) before indexing everything again
+            self.vector_db.reset_collection()
+            self.ingest_pipeline.clear_checkpoint()
+            self.manifest.signature_changed = False
+        
+        if self.vector_db.collection.count() == 0:
+            # Empty collection (first run or wiped database): index everything
+            self.manifest.clear()
+        
+        changes = self.manifest.diff(pdf_files)
+        
+        for filename in changes["removed"]:
+            self.vector_db.delete_document(filename, self.manifest.chunk_ids(filename))
+            self.manifest.remove(filename)
+        
+        # Changed files are upserted over their old chunk IDs; the pipeline
+        # removes any leftover chunks once each file is fully written
+        to_index = changes["changed"] + changes["added"]
+        if to_index:
+            self.console.print(f"📄 Processing {len(to_index)} new or changed PDF documents...")
+            stats = self.ingest_pipeline.run(to_index, changes["hashes"])
+            self.console.print(
+                f"✅ Streamed {stats['chunks']} chunks from {stats['files']} files "
+                f"in {stats['seconds']:.1f}s"
+            )
+            if stats["failed"]:
+                self.console.print(f"[yellow]⚠️  {stats['failed']} files could not be extracted; "
+                                   f"they keep their previous chunks and are retried next time[/yellow]")
+        
+        self.manifest.save()
+        
+        # Keep the BM25 index in step with the collection
+        self.vector_db.refresh_lexical_index(force=bool(to_index or changes["removed"]))
+        
+        if to_index or changes["removed"]:
+            # Cached answers may quote documents that just changed
+            self.answer_cache.invalidate()
+            self.console.print(
+                f"✅ Index updated: {len(changes['unchanged'])} files skipped, "
+                f"{len(to_index)} re-embedded, {len(changes['removed'])} removed"
+            )
+        else:
+            self.console.print(f"✅ Vector database up to date ({len(changes['unchanged'])} files skipped)")
     
-    def chat_loop(self):
-        """Main chat loop"""
+    def chat_loop(self, profile: bool = False):
+        """
+        Main chat loop.
+        
+        Args:
+            profile (bool): Print the time spent in each stage and the tokens
+                used after every answer
+        """
         if not self.is_initialized:
             self.initialize()
         
@@ -134,16 +256,23 @@ class AadhaarChatAgent:
                 if not user_input:
                     continue
                 
-                # Search for relevant documents
-                self.console.print("🔍 Searching relevant documents...")
-                relevant_docs = self.vector_db.search(user_input, n_results=3)
-                
-                # Generate response
-                self.console.print("💭 Generating response...")
-                response = self.chat.generate_response(user_input, relevant_docs)
-                
-                # Display response
-                self.console.print(Panel(response, title="🤖 Aadhaar Agent", border_style="green"))
+                with request_profile() as request:
+                    # Search for relevant documents
+                    self.console.print("🔍 Searching relevant documents...")
+                    relevant_docs = self.vector_db.search(user_input, n_results=3)
+                    
+                    # Reuse a cached answer or generate a new one
+                    response = self._cached_answer(user_input, relevant_docs)
+                    if response is not None:
+                        self.console.print("⚡ Answered from cache")
+                        self.console.print(Panel(response, title="🤖 Aadhaar Agent", border_style="green"))
+                    else:
+                        self.console.print("💭 Generating response...")
+                        # Display the response while it is being generated
+                        print_streamed(self.console, self._generate_answer(user_input, relevant_docs, stream=True),
+                                       title="🤖 Aadhaar Agent")
+                if profile:
+                    self.console.print(profile_table(request.to_dict()))
                 
             except KeyboardInterrupt:
                 self.console.print("\n\n👋 Goodbye! Thanks for using Aadhaar Chat Agent.")
@@ -172,14 +301,173 @@ The agent uses official Aadhaar documents to provide accurate information.
         """
         self.console.print(Panel(help_text, title="Help", border_style="blue"))
     
-    def ask_question(self, question: str) -> str:
+    def ask_question(self, question: str, chat: Optional[OpenAIChat] = None) -> str:
         """Ask a single question and get response (for programmatic use)"""
+        return self.answer_question(question, chat)["answer"]
+    
+    def answer_question(self, question: str, chat: Optional[OpenAIChat] = None,
+                        stream: bool = False) -> Dict:
+        """
+        Answer a question and report where the answer came from.
+        
+        Args:
+            question (str): User question
+            chat (Optional[OpenAIChat]): Conversation to answer in; defaults to
+                the agent's own. The server passes one per session.
+            stream (bool): Return the answer as an iterator of text pieces
+                (a cached answer arrives as a single piece)
+        
+        Returns:
+            Dict: answer (str, or Iterator[str] when streaming), sources
+                (filenames of the retrieved chunks) and cached (True if served
+                from the answer cache)
+        """
         if not self.is_initialized:
             self.initialize()
         
         if not self.is_initialized:
-            return "Agent initialization failed"
+            failure = "Agent initialization failed"
+            return {"answer": iter([failure]) if stream else failure, "sources": [], "cached": False}
         
+        chat = chat or self.chat
         relevant_docs = self.vector_db.search(question, n_results=3)
-        response = self.chat.generate_response(question, relevant_docs)
+        response = self._cached_answer(question, relevant_docs, chat)
+        cached = response is not None
+        if response is None:
+            response = self._generate_answer(question, relevant_docs, chat, stream=stream)
+        elif stream:
+            response = iter([response])
+        return {
+            "answer": response,
+            "sources": list(dict.fromkeys(doc["metadata"].get("filename", "Unknown") for doc in relevant_docs)),
+            "cached": cached
+        }
+    
+    async def answer_question_async(self, question: str, session_id: str = "default") -> Dict:
+        """
+        Answer a question without blocking the event loop.
+        
+        Initialization, embedding and search run on ``retrieval_executor``;
+        the completion is awaited on the shared AsyncOpenAIChat, so many
+        sessions can be answered concurrently from one event loop.
+        
+        Args:
+            question (str): User question
+            session_id (str): Conversation to answer in
+        
+        Returns:
+            Dict: answer, sources, cached and session_id
+        """
+        loop = asyncio.get_running_loop()
+        if not self.is_initialized:
+            await loop.run_in_executor(self.retrieval_executor, self.initialize)
+            if not self.is_initialized:
+                return {"answer": "Agent initialization failed", "sources": [],
+                        "cached": False, "session_id": session_id}
+        if self.async_chat is None:
+            self.async_chat = AsyncOpenAIChat()
+        
+        # Checked before this turn is added to the session's history
+        first_turn = self.async_chat.is_first_turn(session_id)
+        relevant_docs, query_embedding, response = await loop.run_in_executor(
+            self.retrieval_executor, self._retrieve, question, first_turn
+        )
+        cached = response is not None
+        if cached:
+            await self.async_chat.record_exchange(session_id, question, response)
+        else:
+            response = await self.async_chat.generate_response(session_id, question, relevant_docs)
+            # Never cache failures
+            if query_embedding is not None and not response.startswith(ERROR_PREFIX):
+                self.answer_cache.put(question, query_embedding, [doc["id"] for doc in relevant_docs],
+                                      response)
+        
+        return {
+            "answer": response,
+            "sources": list(dict.fromkeys(doc["metadata"].get("filename", "Unknown") for doc in relevant_docs)),
+            "cached": cached,
+            "session_id": session_id
+        }
+    
+    def _retrieve(self, question: str, first_turn: bool = True):
+        """
+        Search and check the answer cache (runs on a retrieval thread).
+        
+        Args:
+            question (str): User question
+            first_turn (bool): Whether the question opens its session; only
+                those are looked up in and added to the answer cache
+        
+        Returns:
+            Tuple[List[Dict], Optional[np.ndarray], Optional[str]]: Retrieved
+                chunks, query embedding (None without a BGE model or after the
+                first turn) and the cached answer, if any
+        """
+        relevant_docs = self.vector_db.search(question, n_results=3)
+        if not self.vector_db.embedding_model or not first_turn:
+            return relevant_docs, None, None
+        query_embedding = self.vector_db.embed_query(question)
+        with timed("answer_cache_lookup"):
+            response = self.answer_cache.lookup(query_embedding, [doc["id"] for doc in relevant_docs])
+        return relevant_docs, query_embedding, response
+    
+    def _cached_answer(self, question: str, relevant_docs: List[Dict],
+                       chat: Optional[OpenAIChat] = None) -> Optional[str]:
+        """
+        Return a cached answer for a near-duplicate question, if there is one.
+        
+        Only the first question of a conversation is looked up; follow-ups
+        depend on the turns before them. A hit still updates the conversation
+        history so follow-up questions keep their context.
+        """
+        chat = chat or self.chat
+        if not self.vector_db.embedding_model or not chat.is_first_turn():
+            return None
+        
+        query_embedding = self.vector_db.embed_query(question)
+        with timed("answer_cache_lookup"):
+            response = self.answer_cache.lookup(query_embedding, [doc["id"] for doc in relevant_docs])
+        if response is not None:
+            chat.record_exchange(question, response)
         return response
+    
+    def _generate_answer(self, question: str, relevant_docs: List[Dict],
+                         chat: Optional[OpenAIChat] = None, stream: bool = False):
+        """
+        Generate an answer with OpenAI and, if it opens the conversation, add
+        it to the answer cache.
+        
+        With ``stream=True`` an iterator of text pieces is returned and the
+        answer is cached once the iterator is exhausted.
+        """
+        chat = chat or self.chat
+        # Checked before the answer is added to the history
+        first_turn = chat.is_first_turn()
+        if stream:
+            return self._stream_and_cache(question, relevant_docs, chat, first_turn)
+        
+        response = chat.generate_response(question, relevant_docs)
+        if first_turn:
+            self._cache_answer(question, relevant_docs, response)
+        return response
+    
+    def _stream_and_cache(self, question: str, relevant_docs: List[Dict], chat: OpenAIChat,
+                          first_turn: bool) -> Iterator[str]:
+        """Pass streamed pieces through, then cache a first-turn answer unless the stream failed"""
+        parts = []
+        for piece in chat.generate_response(question, relevant_docs, stream=True):
+            parts.append(piece)
+            yield piece
+        if first_turn and not chat.stream_failed:
+            self._cache_answer(question, relevant_docs, "".join(parts))
+    
+    def _cache_answer(self, question: str, relevant_docs: List[Dict], response: str):
+        """Add a generated answer to the answer cache"""
+        # Never cache failures
+        if self.vector_db.embedding_model and not response.startswith(ERROR_PREFIX):
+            self.answer_cache.put(
+                question,
+                self.vector_db.embed_query(question),
+                [doc["id"] for doc in relevant_docs],
+                response
+            )
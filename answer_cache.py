@@ -0,0 +1,151 @@
+"""
+Semantic Answer Cache Module for Aadhaar Chat Agent
+
+This module stores generated answers keyed by the embedding of the question
+that produced them. A new question that is nearly identical to a cached one
+and that retrieves exactly the same document chunks is answered from the
+cache without another OpenAI round-trip.
+
+Scope:
+- Only questions that open a conversation are cached and looked up (the
+  first question of a chat, server session or async session, and every
+  batch question). A follow-up such as "and for children?" depends on the
+  turns before it, so it always gets a new answer.
+- The cache lives in memory. It pays off in long-running processes (the
+  server, the async API, batch runs and chat); a restart starts empty, so
+  invalidating it after the index is synced at startup only matters when
+  documents are re-indexed while answers are already cached.
+
+Key Features:
+- Cosine similarity lookup on normalized query embeddings
+- Retrieved chunk IDs must match, so answers stay grounded in the same context
+- Time-to-live and size-based (LRU) eviction
+- Explicit invalidation when the underlying documents are re-indexed
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional
+import numpy as np
+
+
+class SemanticAnswerCache:
+    """
+    Cache of answers looked up by question similarity.
+
+    Attributes:
+        threshold (float): Minimum cosine similarity for a cache hit
+        ttl_seconds (float): Lifetime of an entry in seconds
+        max_entries (int): Maximum number of cached answers
+        hits (int): Number of questions answered from the cache
+        misses (int): Number of questions that needed a new answer
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 24 * 3600,
+                 max_entries: int = 512):
+        """
+        Initialize an empty answer cache.
+
+        Args:
+            threshold (float): Minimum cosine similarity between the new and
+                the cached question embedding for a hit
+            ttl_seconds (float): Lifetime of an entry in seconds
+            max_entries (int): Maximum number of cached answers
+        """
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max(1, max_entries)
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[int, Dict]" = OrderedDict()
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    def lookup(self, query_embedding: np.ndarray, chunk_ids: List[str]) -> Optional[str]:
+        """
+        Find a cached answer for a similar question with the same retrieved chunks.
+
+        Args:
+            query_embedding (np.ndarray): Normalized embedding of the new question
+            chunk_ids (List[str]): IDs of the chunks retrieved for the new question
+
+        Returns:
+            Optional[str]: Cached answer, or None on a miss
+        """
+        with self._lock:
+            self._expire()
+            if not self._entries:
+                self.misses += 1
+                return None
+
+            keys = list(self._entries.keys())
+            matrix = np.stack([self._entries[key]["embedding"] for key in keys])
+            similarities = matrix @ np.asarray(query_embedding, dtype=np.float32)
+            wanted = tuple(chunk_ids)
+
+            # Most similar first; the first candidate with matching context wins
+            for index in np.argsort(-similarities):
+                if similarities[index] < self.threshold:
+                    break
+                entry = self._entries[keys[index]]
+                if entry["chunk_ids"] == wanted:
+                    self._entries.move_to_end(keys[index])
+                    self.hits += 1
+                    return entry["answer"]
+
+            self.misses += 1
+            return None
+
+    def put(self, question: str, query_embedding: np.ndarray, chunk_ids: List[str], answer: str):
+        """
+        Store an answer, evicting the least recently used entry if full.
+
+        Args:
+            question (str): Question that produced the answer
+            query_embedding (np.ndarray): Normalized embedding of the question
+            chunk_ids (List[str]): IDs of the chunks the answer was based on
+            answer (str): Generated answer
+        """
+        with self._lock:
+            self._entries[self._next_id] = {
+                "question": question,
+                "embedding": np.asarray(query_embedding, dtype=np.float32),
+                "chunk_ids": tuple(chunk_ids),
+                "answer": answer,
+                "created_at": time.time()
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self):
+        """Drop every cached answer (called when documents are re-indexed)"""
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> Dict:
+        """
+        Report cache size and hit rate.
+
+        Returns:
+            Dict: Entry count, capacity, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }
+
+    def _expire(self):
+        """Remove entries older than the time-to-live"""
+        cutoff = time.time() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry["created_at"] < cutoff]
+        for key in expired:
+            del self._entries[key]
@@ -0,0 +1,271 @@
+"""
+Batch Question Answering Module for Aadhaar Chat Agent
+
+This module answers a file of questions in one run, for QA of the agent and
+to pre-generate answers for FAQ pages. Retrieval for the whole question set
+is done up front with batched work, and the OpenAI calls, which dominate the
+run time, are issued concurrently.
+
+Pipeline:
+┌──────────────────┐   ┌──────────────────┐   ┌──────────────────┐
+│ Embed questions  │──▶│  Search in bulk  │──▶│ Concurrent LLM   │──▶ answers.jsonl
+│ (one encode)     │   │ (batched query)  │   │ calls (bounded)  │
+└──────────────────┘   └──────────────────┘   └──────────────────┘
+
+Key Features:
+- All pending questions embedded in one batched encode
+- Vector search for many questions per index call
+- OpenAI calls run concurrently, up to a configurable limit
+- Output written and flushed row by row; the output file is the checkpoint,
+  so a rerun after a crash only answers the questions still missing
+- Each row records the retrieved sources, token usage and latency
+
+Input format (one JSON object per line):
+    {"id": "faq-1", "question": "What documents are required for enrollment?"}
+The "id" field is optional and defaults to the line number.
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Dict, List, Optional, Set
+
+from openai_chat import OpenAIChat, ERROR_PREFIX
+
+
+def read_questions(path: str) -> List[Dict]:
+    """
+    Read questions from a JSONL file.
+
+    Args:
+        path (str): Questions file; each line is an object with "question"
+            and an optional "id", or a bare JSON string
+
+    Returns:
+        List[Dict]: Questions with "id" and "question", in file order;
+            later duplicates of an ID are skipped
+    """
+    questions = []
+    seen = set()
+    with open(path, "r", encoding="utf-8") as f:
+        for line_number, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line:
+                continue
+            record = json.loads(line)
+            if isinstance(record, str):
+                record = {"question": record}
+            question_id = str(record.get("id", line_number))
+            if question_id in seen:
+                print(f"⚠️  Skipping duplicate question ID {question_id} (line {line_number})")
+                continue
+            seen.add(question_id)
+            questions.append({"id": question_id, "question": record["question"]})
+    return questions
+
+
+def read_completed(path: str) -> Set[str]:
+    """
+    Collect the IDs already answered successfully in an output file.
+
+    Rows with an "error" are not counted, so failed questions are retried on
+    the next run (the retry appends a new row; the last row of an ID wins).
+
+    Args:
+        path (str): Output file of a previous, possibly interrupted, run
+
+    Returns:
+        Set[str]: IDs of successfully answered questions
+    """
+    completed = set()
+    if not os.path.exists(path):
+        return completed
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError:
+                # A row cut short by a crash
+                continue
+            if "error" in row:
+                completed.discard(row["id"])
+            else:
+                completed.add(row["id"])
+    return completed
+
+
+def _repair_tail(path: str):
+    """Drop a partially written last row so appended rows start on a new line"""
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return
+    with open(path, "rb+") as f:
+        data = f.read()
+        if data.endswith(b"\n"):
+            return
+        f.truncate(data.rfind(b"\n") + 1)
+
+
+class BatchRunner:
+    """
+    Answers a file of questions with bulk retrieval and concurrent generation.
+
+    Every question is answered in a fresh conversation, so answers do not
+    depend on the order of the questions or on each other.
+
+    Attributes:
+        agent (AadhaarChatAgent): Initialized agent providing retrieval and the
+            OpenAI client
+        concurrency (int): Maximum number of OpenAI calls in flight
+        n_results (int): Chunks retrieved per question
+        use_answer_cache (bool): Answer near-duplicate questions from the
+            agent's semantic answer cache
+    """
+
+    def __init__(self, agent, concurrency: int = 8, n_results: int = 3,
+                 use_answer_cache: bool = True):
+        """
+        Args:
+            agent (AadhaarChatAgent): Agent to answer with (initialized on run)
+            concurrency (int): Maximum number of OpenAI calls in flight
+            n_results (int): Chunks retrieved per question
+            use_answer_cache (bool): Reuse answers of near-duplicate questions
+        """
+        self.agent = agent
+        self.concurrency = max(1, concurrency)
+        self.n_results = n_results
+        self.use_answer_cache = use_answer_cache
+
+    def run(self, questions_path: str, output_path: str, limit: Optional[int] = None) -> Dict:
+        """
+        Answer every question not yet answered in the output file.
+
+        Args:
+            questions_path (str): JSONL file of questions
+            output_path (str): JSONL file the answers are appended to
+            limit (Optional[int]): Answer at most this many pending questions
+
+        Returns:
+            Dict: Run statistics (total, skipped, answered, failed, cached,
+                token totals, retrieval and total seconds)
+        """
+        start_time = time.perf_counter()
+        questions = read_questions(questions_path)
+        completed = read_completed(output_path)
+        pending = [q for q in questions if q["id"] not in completed]
+        skipped = len(questions) - len(pending)
+        if limit is not None:
+            pending = pending[:limit]
+
+        stats = {
+            "total": len(questions),
+            "skipped": skipped,
+            "answered": 0,
+            "failed": 0,
+            "cached": 0,
+            "prompt_tokens": 0,
+            "completion_tokens": 0,
+            "retrieval_seconds": 0.0,
+            "total_seconds": 0.0
+        }
+        if stats["skipped"]:
+            print(f"♻️  Resuming: {stats['skipped']} questions already answered in {output_path}")
+        if not pending:
+            print("✅ Nothing to do")
+            return stats
+
+        self.agent.initialize()
+
+        # Retrieval for every pending question: one encode, batched searches
+        retrieval_start = time.perf_counter()
+        texts = [q["question"] for q in pending]
+        vector_db = self.agent.vector_db
+        embeddings = vector_db.embed_queries(texts) if vector_db.embedding_model else None
+        results = vector_db.search_many(texts, n_results=self.n_results, query_embeddings=embeddings)
+        stats["retrieval_seconds"] = time.perf_counter() - retrieval_start
+        per_question_retrieval = stats["retrieval_seconds"] / len(pending)
+        print(f"🔍 Retrieved context for {len(pending)} questions in {stats['retrieval_seconds']:.2f}s")
+
+        _repair_tail(output_path)
+        with open(output_path, "a", encoding="utf-8") as out, \
+                ThreadPoolExecutor(max_workers=self.concurrency, thread_name_prefix="batch") as executor:
+            futures = [
+                executor.submit(
+                    self._answer, question, docs,
+                    None if embeddings is None else embeddings[i],
+                    per_question_retrieval
+                )
+                for i, (question, docs) in enumerate(zip(pending, results))
+            ]
+            # Rows are written by this thread only, in completion order
+            for done, future in enumerate(as_completed(futures), start=1):
+                row = future.result()
+                out.write(json.dumps(row, ensure_ascii=False) + "\n")
+                out.flush()
+
+                if "error" in row:
+                    stats["failed"] += 1
+                else:
+                    stats["answered"] += 1
+                    stats["cached"] += int(row["cached"])
+                if row["usage"]:
+                    stats["prompt_tokens"] += row["usage"]["prompt_tokens"]
+                    stats["completion_tokens"] += row["usage"]["completion_tokens"]
+                if done % 50 == 0 or done == len(futures):
+                    print(f"📝 {done}/{len(futures)} answered ({stats['failed']} failed)")
+
+        stats["total_seconds"] = time.perf_counter() - start_time
+        return stats
+
+    def _answer(self, question: Dict, docs: List[Dict], query_embedding,
+                retrieval_seconds: float) -> Dict:
+        """Answer one question from its retrieved chunks (runs on a worker thread)"""
+        generation_start = time.perf_counter()
+        chunk_ids = [doc["id"] for doc in docs]
+        answer_cache = self.agent.answer_cache
+        usage = None
+
+        answer = None
+        if self.use_answer_cache and query_embedding is not None:
+            answer = answer_cache.lookup(query_embedding, chunk_ids)
+        cached = answer is not None
+
+        if not cached:
+            chat = OpenAIChat(client=self.agent.chat.client, prompt_builder=self.agent.chat.prompt_builder)
+            answer = chat.generate_response(question["question"], docs)
+            usage = chat.last_usage
+            if self.use_answer_cache and query_embedding is not None and not answer.startswith(ERROR_PREFIX):
+                answer_cache.put(question["question"], query_embedding, chunk_ids, answer)
+
+        generation_seconds = time.perf_counter() - generation_start
+        row = {
+            "id": question["id"],
+            "question": question["question"],
+            "answer": answer,
+            "sources": [
+                {
+                    "id": doc["id"],
+                    "filename": doc["metadata"].get("filename"),
+                    "page_start": doc["metadata"].get("page_start"),
+                    "page_end": doc["metadata"].get("page_end"),
+                    "distance": doc.get("distance"),
+                    "score": doc.get("score"),
+                    "rerank_score": doc.get("rerank_score")
+                }
+                for doc in docs
+            ],
+            "usage": usage,
+            "latency": {
+                "retrieval_seconds": round(retrieval_seconds, 4),
+                "generation_seconds": round(generation_seconds, 4),
+                "total_seconds": round(retrieval_seconds + generation_seconds, 4)
+            },
+            "cached": cached
+        }
+        if answer.startswith(ERROR_PREFIX):
+            row["answer"] = None
+            row["error"] = answer
+        return row
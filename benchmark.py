@@ -0,0 +1,611 @@
+"""
+Benchmark Module for Aadhaar Chat Agent
+
+This module measures ingest and retrieval throughput offline, so performance
+changes can be compared between commits without an API key, a network
+connection or the real Aadhaar documents. It generates synthetic PDF corpora
+of several sizes and times every stage of the pipeline on them.
+
+Measured per corpus size:
+- PDF extraction (pages/sec)
+- Chunking (MB of text/sec) and embedding (chunks/sec), per embedder
+- Index writes (chunks/sec), search latency (p50/p99) and throughput (QPS),
+  per embedder and vector store backend
+- End-to-end ``ask_question`` latency (p50/p99) with a stubbed OpenAI client
+
+Key Features:
+- Synthetic PDFs written directly (no PDF library needed), reproducible from a seed
+- Deterministic fake embedder, so results do not depend on model downloads,
+  plus the real BAAI/bge-small-en-v1.5 when it is in the local Hugging Face cache
+- Machine-readable JSON results, with the stage histograms of the metrics
+  registry attached for diagnosis
+- Comparison against a baseline file with a relative regression threshold
+
+Usage:
+    results = run_benchmarks(sizes=(10, 50), embedders=("fake",))
+    regressions = [row for row in compare_results(results, baseline, 0.2) if row["regressed"]]
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import contextlib
+import io
+import os
+import platform
+import random
+import re
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timezone
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Callable, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from metrics import metrics
+
+# Version of the results format; results of different versions are not compared
+BENCHMARK_VERSION = 1
+
+DEFAULT_SIZES = (10, 50, 200)
+DEFAULT_EMBEDDERS = ("fake", "bge")
+DEFAULT_BACKENDS = ("numpy", "chroma")
+
+# Real model benchmarked next to the fake embedder (same dimensions)
+REAL_EMBEDDING_MODEL = "BAAI/bge-small-en-v1.5"
+
+# Words the synthetic documents and questions are made of
+_VOCABULARY = (
+    "aadhaar enrolment enrollment resident identity address proof update biometric "
+    "fingerprint iris photograph demographic authentication verification mobile number "
+    "email otp uidai centre registrar agency operator supervisor introducer document "
+    "passport ration card voter driving licence birth certificate school pan bank "
+    "account seeding linking ekyc offline xml qr code masked virtual id lock unlock "
+    "grievance complaint status request acknowledgement slip correction name gender "
+    "date age guardian child minor blue baal card pvc reprint download portal "
+    "appointment fee charges free mandatory optional consent privacy data security "
+    "vault retention audit regulation section act notification circular procedure "
+    "timeline days weeks validity expiry renewal family head relationship pin "
+    "district state village post office letter courier delivery camp special "
+    "disability exception handling manual review rejection reason resubmission"
+).split()
+
+_QUESTION_OPENERS = (
+    "How do I", "What is the process to", "Can I", "Where should I",
+    "Which documents are needed to", "How long does it take to"
+)
+
+_WORD = re.compile(r"\w+")
+
+
+class FakeEmbedder:
+    """
+    Deterministic stand-in for a SentenceTransformer model.
+
+    Texts are embedded by feature hashing: every word adds +1 or -1 to one
+    dimension chosen by its CRC32. Texts sharing words get similar vectors,
+    so searches return sensible results, and the same text always gets the
+    same vector on every machine.
+
+    Attributes:
+        dimensions (int): Embedding size
+        max_seq_length (int): Chunk size reported to the chunker
+        tokenizer (None): Chunks are sized in words, like ChromaDB's default model
+    """
+
+    def __init__(self, dimensions: int = 384, max_seq_length: int = 512):
+        self.dimensions = dimensions
+        self.max_seq_length = max_seq_length
+        self.tokenizer = None
+        self._buckets: Dict[str, Tuple[int, float]] = {}
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding size"""
+        return self.dimensions
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """Embed one text or a list of texts (the SentenceTransformer.encode arguments are accepted)"""
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        embeddings = np.zeros((len(texts), self.dimensions), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in _WORD.findall(text.lower()):
+                index, sign = self._bucket(word)
+                embeddings[row, index] += sign
+        if normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings /= np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+
+    def _bucket(self, word: str) -> Tuple[int, float]:
+        """Dimension and sign a word is hashed to"""
+        bucket = self._buckets.get(word)
+        if bucket is None:
+            digest = zlib.crc32(word.encode("utf-8"))
+            bucket = self._buckets[word] = (digest % self.dimensions, 1.0 if digest & (1 << 31) else -1.0)
+        return bucket
+
+
+class StubOpenAIClient:
+    """
+    Offline stand-in for ``openai.OpenAI`` that answers every completion after a fixed delay.
+
+    Only ``chat.completions.create`` without streaming is provided, which is
+    all ``OpenAIChat.generate_response`` uses.
+
+    Attributes:
+        latency (float): Seconds each completion takes
+        calls (int): Completions served
+    """
+
+    def __init__(self, latency: float = 0.0,
+                 answer: str = "Visit an Aadhaar enrolment centre with proof of identity and address."):
+        self.latency = latency
+        self.answer = answer
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: List[Dict], max_tokens: int = 1000, **kwargs):
+        """Return a completion shaped like the OpenAI response object"""
+        if self.latency > 0:
+            time.sleep(self.latency)
+        self.calls += 1
+        prompt_tokens = sum(len(message["content"]) for message in messages) // 4
+        completion_tokens = len(self.answer) // 4
+        return SimpleNamespace(
+            choices=[SimpleNamespace(message=SimpleNamespace(content=self.answer))],
+            usage=SimpleNamespace(
+                prompt_tokens=prompt_tokens,
+                completion_tokens=completion_tokens,
+                total_tokens=prompt_tokens + completion_tokens
+            )
+        )
+
+
+def synthetic_pages(rng: random.Random, pages: int, words_per_page: int = 360) -> List[str]:
+    """
+    Generate page texts of Aadhaar-like sentences.
+
+    Args:
+        rng (random.Random): Source of randomness (seeded for reproducible corpora)
+        pages (int): Number of pages
+        words_per_page (int): Approximate number of words on each page
+
+    Returns:
+        List[str]: Text of each page, as lines of about twelve words
+    """
+    texts = []
+    for _ in range(pages):
+        lines = []
+        remaining = words_per_page
+        while remaining > 0:
+            count = min(remaining, rng.randint(8, 14))
+            words = rng.choices(_VOCABULARY, k=count)
+            lines.append(" ".join(words).capitalize() + ".")
+            remaining -= count
+        texts.append("\n".join(lines))
+    return texts
+
+
+def synthetic_questions(count: int, seed: int = 0) -> List[str]:
+    """
+    Generate distinct questions over the synthetic vocabulary.
+
+    Args:
+        count (int): Number of questions
+        seed (int): Random seed
+
+    Returns:
+        List[str]: Questions, all different, so query caches do not serve them
+    """
+    rng = random.Random(f"questions-{seed}")
+    questions: List[str] = []
+    seen = set()
+    while len(questions) < count:
+        question = f"{rng.choice(_QUESTION_OPENERS)} {' '.join(rng.choices(_VOCABULARY, k=rng.randint(4, 8)))}?"
+        if question not in seen:
+            seen.add(question)
+            questions.append(question)
+    return questions
+
+
+def write_pdf(path: Path, pages: List[str]):
+    """
+    Write a minimal text-only PDF (Helvetica, one text line per input line).
+
+    The file has just the objects PyPDF2 needs to extract the text: a
+    catalog, a page tree, one font, and a page with a content stream per page.
+
+    Args:
+        path (Path): Output file
+        pages (List[str]): Text of each page; lines are split on newlines
+    """
+    def escape(line: str) -> str:
+        return line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+    objects: List[bytes] = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"",  # page tree, filled in once the page object numbers are known
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>"
+    ]
+    page_numbers = []
+    for text in pages:
+        stream = "BT /F1 9 Tf 11 TL 40 760 Td " + " T* ".join(
+            f"({escape(line)}) Tj" for line in text.split("\n")
+        ) + " ET"
+        data = stream.encode("latin-1", errors="replace")
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(data), data))
+        objects.append(
+            b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] "
+            b"/Resources << /Font << /F1 3 0 R >> >> /Contents %d 0 R >>" % (len(objects))
+        )
+        page_numbers.append(len(objects))
+    kids = " ".join(f"{number} 0 R" for number in page_numbers)
+    objects[1] = f"<< /Type /Pages /Kids [{kids}] /Count {len(page_numbers)} >>".encode("ascii")
+
+    output = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, start=1):
+        offsets.append(len(output))
+        output += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref_offset = len(output)
+    output += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        output += b"%010d 00000 n \n" % offset
+    output += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref_offset)
+    path.write_bytes(bytes(output))
+
+
+def build_corpus(directory: str, documents: int, pages_per_document: int = 4, seed: int = 0) -> List[Path]:
+    """
+    Write a synthetic corpus of PDFs.
+
+    Args:
+        directory (str): Directory the PDFs are written to
+        documents (int): Number of PDFs
+        pages_per_document (int): Pages in each PDF
+        seed (int): Random seed; the same seed always gives the same corpus
+
+    Returns:
+        List[Path]: Written PDF files
+    """
+    Path(directory).mkdir(parents=True, exist_ok=True)
+    files = []
+    for index in range(documents):
+        rng = random.Random(f"document-{seed}-{index}")
+        path = Path(directory) / f"synthetic_{index:04d}.pdf"
+        write_pdf(path, synthetic_pages(rng, pages_per_document))
+        files.append(path)
+    return files
+
+
+def load_embedders(names: Sequence[str]) -> Tuple[Dict[str, object], Dict[str, str]]:
+    """
+    Load the requested embedders.
+
+    Args:
+        names (Sequence[str]): "fake" and/or "bge"
+
+    Returns:
+        Tuple[Dict[str, object], Dict[str, str]]: Loaded models by name, and the
+            reason each unavailable one was skipped
+    """
+    models: Dict[str, object] = {}
+    skipped: Dict[str, str] = {}
+    for name in names:
+        if name == "fake":
+            models[name] = FakeEmbedder()
+        elif name == "bge":
+            # Offline only: never download during a benchmark
+            try:
+                from sentence_transformers import SentenceTransformer
+
+                with _quiet():
+                    models[name] = SentenceTransformer(REAL_EMBEDDING_MODEL, device="cpu", local_files_only=True)
+            except Exception as e:
+                skipped[name] = f"{REAL_EMBEDDING_MODEL} is not available offline ({type(e).__name__})"
+        else:
+            skipped[name] = "unknown embedder"
+    return models, skipped
+
+
+def _benchmark_database(model, model_name: str, persist_directory: str, backend: str):
+    """VectorDatabase that uses ``model`` instead of loading a BGE model"""
+    from vector_db import VectorDatabase
+
+    class BenchmarkVectorDatabase(VectorDatabase):
+        def _load_embedding_model(self):
+            self.model_name = model_name
+            return model
+
+    return BenchmarkVectorDatabase(persist_directory=persist_directory, backend=backend,
+                                   persist_query_cache=False)
+
+
+@contextlib.contextmanager
+def _quiet() -> Iterator[None]:
+    """Silence the pipeline's progress prints while a stage is timed"""
+    with contextlib.redirect_stdout(io.StringIO()):
+        yield
+
+
+def _best_of(repeats: int, stage: Callable[[], object]) -> Tuple[float, object]:
+    """
+    Run a stage several times and keep the fastest run.
+
+    The fastest run is the one least disturbed by other work on the machine,
+    which makes throughput figures of short stages comparable between runs.
+
+    Returns:
+        Tuple[float, object]: Seconds of the fastest run and the stage's result
+    """
+    best, result = float("inf"), None
+    for _ in range(max(1, repeats)):
+        start = time.perf_counter()
+        result = stage()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def _latencies(seconds: List[float]) -> Dict[str, float]:
+    """p50/p99 in milliseconds and throughput of sequential calls"""
+    values = np.array(seconds)
+    return {
+        "p50_ms": float(np.percentile(values, 50) * 1000),
+        "p99_ms": float(np.percentile(values, 99) * 1000),
+        "qps": len(values) / float(values.sum()) if values.sum() > 0 else 0.0
+    }
+
+
+class _Results:
+    """Collects metrics as {name: {value, unit, better}}"""
+
+    def __init__(self):
+        self.metrics: Dict[str, Dict] = {}
+
+    def add(self, name: str, value: float, unit: str, better: str):
+        self.metrics[name] = {"value": round(value, 4), "unit": unit, "better": better}
+
+
+def run_benchmarks(sizes: Sequence[int] = DEFAULT_SIZES, embedders: Sequence[str] = DEFAULT_EMBEDDERS,
+                   backends: Sequence[str] = DEFAULT_BACKENDS, queries: int = 200, asks: int = 50,
+                   pages_per_document: int = 4, llm_latency: float = 0.0, seed: int = 0,
+                   repeats: int = 3, work_directory: Optional[str] = None) -> Dict:
+    """
+    Run the whole benchmark suite.
+
+    Args:
+        sizes (Sequence[int]): Corpus sizes, in PDFs
+        embedders (Sequence[str]): "fake" and/or "bge"
+        backends (Sequence[str]): Vector store backends ("numpy", "chroma")
+        queries (int): Searches timed per configuration
+        asks (int): ``ask_question`` calls timed per configuration (0 to skip)
+        pages_per_document (int): Pages in each synthetic PDF
+        llm_latency (float): Seconds the stubbed OpenAI client takes per completion
+        seed (int): Random seed of the corpora and questions
+        repeats (int): Runs of extraction, chunking and embedding; the fastest counts
+        work_directory (Optional[str]): Where corpora and indexes are built; a
+            temporary directory (removed afterwards) if not given
+
+    Returns:
+        Dict: version, created, environment, config, metrics ({name: {value,
+            unit, better}}), skipped (embedders that could not be loaded) and
+            stages (histograms of the metrics registry)
+    """
+    config = {
+        "sizes": list(sizes), "embedders": list(embedders), "backends": list(backends),
+        "queries": queries, "asks": asks, "pages_per_document": pages_per_document,
+        "llm_latency": llm_latency, "seed": seed, "repeats": repeats
+    }
+    results = _Results()
+    metrics.reset()
+
+    models, skipped = load_embedders(embedders)
+    for name, reason in skipped.items():
+        print(f"⚠️  Skipping embedder {name}: {reason}")
+
+    with contextlib.ExitStack() as stack:
+        if work_directory is None:
+            work_directory = stack.enter_context(tempfile.TemporaryDirectory(prefix="aadhaar-bench-"))
+        for size in sizes:
+            print(f"📚 Corpus of {size} PDFs ({size * pages_per_document} pages)")
+            corpus_directory = os.path.join(work_directory, f"corpus_{size}")
+            pdf_files = build_corpus(corpus_directory, size, pages_per_document, seed)
+            documents = _bench_extraction(results, size, corpus_directory, pdf_files, repeats)
+            for name, model in models.items():
+                _bench_embedder(results, size, name, model, documents, backends, queries, asks,
+                                llm_latency, seed, repeats, os.path.join(work_directory, f"index_{size}_{name}"),
+                                corpus_directory)
+
+    return {
+        "version": BENCHMARK_VERSION,
+        "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "environment": _environment(),
+        "config": config,
+        "metrics": results.metrics,
+        "skipped": skipped,
+        "stages": metrics.to_json()["stages"]
+    }
+
+
+def _bench_extraction(results: _Results, size: int, corpus_directory: str, pdf_files: List[Path],
+                      repeats: int) -> List[Dict]:
+    """Time PDF extraction of a corpus and return its documents"""
+    from pdf_processor import PDFProcessor
+
+    # No extraction cache: every run parses the PDFs
+    processor = PDFProcessor(corpus_directory, max_workers=1, cache=None)
+    with _quiet():
+        seconds, documents = _best_of(repeats, lambda: processor.process_pdfs(pdf_files))
+    pages = sum(len(doc["pages"]) for doc in documents)
+    results.add(f"docs={size}/extract/pages_per_sec", pages / seconds, "pages/s", "higher")
+    print(f"   📄 Extracted {pages} pages in {seconds:.2f}s")
+    return documents
+
+
+def _bench_embedder(results: _Results, size: int, name: str, model, documents: List[Dict],
+                    backends: Sequence[str], queries: int, asks: int, llm_latency: float,
+                    seed: int, repeats: int, index_directory: str, corpus_directory: str):
+    """Time chunking, embedding, index writes, search and answers for one embedder"""
+    prefix = f"docs={size}/{name}"
+    model_name = REAL_EMBEDDING_MODEL if name == "bge" else "fake-embedder"
+    vector_db = _benchmark_database(model, model_name, os.path.join(index_directory, "chunking"), "numpy")
+
+    with _quiet():
+        vector_db.chunker  # loads the (already loaded) model and sizes the chunker
+    seconds, chunked = _best_of(repeats, lambda: [vector_db.chunk_document(doc) for doc in documents])
+    megabytes = sum(len(doc["content"].encode("utf-8")) for doc in documents) / 1e6
+    results.add(f"{prefix}/chunk/mb_per_sec", megabytes / seconds, "MB/s", "higher")
+
+    texts = [chunk["text"] for chunks in chunked for chunk in chunks]
+    seconds, embeddings = _best_of(repeats, lambda: vector_db.embed_texts(texts))
+    results.add(f"{prefix}/embed/chunks_per_sec", len(texts) / seconds, "chunks/s", "higher")
+    print(f"   🧠 [{name}] Chunked {megabytes:.2f} MB into {len(texts)} chunks, "
+          f"embedded at {len(texts) / seconds:.0f} chunks/s")
+
+    questions = synthetic_questions(queries + asks + 5, seed)
+    warmup, search_questions, ask_questions = questions[:5], questions[5:5 + queries], questions[5 + queries:]
+    for backend in backends:
+        backend_prefix = f"{prefix}/{backend}"
+        backend_db = _benchmark_database(model, model_name, os.path.join(index_directory, backend), backend)
+
+        # One upsert per document, as the ingest pipeline writes them
+        start = time.perf_counter()
+        with _quiet():
+            offset = 0
+            for chunks in chunked:
+                backend_db.upsert_chunks(chunks, embeddings[offset:offset + len(chunks)])
+                offset += len(chunks)
+            backend_db.refresh_lexical_index(force=True)
+        seconds = time.perf_counter() - start
+        results.add(f"{backend_prefix}/index/chunks_per_sec", len(texts) / seconds, "chunks/s", "higher")
+
+        with _quiet():
+            for question in warmup:
+                backend_db.search(question, n_results=3)
+        timings = []
+        for question in search_questions:
+            start = time.perf_counter()
+            backend_db.search(question, n_results=3)
+            timings.append(time.perf_counter() - start)
+        search = _latencies(timings)
+        results.add(f"{backend_prefix}/search/p50_ms", search["p50_ms"], "ms", "lower")
+        results.add(f"{backend_prefix}/search/p99_ms", search["p99_ms"], "ms", "lower")
+        results.add(f"{backend_prefix}/search/qps", search["qps"], "queries/s", "higher")
+        line = (f"   🔍 [{name}/{backend}] Search p50 {search['p50_ms']:.1f} ms, "
+                f"p99 {search['p99_ms']:.1f} ms, {search['qps']:.0f} QPS")
+
+        if ask_questions:
+            ask = _bench_answers(backend_db, corpus_directory, os.path.join(index_directory, "pdf_cache"),
+                                 warmup, ask_questions, llm_latency)
+            results.add(f"{backend_prefix}/ask/p50_ms", ask["p50_ms"], "ms", "lower")
+            results.add(f"{backend_prefix}/ask/p99_ms", ask["p99_ms"], "ms", "lower")
+            line += f"; ask p50 {ask['p50_ms']:.1f} ms, p99 {ask['p99_ms']:.1f} ms"
+        print(line)
+
+
+def _bench_answers(vector_db, corpus_directory: str, pdf_cache_directory: str, warmup: List[str],
+                   questions: List[str], llm_latency: float) -> Dict[str, float]:
+    """
+    Time ``ask_question`` end to end against a stubbed OpenAI client.
+
+    The agent's PDF text cache goes to ``pdf_cache_directory`` (inside the
+    work directory), so a benchmark run leaves nothing in the current directory.
+    """
+    from aadhaar_agent import AadhaarChatAgent
+    from openai_chat import OpenAIChat
+    from rate_limiter import RateLimiter
+    from response_cache import ResponseCache
+
+    # No request leaves the process, but the agent's default client needs a key to be constructed
+    os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+    with _quiet():
+        agent = AadhaarChatAgent(corpus_directory, pdf_cache_directory=pdf_cache_directory)
+    # The corpus is already indexed in vector_db
+    agent.vector_db = vector_db
+    agent.is_initialized = True
+
+    client = StubOpenAIClient(latency=llm_latency)
+    limiter = RateLimiter(requests_per_minute=None, tokens_per_minute=None)
+    # Never record stub answers in (or replay from) the user's response cache
+    response_cache = ResponseCache()
+    timings = []
+    # The first answer also loads the tokenizer
+    for timed_run, question in [(False, q) for q in warmup[:1]] + [(True, q) for q in questions]:
+        # A fresh conversation per question keeps prompts the same size
+        chat = OpenAIChat(client=client, rate_limiter=limiter, response_cache=response_cache)
+        start = time.perf_counter()
+        with _quiet():
+            agent.ask_question(question, chat=chat)
+        if timed_run:
+            timings.append(time.perf_counter() - start)
+        # Time generated answers, not answer-cache hits
+        agent.answer_cache.invalidate()
+    agent.retrieval_executor.shutdown(wait=False)
+    return _latencies(timings)
+
+
+def _environment() -> Dict:
+    """Machine and library versions the results were measured with"""
+    environment = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__
+    }
+    for module in ("torch", "sentence_transformers", "chromadb", "PyPDF2"):
+        loaded = sys.modules.get(module)
+        if loaded is not None:
+            environment[module] = getattr(loaded, "__version__", "unknown")
+    return environment
+
+
+def compare_results(current: Dict, baseline: Dict, threshold: float = 0.2) -> List[Dict]:
+    """
+    Compare results with a baseline run.
+
+    A metric regresses when it is worse than the baseline by more than
+    ``threshold``, relative to the baseline value (lower throughput or higher
+    latency, according to the metric's "better" direction). Metrics present in
+    only one of the runs are ignored.
+
+    Args:
+        current (Dict): Results of run_benchmarks
+        baseline (Dict): Earlier results to compare with
+        threshold (float): Tolerated relative slowdown (0.2 = 20%)
+
+    Returns:
+        List[Dict]: Rows with name, unit, baseline, current, change (relative,
+            positive = better) and regressed, sorted by name
+
+    Raises:
+        ValueError: If the two results use different format versions
+    """
+    if baseline.get("version") != current.get("version"):
+        raise ValueError(
+            f"Baseline results have format version {baseline.get('version')}, "
+            f"expected {current.get('version')}"
+        )
+    rows = []
+    for name, metric in sorted(current["metrics"].items()):
+        previous = baseline["metrics"].get(name)
+        if previous is None or not previous["value"]:
+            continue
+        change = (metric["value"] - previous["value"]) / previous["value"]
+        if metric["better"] == "lower":
+            change = -change
+        rows.append({
+            "name": name,
+            "unit": metric["unit"],
+            "baseline": previous["value"],
+            "current": metric["value"],
+            "change": change,
+            "regressed": change < -threshold
+        })
+    return rows
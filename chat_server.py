@@ -0,0 +1,465 @@
+"""
+Chat Server Module for Aadhaar Chat Agent
+
+This module keeps one AadhaarChatAgent in memory and answers questions over a
+local HTTP endpoint (TCP or Unix socket). Loading the embedding model, opening
+the vector database and creating the OpenAI client happen once per server
+instead of once per ``python main.py ask`` call, so scripted questions only
+pay for retrieval and the completion itself.
+
+Key Features:
+- Standard-library HTTP server, one thread per request
+- Per-session conversation state with idle expiry and a session limit
+- Discovery file so ``main.py ask`` finds a running server automatically
+- Client helper that speaks to the server over TCP or a Unix socket
+
+Endpoints:
+- GET  /health: Server status, collection information and OpenAI rate limiter counters
+- GET  /metrics: Stage latency histograms, token counters and cache hit rates
+  in the Prometheus text format (``/metrics?format=json`` for JSON)
+- POST /ask: {"question": str, "session_id": Optional[str]} →
+  {"answer", "sources", "cached", "session_id", "seconds"}; with
+  "profile": true the response also has a per-stage "profile"
+- POST /ask with "stream": true → newline-delimited JSON: one {"token"} line per
+  piece of text as it is generated, then a final line with the fields above
+  (except "answer")
+- POST /clear: {"session_id": str} → forget a session's conversation
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import http.client
+import json
+import os
+import socket
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Iterator, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from metrics import metrics, request_profile
+
+# Written by a running server so clients can find it; removed on shutdown
+SERVER_INFO_FILE = ".aadhaar_server.json"
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+
+
+class SessionStore:
+    """
+    Conversation state for each client session.
+
+    Every session has its own OpenAIChat (history and summary) sharing the
+    agent's OpenAI client, and a lock so that two requests of the same session
+    are answered one after the other.
+
+    Attributes:
+        ttl_seconds (float): Idle time after which a session is forgotten
+        max_sessions (int): Maximum number of sessions kept (least recently used go first)
+    """
+
+    def __init__(self, chat_factory, ttl_seconds: float = 3600, max_sessions: int = 1000):
+        """
+        Initialize an empty session store.
+
+        Args:
+            chat_factory (Callable[[], OpenAIChat]): Creates the chat of a new session
+            ttl_seconds (float): Idle time after which a session is forgotten
+            max_sessions (int): Maximum number of sessions kept
+        """
+        self.ttl_seconds = ttl_seconds
+        self.max_sessions = max(1, max_sessions)
+        self._chat_factory = chat_factory
+        self._sessions: "OrderedDict[str, Dict]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, session_id: Optional[str] = None) -> Tuple[str, Dict]:
+        """
+        Return a session, creating it if it does not exist.
+
+        Args:
+            session_id (Optional[str]): Session to continue; a new ID is
+                generated when omitted
+
+        Returns:
+            Tuple[str, Dict]: Session ID and session state (chat, lock, last_used)
+        """
+        with self._lock:
+            self._expire()
+            session_id = session_id or uuid.uuid4().hex
+            session = self._sessions.get(session_id)
+            if session is None:
+                session = {"chat": self._chat_factory(), "lock": threading.Lock()}
+                self._sessions[session_id] = session
+                while len(self._sessions) > self.max_sessions:
+                    self._sessions.popitem(last=False)
+            session["last_used"] = time.time()
+            self._sessions.move_to_end(session_id)
+            return session_id, session
+
+    def clear(self, session_id: str) -> bool:
+        """Forget a session; returns False if it did not exist"""
+        with self._lock:
+            return self._sessions.pop(session_id, None) is not None
+
+    def __len__(self) -> int:
+        """Number of active sessions"""
+        return len(self._sessions)
+
+    def _expire(self):
+        """Remove sessions idle for longer than the time-to-live"""
+        cutoff = time.time() - self.ttl_seconds
+        while self._sessions:
+            session_id, session = next(iter(self._sessions.items()))
+            if session["last_used"] >= cutoff:
+                break
+            del self._sessions[session_id]
+
+
+class _UnixHTTPServer(ThreadingHTTPServer):
+    """ThreadingHTTPServer listening on a Unix domain socket"""
+
+    address_family = socket.AF_UNIX
+
+    def server_bind(self):
+        # TCPServer.server_bind expects a (host, port) pair for server_name
+        self.socket.bind(self.server_address)
+        self.server_name = "localhost"
+        self.server_port = 0
+
+
+def _make_handler(agent, sessions: SessionStore):
+    """Build the request handler class bound to an agent and its sessions"""
+
+    class ChatRequestHandler(BaseHTTPRequestHandler):
+        """Translates HTTP requests into agent calls"""
+
+        def do_GET(self):
+            url = urlsplit(self.path)
+            if url.path == "/metrics":
+                if parse_qs(url.query).get("format") == ["json"]:
+                    self._send_json(200, metrics.to_json())
+                else:
+                    self._send_text(200, metrics.to_prometheus())
+                return
+            if url.path != "/health":
+                self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+                return
+            info = agent.vector_db.get_collection_info()
+            self._send_json(200, {
+                "status": "ok",
+                "pid": os.getpid(),
+                "sessions": len(sessions),
+                "documents": info["total_documents"],
+                "backend": info["backend"],
+                "rate_limiter": agent.chat.rate_limiter.stats()
+            })
+
+        def do_POST(self):
+            try:
+                length = int(self.headers.get("Content-Length") or 0)
+                payload = json.loads(self.rfile.read(length) or b"{}")
+            except ValueError as e:
+                self._send_json(400, {"error": f"Invalid JSON body: {e}"})
+                return
+
+            if self.path == "/ask":
+                self._ask(payload)
+            elif self.path == "/clear":
+                cleared = sessions.clear(str(payload.get("session_id", "")))
+                self._send_json(200, {"cleared": cleared})
+            else:
+                self._send_json(404, {"error": f"Unknown endpoint: {self.path}"})
+
+        def _ask(self, payload: Dict):
+            question = str(payload.get("question", "")).strip()
+            if not question:
+                self._send_json(400, {"error": "Missing 'question'"})
+                return
+
+            start_time = time.perf_counter()
+            session_id, session = sessions.get(payload.get("session_id"))
+            stream = bool(payload.get("stream"))
+            profile = bool(payload.get("profile"))
+            with session["lock"], request_profile() as request:
+                try:
+                    result = agent.answer_question(question, session["chat"], stream=stream)
+                except Exception as e:
+                    self._send_json(500, {"error": str(e), "session_id": session_id})
+                    return
+
+                if stream:
+                    # No Content-Length: the response ends when the connection closes
+                    self.send_response(200)
+                    self.send_header("Content-Type", "application/x-ndjson")
+                    self.end_headers()
+                    for piece in result.pop("answer"):
+                        self._write_line({"token": piece})
+
+            result["session_id"] = session_id
+            result["seconds"] = time.perf_counter() - start_time
+            if profile:
+                result["profile"] = request.to_dict()
+            if stream:
+                self._write_line(result)
+            else:
+                self._send_json(200, result)
+
+        def _write_line(self, body: Dict):
+            self.wfile.write(json.dumps(body).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+        def _send_json(self, status: int, body: Dict):
+            self._send_bytes(status, json.dumps(body).encode("utf-8"), "application/json")
+
+        def _send_text(self, status: int, body: str):
+            self._send_bytes(status, body.encode("utf-8"), "text/plain; version=0.0.4")
+
+        def _send_bytes(self, status: int, data: bytes, content_type: str):
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            # Keep the terminal readable; one line per request is enough
+            print(f"🌐 {self.command} {self.path} → {args[1] if len(args) > 1 else ''}")
+
+    return ChatRequestHandler
+
+
+class ChatServer:
+    """
+    Long-running HTTP front end for one AadhaarChatAgent.
+
+    Attributes:
+        agent (AadhaarChatAgent): Agent answering every request
+        sessions (SessionStore): Per-session conversation state
+        host (str): TCP host (ignored when socket_path is set)
+        port (int): TCP port (ignored when socket_path is set)
+        socket_path (Optional[str]): Unix socket to listen on instead of TCP
+    """
+
+    def __init__(self, agent, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT,
+                 socket_path: Optional[str] = None, session_ttl: float = 3600,
+                 max_sessions: int = 1000, info_file: str = SERVER_INFO_FILE):
+        """
+        Configure the server.
+
+        Args:
+            agent (AadhaarChatAgent): Agent answering every request
+            host (str): TCP host to bind
+            port (int): TCP port to bind (0 picks a free port)
+            socket_path (Optional[str]): Unix socket path; overrides host and port
+            session_ttl (float): Idle seconds before a session is forgotten
+            max_sessions (int): Maximum number of sessions kept
+            info_file (str): Discovery file written while the server runs
+        """
+        from openai_chat import OpenAIChat
+
+        self.agent = agent
+        self.host = host
+        self.port = port
+        self.socket_path = socket_path
+        self.info_file = info_file
+        # Sessions share the agent's OpenAI client and its connection pool
+        self.sessions = SessionStore(
+            lambda: OpenAIChat(client=agent.chat.client),
+            ttl_seconds=session_ttl,
+            max_sessions=max_sessions
+        )
+        self._httpd = None
+
+    @property
+    def address(self) -> Dict:
+        """Address clients connect to, as written to the discovery file"""
+        if self.socket_path:
+            return {"socket": os.path.abspath(self.socket_path)}
+        return {"url": f"http://{self.host}:{self.port}"}
+
+    def start(self):
+        """Warm the agent up and bind the listening socket"""
+        # Load the model, open the index and sync documents before accepting requests
+        self.agent.initialize()
+        if not self.agent.is_initialized:
+            raise RuntimeError("Agent initialization failed")
+
+        handler = _make_handler(self.agent, self.sessions)
+        if self.socket_path:
+            if os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+            self._httpd = _UnixHTTPServer(self.socket_path, handler)
+        else:
+            self._httpd = ThreadingHTTPServer((self.host, self.port), handler)
+            self.port = self._httpd.server_address[1]
+        self._httpd.daemon_threads = True
+
+        with open(self.info_file, 'w', encoding='utf-8') as file:
+            json.dump(dict(self.address, pid=os.getpid()), file)
+
+    def serve_forever(self):
+        """Answer requests until interrupted, then clean up"""
+        try:
+            self._httpd.serve_forever()
+        finally:
+            self.shutdown()
+
+    def shutdown(self):
+        """Close the socket and remove the discovery file"""
+        if self._httpd is not None:
+            self._httpd.server_close()
+            self._httpd = None
+        if self.socket_path and os.path.exists(self.socket_path):
+            os.remove(self.socket_path)
+        if os.path.exists(self.info_file):
+            os.remove(self.info_file)
+
+
+class _UnixHTTPConnection(http.client.HTTPConnection):
+    """HTTPConnection over a Unix domain socket"""
+
+    def __init__(self, socket_path: str, timeout: float):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+class ChatClient:
+    """
+    Minimal client for a running ChatServer.
+
+    Attributes:
+        address (Dict): {"url": ...} or {"socket": ...}
+        timeout (float): Seconds to wait for an answer
+    """
+
+    def __init__(self, address: Dict, timeout: float = 120):
+        self.address = address
+        self.timeout = timeout
+
+    def _connect(self, timeout: float) -> http.client.HTTPConnection:
+        """Open a connection to the server's TCP address or Unix socket"""
+        if "socket" in self.address:
+            return _UnixHTTPConnection(self.address["socket"], timeout)
+        url = self.address["url"].split("://", 1)[-1]
+        host, _, port = url.partition(":")
+        return http.client.HTTPConnection(host, int(port or 80), timeout=timeout)
+
+    def _request(self, method: str, path: str, body: Optional[Dict] = None,
+                 timeout: Optional[float] = None) -> Dict:
+        """Send one request and decode the JSON response"""
+        connection = self._connect(timeout or self.timeout)
+        try:
+            data = json.dumps(body).encode("utf-8") if body is not None else None
+            headers = {"Content-Type": "application/json"} if data is not None else {}
+            connection.request(method, path, body=data, headers=headers)
+            response = connection.getresponse()
+            result = json.loads(response.read() or b"{}")
+            if response.status != 200:
+                raise RuntimeError(result.get("error", f"HTTP {response.status}"))
+            return result
+        finally:
+            connection.close()
+
+    def health(self, timeout: float = 1.0) -> Dict:
+        """Check that the server is up"""
+        return self._request("GET", "/health", timeout=timeout)
+
+    def metrics(self) -> Dict:
+        """Stage latency, token and cache metrics of the server, as JSON"""
+        return self._request("GET", "/metrics?format=json")
+
+    def ask(self, question: str, session_id: Optional[str] = None, profile: bool = False) -> Dict:
+        """
+        Ask a question.
+
+        Args:
+            question (str): User question
+            session_id (Optional[str]): Session to continue
+            profile (bool): Also return the time spent in each stage
+
+        Returns:
+            Dict: answer, sources, cached, session_id, seconds (and profile)
+        """
+        return self._request("POST", "/ask", {"question": question, "session_id": session_id,
+                                              "profile": profile})
+
+    def ask_stream(self, question: str, session_id: Optional[str] = None,
+                   profile: bool = False) -> Iterator[Dict]:
+        """
+        Ask a question and receive the answer while it is generated.
+
+        Args:
+            question (str): User question
+            session_id (Optional[str]): Session to continue
+            profile (bool): Also return the time spent in each stage
+
+        Yields:
+            Dict: {"token": str} events, then one final event with sources,
+                cached, session_id, seconds (and profile)
+        """
+        connection = self._connect(self.timeout)
+        try:
+            data = json.dumps({"question": question, "session_id": session_id, "stream": True,
+                               "profile": profile}).encode("utf-8")
+            connection.request("POST", "/ask", body=data, headers={"Content-Type": "application/json"})
+            response = connection.getresponse()
+            if response.status != 200:
+                result = json.loads(response.read() or b"{}")
+                raise RuntimeError(result.get("error", f"HTTP {response.status}"))
+            for line in response:
+                if line.strip():
+                    yield json.loads(line)
+        finally:
+            connection.close()
+
+    def clear(self, session_id: str) -> bool:
+        """Forget a session's conversation"""
+        return self._request("POST", "/clear", {"session_id": session_id})["cleared"]
+
+
+def find_server(address: Optional[str] = None, info_file: str = SERVER_INFO_FILE) -> Optional[ChatClient]:
+    """
+    Locate a running server.
+
+    Args:
+        address (Optional[str]): Explicit server URL (``http://host:port``) or
+            Unix socket path. When omitted, the AADHAAR_SERVER environment
+            variable and then the discovery file are used.
+        info_file (str): Discovery file written by ``main.py serve``
+
+    Returns:
+        Optional[ChatClient]: Client for a server that answered its health
+            check, or None if no server is reachable
+    """
+    address = address or os.getenv("AADHAAR_SERVER")
+    if address:
+        candidate = {"url": address} if address.startswith("http") else {"socket": address}
+    elif os.path.exists(info_file):
+        try:
+            with open(info_file, 'r', encoding='utf-8') as file:
+                info = json.load(file)
+        except (OSError, ValueError):
+            return None
+        candidate = {key: info[key] for key in ("url", "socket") if key in info}
+        if not candidate:
+            return None
+    else:
+        return None
+
+    client = ChatClient(candidate)
+    try:
+        client.health()
+    except (OSError, RuntimeError, ValueError):
+        return None
+    return client
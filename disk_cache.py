@@ -0,0 +1,210 @@
+"""
+Disk Cache Module for Aadhaar Chat Agent
+
+This module provides a small persistent key/value cache used to avoid repeating
+expensive work across runs, such as extracting text from unchanged PDF files.
+Entries are stored as individual JSON files named after their key, and the
+directory is kept under a configurable size cap using least-recently-used
+eviction.
+
+Key Features:
+- Content-hash keys (SHA-256 of the source file)
+- One JSON file per entry for simple inspection and crash safety
+- Size cap with LRU eviction based on file access time
+- Safe to share between threads (writes and eviction are serialized, and
+  every write goes through its own temporary file)
+- Statistics and purge helpers for the command line
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def file_sha256(path: str, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 digest of a file without loading it into memory at once.
+
+    Args:
+        path (str): Path of the file to hash
+        block_size (int): Number of bytes read per iteration
+
+    Returns:
+        str: Hexadecimal SHA-256 digest of the file contents
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    Persistent JSON cache with a size cap and least-recently-used eviction.
+
+    Each entry lives in ``<directory>/<key>.json``. Reading an entry refreshes
+    its modification time, so the oldest files are always the least recently
+    used ones and are removed first when the cache grows past ``max_bytes``.
+
+    Attributes:
+        directory (Path): Directory holding the cache entries
+        max_bytes (int): Maximum total size of all entries in bytes
+        hits (int): Number of successful lookups in this process
+        misses (int): Number of failed lookups in this process
+    """
+
+    def __init__(self, directory: str, max_bytes: int = 256 * 1024 * 1024):
+        """
+        Initialize the cache, creating its directory if needed.
+
+        Args:
+            directory (str): Directory used to store cache entries
+            max_bytes (int): Size cap in bytes before LRU eviction kicks in
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        # Running total of the entry sizes, counted on the first write so that
+        # writes do not have to scan the directory
+        self._total_bytes: Optional[int] = None
+        # Serializes the size accounting and eviction of concurrent writers
+        self._lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        """Return the file path used for a cache key"""
+        return self.directory / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Dict]:
+        """
+        Look up an entry and mark it as recently used.
+
+        Args:
+            key (str): Cache key (usually a hex digest)
+
+        Returns:
+            Optional[Dict]: Stored entry, or None if missing or unreadable
+        """
+        path = self._path(key)
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                entry = json.load(file)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        # Touch the file so LRU eviction sees it as recently used
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+
+        self.hits += 1
+        return entry
+
+    def put(self, key: str, entry: Dict):
+        """
+        Store an entry and evict old entries if the size cap is exceeded.
+
+        The entry is written to a uniquely named temporary file first and then
+        renamed, so an interrupted write never leaves a truncated entry behind
+        and concurrent writers of the same key never share a temporary file.
+
+        Args:
+            key (str): Cache key (usually a hex digest)
+            entry (Dict): JSON-serializable value to store
+        """
+        path = self._path(key)
+        tmp_path = None
+        try:
+            # Serialize outside the lock; only the rename and accounting are shared
+            with tempfile.NamedTemporaryFile('w', encoding='utf-8', dir=self.directory,
+                                             prefix=f"{key}.", suffix=".tmp", delete=False) as file:
+                tmp_path = Path(file.name)
+                json.dump(entry, file)
+            written = tmp_path.stat().st_size
+            with self._lock:
+                if self._total_bytes is None:
+                    self._total_bytes = sum(size for _, size, _ in self._entries())
+                replaced = path.stat().st_size if path.exists() else 0
+                os.replace(tmp_path, path)
+                self._total_bytes += written - replaced
+                if self._total_bytes > self.max_bytes:
+                    self._evict()
+        except OSError as e:
+            print(f"Warning: Could not write cache entry {key}: {e}")
+            if tmp_path is not None and tmp_path.exists():
+                tmp_path.unlink()
+
+    def _entries(self):
+        """Return (path, size, mtime) for every entry in the cache directory"""
+        entries = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime))
+        return entries
+
+    def _evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes (caller holds the lock)"""
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        # Oldest modification time first
+        for path, size, _ in sorted(entries, key=lambda item: item[2]):
+            if total <= self.max_bytes:
+                break
+            try:
+                path.unlink()
+                total -= size
+            except OSError:
+                continue
+        self._total_bytes = total
+
+    def stats(self) -> Dict:
+        """
+        Summarize the current contents of the cache.
+
+        Returns:
+            Dict: Entry count, total size, size cap, directory and hit/miss counters
+        """
+        entries = self._entries()
+        oldest = min((mtime for _, _, mtime in entries), default=None)
+        return {
+            "directory": str(self.directory),
+            "entries": len(entries),
+            "total_bytes": sum(size for _, size, _ in entries),
+            "max_bytes": self.max_bytes,
+            "oldest_entry_age_seconds": (time.time() - oldest) if oldest else 0,
+            "hits": self.hits,
+            "misses": self.misses
+        }
+
+    def purge(self) -> int:
+        """
+        Delete every entry in the cache.
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        with self._lock:
+            for path, _, _ in self._entries():
+                try:
+                    path.unlink()
+                    removed += 1
+                except OSError:
+                    continue
+            self._total_bytes = None
+        return removed
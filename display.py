@@ -0,0 +1,41 @@
+"""
+Terminal Display Module for Aadhaar Chat Agent
+
+This module holds the rich rendering shared by the command line (main.py) and
+the interactive chat loop (aadhaar_agent.py). It imports nothing but rich, so
+'python main.py ask' can render an answer streamed by a running server
+without loading the agent, the embedding model or the vector database.
+
+Key Features:
+- Streamed answers rendered in a panel that grows as text arrives
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+from typing import Iterable
+
+from rich.console import Console
+from rich.live import Live
+from rich.panel import Panel
+
+
+def print_streamed(console: Console, pieces: Iterable[str], title: str = "Response") -> str:
+    """
+    Render a streamed answer in a panel that grows as text arrives.
+
+    Args:
+        console (Console): Console to render on
+        pieces (Iterable[str]): Text pieces of the answer
+        title (str): Panel title
+
+    Returns:
+        str: The complete answer
+    """
+    parts = []
+    with Live(Panel("", title=title, border_style="green"), console=console,
+              refresh_per_second=15, vertical_overflow="visible") as live:
+        for piece in pieces:
+            parts.append(piece)
+            live.update(Panel("".join(parts), title=title, border_style="green"))
+    return "".join(parts)
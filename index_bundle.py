@@ -0,0 +1,418 @@
+"""
+Index Bundle Module for Aadhaar Chat Agent
+
+This module packages a built index into one portable file, so a new replica
+can start serving without extracting or embedding any PDF. A bundle holds the
+chunk texts and metadata, their embeddings, the BM25 index, the identity of
+the embedding model and the index manifest (the corpus files with their
+hashes and chunk IDs).
+
+Bundle Layout:
+- 8-byte magic ``AADHIDX1``
+- Sections, each starting at a 64-byte aligned offset:
+  - embeddings: row-major float32 matrix (chunks x dimensions)
+  - records: one JSON line per chunk (id, document, metadata) in matrix row order
+  - lexical_index: the BM25 index (``.npz``)
+- Header: JSON with the format version, model, index signature, corpus
+  manifest and the offset, length and SHA-256 of every section
+- Footer: header length (little-endian uint64), header SHA-256 and the magic
+
+Key Features:
+- One versioned file; the header and every section are checksummed and
+  verified on import
+- Export reads the collection a page at a time and import memory-maps the
+  embeddings and copies them in batches, so memory use stays flat for
+  large indexes
+- Imports into either backend (ChromaDB, or NumPy with any embedding dtype)
+- Manifest entries are matched to the local PDFs by content hash, so the
+  first start finds every file unchanged and embeds nothing
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+import numpy as np
+
+from disk_cache import file_sha256
+from index_manifest import IndexManifest
+from numpy_store import NumpyStore
+from vector_db import RESOLVED_MODEL_FILE, VectorDatabase
+
+BUNDLE_MAGIC = b"AADHIDX1"
+BUNDLE_FORMAT_VERSION = 1
+
+COLLECTION_NAME = "aadhaar_documents"
+
+# Header length, header SHA-256 and the magic at the end of the file
+_FOOTER = struct.Struct("<Q32s8s")
+_ALIGNMENT = 64
+# Chunks written to the target store per upsert (below ChromaDB's batch limit)
+_IMPORT_BATCH_SIZE = 2048
+# Chunks read from the collection per page when exporting
+_EXPORT_PAGE_SIZE = 2048
+_READ_BLOCK_BYTES = 1024 * 1024
+
+
+def _write_section(file, name: str, blocks, sections: Dict):
+    """Append a section at the next aligned offset and record its offset, length and SHA-256"""
+    file.write(b"\0" * (-file.tell() % _ALIGNMENT))
+    offset = file.tell()
+    digest = hashlib.sha256()
+    for block in blocks:
+        file.write(block)
+        digest.update(block)
+    sections[name] = {"offset": offset, "length": file.tell() - offset, "sha256": digest.hexdigest()}
+
+
+def _export_pages(collection, records_file, shape: List[int]) -> Iterator[bytes]:
+    """
+    Page through a collection with limit/offset, yielding the embedding bytes of each page.
+
+    The records of each page are written to ``records_file`` as JSON lines in
+    the same order, and ``shape`` is set to the row count and dimensions, so
+    at most one page of texts and embeddings is held in memory.
+    """
+    offset = 0
+    while True:
+        page = collection.get(include=["documents", "metadatas", "embeddings"],
+                              limit=_EXPORT_PAGE_SIZE, offset=offset)
+        if not page["ids"]:
+            return
+        embeddings = np.ascontiguousarray(np.asarray(page["embeddings"], dtype=np.float32))
+        shape[0] += len(page["ids"])
+        shape[1] = embeddings.shape[1]
+        for chunk_id, document, metadata in zip(page["ids"], page["documents"], page["metadatas"]):
+            records_file.write((json.dumps({"id": chunk_id, "document": document, "metadata": metadata},
+                                           ensure_ascii=False) + "\n").encode("utf-8"))
+        yield embeddings.tobytes()
+        if len(page["ids"]) < _EXPORT_PAGE_SIZE:
+            return
+        offset += len(page["ids"])
+
+
+def export_index(vector_db: VectorDatabase, path: str) -> Dict:
+    """
+    Write the index of a vector database to a bundle file.
+
+    Args:
+        vector_db (VectorDatabase): Database whose index is exported (the
+            embedding model is loaded to check the index is current)
+        path (str): Bundle file to write (replaced atomically)
+
+    Returns:
+        Dict: chunks, dimensions, model, files, bytes and seconds
+
+    Raises:
+        ValueError: If the index is empty, built without a BGE model, or out
+            of date with the current model and chunking settings
+    """
+    start_time = time.perf_counter()
+    collection = vector_db.collection
+    if collection.count() == 0:
+        raise ValueError("The index is empty, run 'python main.py chat' first to build it")
+    if vector_db.model_name is None:
+        raise ValueError("Bundles need a BGE embedding model; this index uses ChromaDB's default embeddings")
+
+    signature = vector_db.index_signature()
+    try:
+        with open(os.path.join(vector_db.index_directory, "index_manifest.json"), 'r', encoding='utf-8') as file:
+            manifest = json.load(file)
+    except (OSError, ValueError):
+        manifest = {}
+    if manifest.get("signature") != signature:
+        raise ValueError(
+            "The index was built with a different embedding model or chunking settings; "
+            "run 'python main.py ask' once to bring it up to date"
+        )
+
+    vector_db.refresh_lexical_index()
+
+    sections: Dict[str, Dict] = {}
+    shape = [0, 0]
+    tmp_path = path + ".tmp"
+    records_path = path + ".records.tmp"
+    try:
+        with open(tmp_path, 'wb') as file:
+            file.write(BUNDLE_MAGIC)
+
+            # One paged pass over the collection: embeddings go straight into
+            # their section, records are spooled to disk for the next section
+            with open(records_path, 'wb') as records_file:
+                _write_section(file, "embeddings", _export_pages(collection, records_file, shape), sections)
+            count, dimensions = shape
+            sections["embeddings"].update({"dtype": "float32", "shape": [count, dimensions]})
+
+            with open(records_path, 'rb') as records_file:
+                _write_section(file, "records", iter(lambda: records_file.read(_READ_BLOCK_BYTES), b""), sections)
+
+            with open(vector_db.lexical_index_path, 'rb') as lexical_file:
+                _write_section(file, "lexical_index", iter(lambda: lexical_file.read(_READ_BLOCK_BYTES), b""), sections)
+
+            header = json.dumps({
+                "format_version": BUNDLE_FORMAT_VERSION,
+                "created": time.time(),
+                "model": {"name": vector_db.model_name, "dimensions": dimensions},
+                "index_signature": signature,
+                "chunks": count,
+                "source_backend": vector_db.backend,
+                "corpus": manifest.get("files", {}),
+                "sections": sections
+            }, ensure_ascii=False).encode("utf-8")
+            file.write(header)
+            file.write(_FOOTER.pack(len(header), hashlib.sha256(header).digest(), BUNDLE_MAGIC))
+        os.replace(tmp_path, path)
+    finally:
+        for leftover in (records_path, tmp_path):
+            if os.path.exists(leftover):
+                os.remove(leftover)
+
+    return {
+        "chunks": count,
+        "dimensions": dimensions,
+        "model": vector_db.model_name,
+        "files": len(manifest.get("files", {})),
+        "bytes": os.path.getsize(path),
+        "seconds": time.perf_counter() - start_time
+    }
+
+
+class IndexBundle:
+    """
+    Read access to a bundle file.
+
+    Attributes:
+        path (str): Bundle file
+        header (Dict): Format version, model, index signature, chunk count,
+            corpus manifest and section table
+    """
+
+    def __init__(self, path: str):
+        """
+        Open a bundle and read its header.
+
+        Raises:
+            OSError: If the file cannot be read
+            ValueError: If it is not a bundle, is truncated, or has an
+                unsupported format version
+        """
+        self.path = path
+        with open(path, 'rb') as file:
+            if file.read(len(BUNDLE_MAGIC)) != BUNDLE_MAGIC:
+                raise ValueError(f"{path} is not an index bundle")
+            size = file.seek(0, os.SEEK_END)
+            if size < len(BUNDLE_MAGIC) + _FOOTER.size:
+                raise ValueError(f"{path} is truncated")
+            file.seek(size - _FOOTER.size)
+            header_length, header_sha256, magic = _FOOTER.unpack(file.read(_FOOTER.size))
+            if magic != BUNDLE_MAGIC or header_length > size - len(BUNDLE_MAGIC) - _FOOTER.size:
+                raise ValueError(f"{path} is truncated")
+            file.seek(size - _FOOTER.size - header_length)
+            header = file.read(header_length)
+        if hashlib.sha256(header).digest() != header_sha256:
+            raise ValueError(f"Checksum mismatch in the header of {path}; the bundle is corrupt")
+
+        self.header = json.loads(header.decode("utf-8"))
+        version = self.header.get("format_version")
+        if version != BUNDLE_FORMAT_VERSION:
+            raise ValueError(f"Bundle format version {version} is not supported (expected {BUNDLE_FORMAT_VERSION})")
+
+    def verify(self):
+        """
+        Check the SHA-256 of every section.
+
+        Raises:
+            ValueError: If a section does not match its checksum
+        """
+        with open(self.path, 'rb') as file:
+            for name, section in self.header["sections"].items():
+                file.seek(section["offset"])
+                digest = hashlib.sha256()
+                remaining = section["length"]
+                while remaining > 0:
+                    block = file.read(min(_READ_BLOCK_BYTES, remaining))
+                    if not block:
+                        break
+                    digest.update(block)
+                    remaining -= len(block)
+                if remaining or digest.hexdigest() != section["sha256"]:
+                    raise ValueError(f"Checksum mismatch in the {name} section of {self.path}; the bundle is corrupt")
+
+    def embeddings(self) -> np.memmap:
+        """Read-only memory map of the embedding matrix"""
+        section = self.header["sections"]["embeddings"]
+        return np.memmap(self.path, dtype=section["dtype"], mode='r',
+                         offset=section["offset"], shape=tuple(section["shape"]))
+
+    def records(self) -> Iterator[Dict]:
+        """Chunks (id, document, metadata) in embedding row order"""
+        section = self.header["sections"]["records"]
+        with open(self.path, 'rb') as file:
+            file.seek(section["offset"])
+            remaining = section["length"]
+            while remaining > 0:
+                line = file.readline(remaining)
+                remaining -= len(line)
+                yield json.loads(line)
+
+    def section_bytes(self, name: str) -> bytes:
+        """Raw content of a section"""
+        section = self.header["sections"][name]
+        with open(self.path, 'rb') as file:
+            file.seek(section["offset"])
+            return file.read(section["length"])
+
+
+def _stored_chunks(sqlite_path: str) -> int:
+    """Number of chunks in a NumPy store's side database (0 if there is none)"""
+    if not os.path.exists(sqlite_path):
+        return 0
+    connection = sqlite3.connect(sqlite_path)
+    try:
+        return connection.execute("SELECT COUNT(*) FROM records").fetchone()[0]
+    except sqlite3.Error:
+        return 0
+    finally:
+        connection.close()
+
+
+def _batches(bundle: IndexBundle) -> Iterator[Dict]:
+    """Chunks of the bundle in upsert-sized batches with their embeddings"""
+    embeddings = bundle.embeddings()
+    records: List[Dict] = []
+    start = 0
+    for record in bundle.records():
+        records.append(record)
+        if len(records) == _IMPORT_BATCH_SIZE:
+            yield {"records": records, "embeddings": np.asarray(embeddings[start:start + len(records)])}
+            start += len(records)
+            records = []
+    if records:
+        yield {"records": records, "embeddings": np.asarray(embeddings[start:start + len(records)])}
+
+
+def import_index(path: str, persist_directory: str = "./chroma_db", backend: str = "chroma",
+                 embedding_dtype: str = "float32", full_precision: Optional[bool] = None,
+                 pdf_directory: str = "Supporting Documents",
+                 verify: bool = True, force: bool = False) -> Dict:
+    """
+    Load a bundle into the vector database in ``persist_directory``.
+
+    No embedding model is loaded. The model recorded in the bundle becomes
+    the resolved model, so the next start loads it first and its index
+    signature matches the imported manifest.
+
+    Args:
+        path (str): Bundle file
+        persist_directory (str): Vector database directory
+        backend (str): Target backend, "chroma" or "numpy"
+        embedding_dtype (str): NumPy backend storage: "float32", "float16" or "int8"
+        full_precision (Optional[bool]): Keep float32 rows for rescoring
+            (NumPy backend; off by default for float16/int8)
+        pdf_directory (str): Local document folder matched against the corpus manifest
+        verify (bool): Check the section checksums before importing
+        force (bool): Replace an existing, non-empty index
+
+    Returns:
+        Dict: chunks, dimensions, model, seconds, and the corpus files that
+            match, differ from or are missing in ``pdf_directory``
+
+    Raises:
+        ValueError: If the bundle is invalid or corrupt, or the target
+            index is not empty and ``force`` is not set
+    """
+    start_time = time.perf_counter()
+    bundle = IndexBundle(path)
+    if verify:
+        bundle.verify()
+    header = bundle.header
+    dimensions = header["model"]["dimensions"]
+
+    # Construction only resolves paths; the model is never loaded here
+    vector_db = VectorDatabase(persist_directory=persist_directory, backend=backend,
+                               embedding_dtype=embedding_dtype, full_precision=full_precision,
+                               persist_query_cache=False)
+    index_directory = vector_db.index_directory
+
+    if backend == "numpy":
+        existing = _stored_chunks(os.path.join(index_directory, "records.sqlite3"))
+        if existing and not force:
+            raise ValueError(f"{index_directory} already holds {existing} chunks; use --force to replace them")
+        if os.path.isdir(index_directory):
+            shutil.rmtree(index_directory)
+        collection = NumpyStore(index_directory, dimensions, dtype=embedding_dtype,
+                                full_precision=full_precision)
+    else:
+        import chromadb
+
+        client = chromadb.PersistentClient(path=persist_directory)
+        try:
+            existing_collection = client.get_collection(COLLECTION_NAME)
+        except Exception:
+            existing_collection = None
+        if existing_collection is not None:
+            existing = existing_collection.count()
+            if existing and not force:
+                raise ValueError(f"{persist_directory} already holds {existing} chunks; use --force to replace them")
+            client.delete_collection(COLLECTION_NAME)
+        collection = client.create_collection(
+            name=COLLECTION_NAME,
+            metadata={"description": f"Aadhaar documents with BGE {dimensions}D embeddings"}
+        )
+
+    print(f"🔄 Importing {header['chunks']} chunks ({header['model']['name']}, {dimensions}D)...")
+    for batch in _batches(bundle):
+        records = batch["records"]
+        collection.upsert(
+            ids=[record["id"] for record in records],
+            documents=[record["document"] for record in records],
+            metadatas=[record["metadata"] for record in records],
+            embeddings=batch["embeddings"] if backend == "numpy" else batch["embeddings"].tolist()
+        )
+
+    os.makedirs(index_directory, exist_ok=True)
+    with open(vector_db.lexical_index_path, 'wb') as file:
+        file.write(bundle.section_bytes("lexical_index"))
+    checkpoint_path = os.path.join(index_directory, "ingest_checkpoint.json")
+    if os.path.exists(checkpoint_path):
+        os.remove(checkpoint_path)
+
+    # Point the manifest at the local copies of the corpus files; the stat
+    # fields are refreshed so the first start does not hash them again
+    corpus = {"matched": [], "changed": [], "missing": []}
+    entries = {}
+    for filename, entry in header["corpus"].items():
+        local_file = Path(pdf_directory) / filename
+        entries[filename] = dict(entry)
+        if not local_file.exists():
+            corpus["missing"].append(filename)
+        elif file_sha256(str(local_file)) != entry["sha256"]:
+            corpus["changed"].append(filename)
+        else:
+            stat = local_file.stat()
+            entries[filename].update({"path": str(local_file), "size": stat.st_size, "mtime": stat.st_mtime})
+            corpus["matched"].append(filename)
+    manifest = IndexManifest(os.path.join(index_directory, "index_manifest.json"))
+    manifest.signature = header["index_signature"]
+    manifest.entries = entries
+    manifest.save()
+
+    with open(os.path.join(persist_directory, RESOLVED_MODEL_FILE), 'w', encoding='utf-8') as file:
+        json.dump({"model_name": header["model"]["name"], "dimensions": dimensions}, file)
+
+    return {
+        "chunks": header["chunks"],
+        "dimensions": dimensions,
+        "model": header["model"]["name"],
+        "seconds": time.perf_counter() - start_time,
+        **corpus
+    }
@@ -0,0 +1,157 @@
+"""
+Index Manifest Module for Aadhaar Chat Agent
+
+This module keeps track of which PDF files have been indexed into the vector
+database and which chunks belong to each of them. Comparing the manifest with
+the files on disk lets the agent re-embed only the documents that were added,
+changed or deleted instead of rebuilding the whole collection.
+
+Manifest Entry (per filename):
+- path: Full path of the indexed file
+- size: File size in bytes when indexed
+- mtime: File modification time when indexed
+- sha256: Content hash of the indexed file
+- chunk_ids: IDs of the chunks stored in the collection for this file
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import json
+import os
+from pathlib import Path
+from typing import Dict, List, Optional
+from disk_cache import file_sha256
+
+
+class IndexManifest:
+    """
+    Persistent record of the files indexed into the vector database.
+
+    The manifest is a small JSON file stored next to the ChromaDB data. File
+    size and modification time are checked first; the content hash is only
+    computed when those differ, so unchanged corpora are diffed without
+    reading any PDF bytes.
+
+    Attributes:
+        path (Path): Location of the manifest JSON file
+        signature (Optional[str]): Embedding model and chunking settings the
+            entries were indexed with
+        entries (Dict[str, Dict]): Manifest entries keyed by filename
+        signature_changed (bool): The stored manifest was written with other
+            settings, so the collection must be emptied before re-indexing
+    """
+
+    def __init__(self, path: str, signature: Optional[str] = None):
+        """
+        Load the manifest from disk, starting empty if it does not exist.
+
+        Args:
+            path (str): Location of the manifest JSON file
+            signature (Optional[str]): Current embedding model and chunking
+                settings. If the stored manifest was written with different
+                settings, every file is treated as new so it gets re-indexed,
+                and ``signature_changed`` is set so the caller can drop the
+                old chunks first.
+        """
+        self.path = Path(path)
+        self.signature = signature
+        self.entries: Dict[str, Dict] = {}
+        self.signature_changed = False
+
+        if self.path.exists():
+            try:
+                with open(self.path, 'r', encoding='utf-8') as file:
+                    data = json.load(file)
+            except (OSError, ValueError) as e:
+                print(f"Warning: Could not read index manifest, rebuilding: {e}")
+                data = {}
+
+            if signature is not None and data.get("files") and data.get("signature") != signature:
+                print("🔄 Embedding model or chunking settings changed, re-indexing all documents")
+                self.signature_changed = True
+            else:
+                self.entries = data.get("files", {})
+
+    def diff(self, pdf_files: List[Path]) -> Dict:
+        """
+        Compare the manifest with the PDF files currently on disk.
+
+        Args:
+            pdf_files (List[Path]): PDF files that should be indexed
+
+        Returns:
+            Dict: Comparison result with keys:
+                - unchanged: Files whose content matches the manifest
+                - changed: Files whose content differs from the manifest
+                - added: Files not present in the manifest
+                - removed: Filenames in the manifest that no longer exist
+                - hashes: SHA-256 computed for changed and added files
+        """
+        result = {"unchanged": [], "changed": [], "added": [], "removed": [], "hashes": {}}
+        seen = set()
+
+        for pdf_file in pdf_files:
+            seen.add(pdf_file.name)
+            entry = self.entries.get(pdf_file.name)
+            stat = pdf_file.stat()
+
+            # Same size and mtime: trust the previous hash without reading the file
+            if entry and entry["size"] == stat.st_size and entry["mtime"] == stat.st_mtime:
+                result["unchanged"].append(pdf_file)
+                continue
+
+            sha256 = file_sha256(str(pdf_file))
+            if entry is None:
+                result["added"].append(pdf_file)
+                result["hashes"][pdf_file.name] = sha256
+            elif entry["sha256"] == sha256:
+                # Touched but identical; refresh the stat fields only
+                entry["size"] = stat.st_size
+                entry["mtime"] = stat.st_mtime
+                result["unchanged"].append(pdf_file)
+            else:
+                result["changed"].append(pdf_file)
+                result["hashes"][pdf_file.name] = sha256
+
+        result["removed"] = [name for name in self.entries if name not in seen]
+        return result
+
+    def chunk_ids(self, filename: str) -> Optional[List[str]]:
+        """Return the chunk IDs recorded for a file, or None if it is not indexed"""
+        entry = self.entries.get(filename)
+        return entry["chunk_ids"] if entry else None
+
+    def record(self, pdf_file: Path, sha256: str, chunk_ids: List[str]):
+        """
+        Record that a file has been indexed with the given chunks.
+
+        Args:
+            pdf_file (Path): Indexed PDF file
+            sha256 (str): Content hash of the indexed file
+            chunk_ids (List[str]): IDs of the chunks stored for this file
+        """
+        stat = pdf_file.stat()
+        self.entries[pdf_file.name] = {
+            "path": str(pdf_file),
+            "size": stat.st_size,
+            "mtime": stat.st_mtime,
+            "sha256": sha256,
+            "chunk_ids": chunk_ids
+        }
+
+    def remove(self, filename: str):
+        """Forget a file that has been deleted from the index"""
+        self.entries.pop(filename, None)
+
+    def clear(self):
+        """Forget every indexed file"""
+        self.entries = {}
+
+    def save(self):
+        """Write the manifest to disk atomically"""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump({"version": 1, "signature": self.signature, "files": self.entries}, file, indent=2)
+        os.replace(tmp_path, self.path)
@@ -0,0 +1,280 @@
+"""
+Streaming Ingest Pipeline Module for Aadhaar Chat Agent
+
+This module moves documents from PDF files into the vector database as a
+stream instead of one corpus-sized batch. Each stage is a generator or a
+worker thread connected by bounded queues, so memory use depends on the batch
+size rather than on the number of PDFs being indexed.
+
+Pipeline Stages:
+┌──────────────┐   ┌──────────────┐   ┌──────────────┐   ┌──────────────┐
+│ PDF extract  │──▶│    Chunk     │──▶│    Embed     │──▶│ Chroma write │
+│ (thread)     │   │ (generator)  │   │ (batches)    │   │ (thread)     │
+└──────────────┘   └──────────────┘   └──────────────┘   └──────────────┘
+
+Key Features:
+- Bounded queues between stages (back-pressure instead of buffering)
+- Fixed-size upsert batches into the collection
+- Checkpoint after every committed batch, so an interrupted run resumes
+  from the last committed batch instead of starting over
+- Index manifest updated as soon as each file is fully written
+- Files whose extraction failed keep their old chunks and manifest entry,
+  so the next sync retries them
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+# Marker placed on a queue when its producer has finished
+_DONE = object()
+
+
+class IngestPipeline:
+    """
+    Streams PDF documents through chunking and embedding into the vector database.
+
+    Batches of ``batch_size`` chunks are embedded and upserted one at a time.
+    After each batch is committed, the number of chunks written per file is
+    saved to a checkpoint file. If the process dies, the next run skips the
+    chunks that were already committed for files whose content hash has not
+    changed.
+
+    Attributes:
+        pdf_processor (PDFProcessor): Source of extracted documents
+        vector_db (VectorDatabase): Destination for chunks and embeddings
+        manifest (IndexManifest): Record of fully indexed files
+        batch_size (int): Number of chunks embedded and written per batch
+        queue_size (int): Capacity of each queue between stages
+        checkpoint_path (Path): Location of the resume checkpoint
+    """
+
+    def __init__(self, pdf_processor, vector_db, manifest, batch_size: int = 256,
+                 queue_size: int = 4, checkpoint_path: Optional[str] = None):
+        """
+        Initialize the pipeline.
+
+        Args:
+            pdf_processor (PDFProcessor): Source of extracted documents
+            vector_db (VectorDatabase): Destination for chunks and embeddings
+            manifest (IndexManifest): Record of fully indexed files
+            batch_size (int): Number of chunks embedded and written per batch
+            queue_size (int): Capacity of each queue between stages
+            checkpoint_path (Optional[str]): Location of the resume checkpoint,
+                defaults to ``ingest_checkpoint.json`` in the backend's index directory
+        """
+        self.pdf_processor = pdf_processor
+        self.vector_db = vector_db
+        self.manifest = manifest
+        self.batch_size = max(1, batch_size)
+        self.queue_size = max(1, queue_size)
+        self.checkpoint_path = Path(
+            checkpoint_path or os.path.join(vector_db.index_directory, "ingest_checkpoint.json")
+        )
+        self._stop = threading.Event()
+
+    def run(self, pdf_files: List[Path], hashes: Dict[str, str]) -> Dict:
+        """
+        Index the given PDF files.
+
+        Args:
+            pdf_files (List[Path]): Files to (re-)index
+            hashes (Dict[str, str]): SHA-256 of each file, keyed by filename
+
+        Returns:
+            Dict: Run statistics with keys files, chunks, resumed_chunks,
+                failed (files whose extraction failed) and seconds
+        """
+        checkpoint = self._load_checkpoint(hashes)
+        if checkpoint:
+            print(f"♻️  Resuming interrupted ingest ({sum(checkpoint.values())} chunks already committed)")
+
+        self._stop.clear()
+        stats = {"files": 0, "chunks": 0, "resumed_chunks": 0, "failed": 0, "seconds": 0.0}
+        start_time = time.perf_counter()
+
+        doc_queue = queue.Queue(maxsize=self.queue_size)
+        write_queue = queue.Queue(maxsize=self.queue_size)
+        errors = []
+
+        extractor = threading.Thread(
+            target=self._extract_stage, args=(pdf_files, doc_queue, errors), daemon=True
+        )
+        writer = threading.Thread(
+            target=self._write_stage, args=(write_queue, hashes, checkpoint, stats, errors), daemon=True
+        )
+        extractor.start()
+        writer.start()
+
+        try:
+            for batch in self._batches(self._drain(doc_queue), checkpoint, stats):
+                if errors:
+                    break
+                if batch["chunks"] and self.vector_db.embedding_model:
+                    batch["embeddings"] = self.vector_db.embed_texts(
+                        [chunk["text"] for chunk in batch["chunks"]]
+                    )
+                self._put(write_queue, batch)
+        except BaseException as e:
+            errors.append(e)
+        finally:
+            if errors:
+                self._stop.set()
+            self._put(write_queue, _DONE, force=True)
+            writer.join()
+            self._stop.set()
+            extractor.join()
+
+        if errors:
+            raise errors[0]
+
+        # Everything committed; the checkpoint is no longer needed
+        self.clear_checkpoint()
+        stats["seconds"] = time.perf_counter() - start_time
+        return stats
+
+    def _put(self, target: queue.Queue, item, force: bool = False):
+        """Put an item on a bounded queue, giving up if the pipeline is stopping"""
+        while True:
+            if self._stop.is_set() and not force:
+                return
+            try:
+                target.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                if force and self._stop.is_set():
+                    # Consumer is gone; drop queued work so the marker fits
+                    try:
+                        target.get_nowait()
+                    except queue.Empty:
+                        pass
+
+    def _drain(self, source: queue.Queue) -> Iterator[Dict]:
+        """Yield items from a queue until its producer signals completion"""
+        while True:
+            item = source.get()
+            if item is _DONE:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+
+    def _extract_stage(self, pdf_files: List[Path], doc_queue: queue.Queue, errors: List):
+        """Extractor thread: push documents onto the bounded document queue"""
+        try:
+            for doc in self.pdf_processor.iter_documents(pdf_files):
+                if self._stop.is_set():
+                    break
+                self._put(doc_queue, doc)
+        except BaseException as e:
+            errors.append(e)
+            self._put(doc_queue, e, force=True)
+            return
+        self._put(doc_queue, _DONE, force=True)
+
+    def _batches(self, documents: Iterator[Dict], checkpoint: Dict[str, int], stats: Dict) -> Iterator[Dict]:
+        """
+        Turn a stream of documents into fixed-size batches of chunks.
+
+        Each batch also lists the files whose final chunk it contains, so the
+        writer can record them in the manifest once the batch is committed.
+        Chunks already committed by an interrupted run are skipped. Files whose
+        extraction failed are left out entirely: marking them completed would
+        delete their existing chunks and record them as indexed.
+        """
+        batch = {"chunks": [], "completed": []}
+        for doc in documents:
+            if doc.get("failed"):
+                stats["failed"] += 1
+                continue
+            chunks = self.vector_db.chunk_document(doc) if doc["content"].strip() else []
+            committed = checkpoint.get(doc["filename"], 0)
+            stats["resumed_chunks"] += min(committed, len(chunks))
+
+            for chunk in chunks[committed:]:
+                batch["chunks"].append(chunk)
+                if len(batch["chunks"]) >= self.batch_size:
+                    yield batch
+                    batch = {"chunks": [], "completed": []}
+
+            batch["completed"].append((doc["source"], [chunk["id"] for chunk in chunks]))
+
+        if batch["chunks"] or batch["completed"]:
+            yield batch
+
+    def _write_stage(self, write_queue: queue.Queue, hashes: Dict[str, str],
+                     checkpoint: Dict[str, int], stats: Dict, errors: List):
+        """Writer thread: upsert batches, then checkpoint and update the manifest"""
+        try:
+            while True:
+                batch = write_queue.get()
+                if batch is _DONE or self._stop.is_set():
+                    return
+
+                self.vector_db.upsert_chunks(batch["chunks"], batch.get("embeddings"))
+                stats["chunks"] += len(batch["chunks"])
+                for chunk in batch["chunks"]:
+                    filename = chunk["metadata"]["filename"]
+                    checkpoint[filename] = chunk["metadata"]["chunk_index"] + 1
+
+                for source, chunk_ids in batch["completed"]:
+                    pdf_file = Path(source)
+                    # Drop leftover chunks from a longer previous version
+                    self.vector_db.delete_stale_chunks(pdf_file.name, chunk_ids)
+                    self.manifest.record(pdf_file, hashes[pdf_file.name], chunk_ids)
+                    checkpoint.pop(pdf_file.name, None)
+                    stats["files"] += 1
+                if batch["completed"]:
+                    self.manifest.save()
+
+                self._save_checkpoint(checkpoint, hashes)
+        except BaseException as e:
+            errors.append(e)
+            self._stop.set()
+
+    def _load_checkpoint(self, hashes: Dict[str, str]) -> Dict[str, int]:
+        """
+        Load committed chunk counts from an interrupted run.
+
+        Entries are only kept for files whose content hash is unchanged; a file
+        that was modified since the interruption is indexed from the start.
+        """
+        if not self.checkpoint_path.exists():
+            return {}
+        try:
+            with open(self.checkpoint_path, 'r', encoding='utf-8') as file:
+                saved = json.load(file).get("files", {})
+        except (OSError, ValueError):
+            return {}
+        return {
+            filename: entry["committed"]
+            for filename, entry in saved.items()
+            if hashes.get(filename) == entry.get("sha256")
+        }
+
+    def _save_checkpoint(self, checkpoint: Dict[str, int], hashes: Dict[str, str]):
+        """Write committed chunk counts for partially indexed files atomically"""
+        data = {
+            "files": {
+                filename: {"sha256": hashes.get(filename), "committed": committed}
+                for filename, committed in checkpoint.items()
+            }
+        }
+        tmp_path = self.checkpoint_path.with_suffix(".tmp")
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        os.replace(tmp_path, self.checkpoint_path)
+
+    def clear_checkpoint(self):
+        """Remove the checkpoint (after a successful run, or when the index is reset)"""
+        try:
+            self.checkpoint_path.unlink()
+        except FileNotFoundError:
+            pass
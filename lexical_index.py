@@ -0,0 +1,234 @@
+"""
+Lexical Index Module for Aadhaar Chat Agent
+
+This module implements a compact BM25 inverted index over the document chunks
+stored in the vector database. Aadhaar questions often hinge on exact tokens
+such as "Form 7", "POI" or "POA", which dense embeddings tend to blur; a
+lexical ranking fused with the vector ranking recovers those matches without
+retrieving (and sending to the LLM) more chunks.
+
+Technical Details:
+- Tokens: lowercase alphanumeric words plus adjacent-word bigrams ("form_7")
+- Storage: CSR-style postings arrays (offsets, document indices, term frequencies)
+- Scoring: Okapi BM25 (k1=1.5, b=0.75), vectorized with NumPy
+- Persistence: Single ``.npz`` file next to the ChromaDB data
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import re
+from collections import Counter
+from typing import Dict, List, Tuple
+import numpy as np
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Split text into lexical index terms.
+
+    Adjacent-word bigrams are added so that phrases such as "Form 7" score
+    higher than documents that merely contain "form" and "7" far apart.
+
+    Args:
+        text (str): Text to tokenize
+
+    Returns:
+        List[str]: Unigram and bigram terms
+    """
+    words = re.findall(r"[a-z0-9]+", text.lower())
+    return words + [f"{first}_{second}" for first, second in zip(words, words[1:])]
+
+
+def reciprocal_rank_fusion(rankings: List[List[str]], k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Fuse several ranked ID lists with reciprocal rank fusion.
+
+    Args:
+        rankings (List[List[str]]): Ranked lists of IDs, best first
+        k (int): RRF damping constant
+
+    Returns:
+        List[Tuple[str, float]]: (id, fused score) pairs, best first
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """
+    In-memory BM25 inverted index with NumPy postings.
+
+    Postings for term ``t`` are ``doc_indices[offsets[t]:offsets[t + 1]]`` with
+    matching ``term_freqs``. A query is scored by adding each term's BM25
+    contribution to a dense score vector, so the cost is proportional to the
+    length of the posting lists touched.
+
+    Attributes:
+        ids (List[str]): Chunk ID of each indexed document
+        k1 (float): BM25 term-frequency saturation parameter
+        b (float): BM25 length normalization parameter
+    """
+
+    def __init__(self, ids: List[str], vocabulary: List[str], offsets: np.ndarray,
+                 doc_indices: np.ndarray, term_freqs: np.ndarray, doc_lengths: np.ndarray,
+                 k1: float = 1.5, b: float = 0.75):
+        """
+        Create an index from prebuilt postings arrays (see ``build`` and ``load``).
+
+        Args:
+            ids (List[str]): Chunk ID of each indexed document
+            vocabulary (List[str]): Terms ordered by term ID
+            offsets (np.ndarray): Start of each term's postings (length V + 1)
+            doc_indices (np.ndarray): Document index of every posting
+            term_freqs (np.ndarray): Term frequency of every posting
+            doc_lengths (np.ndarray): Number of terms in each document
+            k1 (float): BM25 term-frequency saturation parameter
+            b (float): BM25 length normalization parameter
+        """
+        self.ids = list(ids)
+        self.k1 = k1
+        self.b = b
+        self._vocabulary = list(vocabulary)
+        self._term_ids = {term: i for i, term in enumerate(self._vocabulary)}
+        self._offsets = offsets.astype(np.int64)
+        self._doc_indices = doc_indices.astype(np.int32)
+        self._term_freqs = term_freqs.astype(np.float32)
+        self._doc_lengths = doc_lengths.astype(np.float32)
+
+        # Precompute per-document length normalization and per-term IDF
+        doc_count = len(self.ids)
+        average_length = float(self._doc_lengths.mean()) if doc_count else 0.0
+        self._length_norm = self.k1 * (
+            1 - self.b + self.b * self._doc_lengths / max(average_length, 1e-9)
+        )
+        document_freqs = np.diff(self._offsets).astype(np.float32)
+        self._idf = np.log1p((doc_count - document_freqs + 0.5) / (document_freqs + 0.5))
+
+    @classmethod
+    def build(cls, ids: List[str], texts: List[str]) -> "BM25Index":
+        """
+        Build an index from chunk texts.
+
+        Args:
+            ids (List[str]): Chunk IDs
+            texts (List[str]): Chunk texts, aligned with ``ids``
+
+        Returns:
+            BM25Index: The new index
+        """
+        term_ids: Dict[str, int] = {}
+        posting_terms = []
+        posting_docs = []
+        posting_freqs = []
+        doc_lengths = np.zeros(len(texts), dtype=np.float32)
+
+        for doc_index, text in enumerate(texts):
+            terms = tokenize(text)
+            doc_lengths[doc_index] = len(terms)
+            for term, freq in Counter(terms).items():
+                posting_terms.append(term_ids.setdefault(term, len(term_ids)))
+                posting_docs.append(doc_index)
+                posting_freqs.append(freq)
+
+        # Group postings by term (stable sort keeps document order within a term)
+        posting_terms = np.asarray(posting_terms, dtype=np.int64)
+        order = np.argsort(posting_terms, kind="stable")
+        offsets = np.zeros(len(term_ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(posting_terms, minlength=len(term_ids)), out=offsets[1:])
+
+        vocabulary = [""] * len(term_ids)
+        for term, term_id in term_ids.items():
+            vocabulary[term_id] = term
+
+        return cls(
+            ids,
+            vocabulary,
+            offsets,
+            np.asarray(posting_docs, dtype=np.int32)[order],
+            np.asarray(posting_freqs, dtype=np.float32)[order],
+            doc_lengths
+        )
+
+    def __len__(self) -> int:
+        """Number of indexed documents"""
+        return len(self.ids)
+
+    def search(self, query: str, n_results: int = 10) -> List[Tuple[str, float]]:
+        """
+        Rank indexed chunks against a query with BM25.
+
+        Args:
+            query (str): Query text
+            n_results (int): Maximum number of results
+
+        Returns:
+            List[Tuple[str, float]]: (chunk ID, BM25 score) pairs, best first;
+                chunks sharing no term with the query are omitted
+        """
+        if not self.ids:
+            return []
+
+        scores = np.zeros(len(self.ids), dtype=np.float32)
+        for term in set(tokenize(query)):
+            term_id = self._term_ids.get(term)
+            if term_id is None:
+                continue
+            start, end = self._offsets[term_id], self._offsets[term_id + 1]
+            docs = self._doc_indices[start:end]
+            freqs = self._term_freqs[start:end]
+            # Each document appears at most once per term, so fancy-index add is safe
+            scores[docs] += self._idf[term_id] * freqs * (self.k1 + 1) / (freqs + self._length_norm[docs])
+
+        matched = np.flatnonzero(scores)
+        if matched.size == 0:
+            return []
+        if matched.size > n_results:
+            matched = matched[np.argpartition(-scores[matched], n_results - 1)[:n_results]]
+        matched = matched[np.argsort(-scores[matched])]
+        return [(self.ids[i], float(scores[i])) for i in matched]
+
+    def save(self, path: str):
+        """
+        Save the index to a ``.npz`` file.
+
+        Args:
+            path (str): Destination file
+        """
+        np.savez(
+            path,
+            ids=np.array(self.ids, dtype=str),
+            vocabulary=np.array(self._vocabulary, dtype=str),
+            offsets=self._offsets,
+            doc_indices=self._doc_indices,
+            term_freqs=self._term_freqs,
+            doc_lengths=self._doc_lengths,
+            params=np.array([self.k1, self.b], dtype=np.float64)
+        )
+
+    @classmethod
+    def load(cls, path: str) -> "BM25Index":
+        """
+        Load an index saved with ``save``.
+
+        Args:
+            path (str): Source file
+
+        Returns:
+            BM25Index: The loaded index
+        """
+        with np.load(path) as data:
+            k1, b = data["params"]
+            return cls(
+                [str(item) for item in data["ids"]],
+                [str(item) for item in data["vocabulary"]],
+                data["offsets"],
+                data["doc_indices"],
+                data["term_freqs"],
+                data["doc_lengths"],
+                k1=float(k1),
+                b=float(b)
+            )
@@ -18,31 +18,55 @@ Repository: https://github.com/avinav86/Aadhar_Agent
 import typer
 from rich.console import Console
 from rich.panel import Panel
-from aadhaar_agent import AadhaarChatAgent
 import os
+import signal
+import sys
+import time
 from pathlib import Path
+from typing import Optional
 from dotenv import load_dotenv
+from metrics import profile_table, request_profile
 
 # Load environment variables from config.env file
 # This allows users to store their OpenAI API key securely
 load_dotenv('config.env')
 
+# The agent (and with it torch, sentence-transformers and ChromaDB) is imported
+# inside the commands that need it, so 'setup' and 'cache' start instantly
+
 # Initialize Typer app for CLI commands
 app = typer.Typer()
+# 'python main.py index export|import' for prebuilt index bundles
+index_app = typer.Typer(help="Export and import prebuilt index bundles")
+app.add_typer(index_app, name="index")
 # Initialize Rich console for beautiful terminal output
 console = Console()
 
-@app.command()
-def chat():
+# Agent options shared by chat, ask, serve and batch (and reused by the
+# commands that take the same store or runtime settings)
+WORKERS_OPTION = typer.Option(1, "--workers", help="Processes used for PDF extraction during indexing")
+EMBED_PROCESSES_OPTION = typer.Option(0, "--embed-processes", help="Processes used for embedding during indexing (-1 = all cores)")
+BACKEND_OPTION = typer.Option("chroma", "--backend", help="Vector store backend: chroma or numpy")
+EMBEDDING_DTYPE_OPTION = typer.Option("float32", "--embedding-dtype", help="NumPy backend storage: float32, float16 or int8")
+FULL_PRECISION_OPTION = typer.Option(None, "--full-precision/--no-full-precision", help="Keep float32 rows to rescore float16/int8 results (default: off, smallest index)")
+EMBEDDING_BACKEND_OPTION = typer.Option("torch", "--embedding-backend", help="Embedding runtime: torch, onnx or onnx-int8 (ONNX Runtime, CPU)")
+ONNX_THREADS_OPTION = typer.Option(0, "--onnx-threads", help="ONNX Runtime threads (0 = automatic)")
+RERANK_OPTION = typer.Option(False, "--rerank", help="Rerank retrieved chunks with a cross-encoder and drop irrelevant ones")
+SEARCH_MODE_OPTION = typer.Option("vector", "--search-mode", help="Retrieval: vector (embeddings only) or hybrid (BM25 fused with vector ranking)")
+
+def _ensure_api_key() -> bool:
     """
-    Start the interactive chat session with the Aadhaar agent.
+    Make sure OPENAI_API_KEY is set, prompting for it if necessary.
     
-    This command launches the main conversational interface where users can:
-    - Ask questions about Aadhaar processes
-    - Get document requirements
-    - Learn about enrollment procedures
-    - Receive contextual follow-up responses
+    Returns:
+        bool: True if a key is available for this session
     """
+    from response_cache import REPLAY, RESPONSE_CACHE_ENV
+    
+    # Replaying recorded responses never contacts the API
+    if os.getenv(RESPONSE_CACHE_ENV, "").strip().lower() == REPLAY:
+        return True
+    
     # Check for OpenAI API key in environment variables
     # First check if it's loaded from config.env or set manually
     api_key = os.getenv("OPENAI_API_KEY")
@@ -68,13 +92,69 @@ def chat():
         # Exit if no API key provided
         if not api_key:
             console.print("[red]❌ No API key provided. Exiting.[/red]")
-            return
+            return False
         
         # Set the environment variable for this session only
         os.environ["OPENAI_API_KEY"] = api_key
         console.print("[green]✅ API key set for this session![/green]")
         console.print("[dim]💡 Tip: Add it to config.env for permanent storage[/dim]")
     
+    return True
+
+def _create_agent(pdf_directory: str, workers: int, embed_processes: int, backend: str,
+                  embedding_dtype: str, full_precision: Optional[bool], embedding_backend: str,
+                  onnx_threads: int, rerank: bool, search_mode: str):
+    """
+    Construct the agent from the options shared by chat, ask, serve and batch.
+    
+    The agent (and with it torch and the vector database) is only imported here,
+    so commands that do not need it start instantly.
+    
+    Args:
+        pdf_directory (str): Folder with the Aadhaar PDF files
+        workers (int): Processes used for PDF extraction when indexing
+        embed_processes (int): Processes used for embedding when indexing
+        backend (str): Vector store backend, "chroma" or "numpy"
+        embedding_dtype (str): Embedding storage type of the NumPy backend
+        full_precision (Optional[bool]): Keep float32 rows for rescoring quantized results
+        embedding_backend (str): Embedding runtime, "torch", "onnx" or "onnx-int8"
+        onnx_threads (int): ONNX Runtime threads
+        rerank (bool): Rerank retrieved chunks with a cross-encoder
+        search_mode (str): Retrieval mode, "vector" or "hybrid"
+        
+    Returns:
+        AadhaarChatAgent: The agent, not yet initialized
+    """
+    from aadhaar_agent import AadhaarChatAgent
+    
+    return AadhaarChatAgent(pdf_directory, extract_workers=workers, embed_processes=embed_processes,
+                            backend=backend, embedding_dtype=embedding_dtype, rerank=rerank,
+                            embedding_backend=embedding_backend, onnx_threads=onnx_threads,
+                            full_precision=full_precision, search_mode=search_mode)
+
+@app.command()
+def chat(workers: int = WORKERS_OPTION,
+         embed_processes: int = EMBED_PROCESSES_OPTION,
+         backend: str = BACKEND_OPTION,
+         embedding_dtype: str = EMBEDDING_DTYPE_OPTION,
+         full_precision: Optional[bool] = FULL_PRECISION_OPTION,
+         embedding_backend: str = EMBEDDING_BACKEND_OPTION,
+         onnx_threads: int = ONNX_THREADS_OPTION,
+         rerank: bool = RERANK_OPTION,
+         search_mode: str = SEARCH_MODE_OPTION,
+         profile: bool = typer.Option(False, "--profile", help="Print the time spent in each stage and the tokens used after every answer")):
+    """
+    Start the interactive chat session with the Aadhaar agent.
+    
+    This command launches the main conversational interface where users can:
+    - Ask questions about Aadhaar processes
+    - Get document requirements
+    - Learn about enrollment procedures
+    - Receive contextual follow-up responses
+    """
+    if not _ensure_api_key():
+        return
+    
     # Verify that the Supporting Documents directory exists
     # This directory contains the Aadhaar PDF files for the knowledge base
     pdf_dir = "Supporting Documents"
@@ -91,15 +171,30 @@ def chat():
     # Initialize and start the chat agent
     try:
         # Create the main agent instance with the PDF directory
-        agent = AadhaarChatAgent(pdf_dir)
+        agent = _create_agent(pdf_dir, workers, embed_processes, backend, embedding_dtype, full_precision,
+                              embedding_backend, onnx_threads, rerank, search_mode)
         # Start the interactive chat loop
-        agent.chat_loop()
+        agent.chat_loop(profile=profile)
     except Exception as e:
         # Handle any errors during agent initialization or execution
         console.print(f"[red]Error starting agent: {str(e)}[/red]")
 
 @app.command()
-def ask(question: str):
+def ask(question: str,
+        workers: int = WORKERS_OPTION,
+        embed_processes: int = EMBED_PROCESSES_OPTION,
+        backend: str = BACKEND_OPTION,
+        embedding_dtype: str = EMBEDDING_DTYPE_OPTION,
+        full_precision: Optional[bool] = FULL_PRECISION_OPTION,
+        embedding_backend: str = EMBEDDING_BACKEND_OPTION,
+        onnx_threads: int = ONNX_THREADS_OPTION,
+        rerank: bool = RERANK_OPTION,
+        search_mode: str = SEARCH_MODE_OPTION,
+        session: str = typer.Option(None, "--session", help="Server session to continue (keeps conversation context between calls)"),
+        server: str = typer.Option(None, "--server", help="Server URL or Unix socket path (default: auto-detect)"),
+        local: bool = typer.Option(False, "--local", help="Always answer in this process, even if a server is running"),
+        stream: bool = typer.Option(True, "--stream/--no-stream", help="Show the answer while it is being generated"),
+        profile: bool = typer.Option(False, "--profile", help="Print the time spent in each stage and the tokens used")):
     """
     Ask a single question and get an immediate response.
     
@@ -108,55 +203,583 @@ def ask(question: str):
     - Scripting and automation
     - Testing specific questions
     
+    If a server started with 'python main.py serve' is running, the question
+    is sent to it; otherwise the agent is started in this process.
+    
     Args:
         question (str): The Aadhaar-related question to ask
+        workers (int): Number of processes used for PDF extraction when indexing
+        embed_processes (int): Number of processes used for embedding when indexing
+        backend (str): Vector store backend, "chroma" or "numpy"
+        embedding_dtype (str): Embedding storage type of the NumPy backend
+        full_precision (Optional[bool]): Keep float32 rows for rescoring quantized results
+        embedding_backend (str): Embedding runtime, "torch", "onnx" or "onnx-int8"
+        onnx_threads (int): ONNX Runtime threads
+        rerank (bool): Rerank retrieved chunks with a cross-encoder
+        search_mode (str): Retrieval mode, "vector" or "hybrid"
+        session (str): Server session ID to continue
+        server (str): Server URL or Unix socket path
+        local (bool): Skip server detection
+        stream (bool): Render the answer as it is generated
+        profile (bool): Print a per-stage latency and token breakdown
         
     Example:
         python main.py ask "What documents are required for enrollment?"
     """
-    # Check for OpenAI API key (same logic as chat command)
-    api_key = os.getenv("OPENAI_API_KEY")
-    
-    # Handle missing or placeholder API key
-    if not api_key or api_key == "your_openai_api_key_here":
-        # Display configuration instructions
-        console.print(Panel.fit(
-            "🔑 OpenAI API Key Required\n\n"
-            "Please add your API key to 'config.env' file:\n"
-            "1. Open config.env file\n"
-            "2. Replace 'your_openai_api_key_here' with your actual API key\n"
-            "3. Save the file and run again\n\n"
-            "Get your API key from: https://platform.openai.com/api-keys",
-            title="Configuration Required",
-            border_style="yellow"
-        ))
-        
-        # Provide manual entry option as fallback
-        console.print("\n[dim]Or enter it manually now (will not be saved):[/dim]")
-        api_key = typer.prompt("Please enter your OpenAI API key", hide_input=True)
-        
-        # Exit if no API key provided
-        if not api_key:
-            console.print("[red]❌ No API key provided. Exiting.[/red]")
-            return
+    # Send the question to a running server if there is one; it already has
+    # the model, index and OpenAI client loaded
+    if not local:
+        from chat_server import find_server
         
-        # Set API key for this session only
-        os.environ["OPENAI_API_KEY"] = api_key
-        console.print("[green]✅ API key set for this session![/green]")
-        console.print("[dim]💡 Tip: Add it to config.env for permanent storage[/dim]")
+        client = find_server(server)
+        if client is not None:
+            try:
+                if stream:
+                    events = client.ask_stream(question, session_id=session, profile=profile)
+                    result = {}
+                    
+                    def pieces():
+                        # The last event carries the metadata instead of text
+                        for event in events:
+                            if "token" in event:
+                                yield event["token"]
+                            else:
+                                result.update(event)
+                    
+                    from display import print_streamed
+                    print_streamed(console, pieces())
+                else:
+                    result = client.ask(question, session_id=session, profile=profile)
+                    console.print(Panel(result["answer"], title="Response", border_style="green"))
+                console.print(f"[dim]Answered by server in {result['seconds']:.2f}s "
+                              f"(session {result['session_id']})[/dim]")
+                if profile and "profile" in result:
+                    console.print(profile_table(result["profile"]))
+                return
+            except Exception as e:
+                console.print(f"[yellow]⚠️  Server request failed, answering locally: {e}[/yellow]")
+    
+    # Check for OpenAI API key (same logic as chat command)
+    if not _ensure_api_key():
+        return
     
     # Process the question and display response
     try:
         # Initialize the agent with the Supporting Documents directory
-        agent = AadhaarChatAgent("Supporting Documents")
-        # Get response for the single question
-        response = agent.ask_question(question)
-        # Display the response in a styled panel
-        console.print(Panel(response, title="Response", border_style="green"))
+        agent = _create_agent("Supporting Documents", workers, embed_processes, backend, embedding_dtype,
+                              full_precision, embedding_backend, onnx_threads, rerank, search_mode)
+        # Indexing happens before the question so it is not part of the profile
+        agent.initialize()
+        with request_profile() as request:
+            # Get response for the single question
+            result = agent.answer_question(question, stream=stream)
+            if stream:
+                # Display the response while it is being generated
+                from display import print_streamed
+                print_streamed(console, result["answer"])
+            else:
+                # Display the response in a styled panel
+                console.print(Panel(result["answer"], title="Response", border_style="green"))
+        if profile:
+            console.print(profile_table(request.to_dict()))
     except Exception as e:
         # Handle any errors during processing
         console.print(f"[red]Error: {str(e)}[/red]")
 
+@app.command()
+def serve(host: str = typer.Option("127.0.0.1", "--host", help="Address to listen on"),
+          port: int = typer.Option(8765, "--port", help="TCP port to listen on"),
+          socket_path: str = typer.Option(None, "--socket", help="Listen on this Unix socket instead of TCP"),
+          workers: int = WORKERS_OPTION,
+          embed_processes: int = EMBED_PROCESSES_OPTION,
+          backend: str = BACKEND_OPTION,
+          embedding_dtype: str = EMBEDDING_DTYPE_OPTION,
+          full_precision: Optional[bool] = FULL_PRECISION_OPTION,
+          embedding_backend: str = EMBEDDING_BACKEND_OPTION,
+          onnx_threads: int = ONNX_THREADS_OPTION,
+          rerank: bool = RERANK_OPTION,
+          search_mode: str = SEARCH_MODE_OPTION,
+          session_ttl: float = typer.Option(3600, "--session-ttl", help="Idle seconds before a conversation is forgotten")):
+    """
+    Keep the agent loaded and answer questions over local HTTP.
+    
+    The embedding model, vector database and OpenAI client are loaded once.
+    'python main.py ask' finds the running server automatically, and each
+    client session keeps its own conversation history.
+    
+    Example:
+        python main.py serve --port 8765
+        python main.py ask --session demo "What is Form 7?"
+        curl -s localhost:8765/ask -d '{"question": "What is Form 7?"}'
+    """
+    if not _ensure_api_key():
+        return
+    
+    from chat_server import ChatServer
+    
+    agent = _create_agent("Supporting Documents", workers, embed_processes, backend, embedding_dtype,
+                          full_precision, embedding_backend, onnx_threads, rerank, search_mode)
+    server = ChatServer(agent, host=host, port=port, socket_path=socket_path, session_ttl=session_ttl)
+    try:
+        server.start()
+    except Exception as e:
+        console.print(f"[red]Error starting server: {str(e)}[/red]")
+        return
+    
+    address = server.address.get("url") or server.address.get("socket")
+    console.print(Panel.fit(f"🌐 Serving Aadhaar Chat Agent on {address}\nPress Ctrl+C to stop",
+                            style="bold green"))
+    # Treat 'kill' like Ctrl+C so the socket and discovery file are cleaned up
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        console.print("\n👋 Server stopped.")
+
+@app.command()
+def batch(questions: str = typer.Argument(..., help="JSONL file of questions ({\"id\": ..., \"question\": ...} per line)"),
+          out: str = typer.Option("answers.jsonl", "--out", help="JSONL file the answers are appended to"),
+          concurrency: int = typer.Option(8, "--concurrency", help="Maximum number of OpenAI calls in flight"),
+          limit: int = typer.Option(None, "--limit", help="Answer at most this many pending questions"),
+          no_answer_cache: bool = typer.Option(False, "--no-answer-cache", help="Generate every answer, even for near-duplicate questions"),
+          workers: int = WORKERS_OPTION,
+          embed_processes: int = EMBED_PROCESSES_OPTION,
+          backend: str = BACKEND_OPTION,
+          embedding_dtype: str = EMBEDDING_DTYPE_OPTION,
+          full_precision: Optional[bool] = FULL_PRECISION_OPTION,
+          embedding_backend: str = EMBEDDING_BACKEND_OPTION,
+          onnx_threads: int = ONNX_THREADS_OPTION,
+          rerank: bool = RERANK_OPTION,
+          search_mode: str = SEARCH_MODE_OPTION):
+    """
+    Answer a file of questions and write one JSON row per answer.
+    
+    All questions are embedded in one batched encode and searched in bulk;
+    the OpenAI calls then run concurrently. Each output row holds the answer,
+    the retrieved sources, token usage and latency. Rows are written as they
+    complete, so rerunning the same command after a crash only answers the
+    questions that are still missing (failed questions are retried).
+    
+    Example:
+        python main.py batch questions.jsonl --out answers.jsonl --concurrency 16
+    """
+    if not _ensure_api_key():
+        return
+    
+    from batch_runner import BatchRunner
+    
+    agent = _create_agent("Supporting Documents", workers, embed_processes, backend, embedding_dtype,
+                          full_precision, embedding_backend, onnx_threads, rerank, search_mode)
+    runner = BatchRunner(agent, concurrency=concurrency, use_answer_cache=not no_answer_cache)
+    try:
+        stats = runner.run(questions, out, limit=limit)
+    except (OSError, ValueError, KeyError) as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    
+    console.print(Panel(
+        f"Questions: {stats['total']} ({stats['skipped']} already answered)\n"
+        f"Answered: {stats['answered']} ({stats['cached']} from cache), failed: {stats['failed']}\n"
+        f"Tokens: {stats['prompt_tokens']} prompt, {stats['completion_tokens']} completion\n"
+        f"Retrieval: {stats['retrieval_seconds']:.2f}s, total: {stats['total_seconds']:.2f}s",
+        title="Batch complete", border_style="green"
+    ))
+    if stats["failed"]:
+        console.print(f"[yellow]⚠️  {stats['failed']} questions failed; run the same command again to retry them[/yellow]")
+
+@app.command()
+def cache(purge: bool = typer.Option(False, "--purge", help="Delete all cached PDF text")):
+    """
+    Inspect or purge the cache of extracted PDF text.
+    
+    Extracted page text is cached on disk, keyed by the SHA-256 of each PDF,
+    so unchanged files are not parsed again when the index is rebuilt.
+    
+    Example:
+        python main.py cache
+        python main.py cache --purge
+    """
+    from disk_cache import DiskCache
+    from pdf_processor import DEFAULT_CACHE_DIRECTORY
+    
+    extraction_cache = DiskCache(DEFAULT_CACHE_DIRECTORY)
+    
+    if purge:
+        removed = extraction_cache.purge()
+        console.print(f"[green]🧹 Removed {removed} cached PDF extractions[/green]")
+        return
+    
+    stats = extraction_cache.stats()
+    console.print(Panel(
+        f"Directory: {stats['directory']}\n"
+        f"Entries: {stats['entries']}\n"
+        f"Size: {stats['total_bytes'] / (1024 * 1024):.1f} MB "
+        f"of {stats['max_bytes'] / (1024 * 1024):.0f} MB\n"
+        f"Oldest entry: {stats['oldest_entry_age_seconds'] / 3600:.1f} hours ago",
+        title="PDF Extraction Cache",
+        border_style="blue"
+    ))
+
+@app.command("response-cache")
+def response_cache(purge: bool = typer.Option(False, "--purge", help="Delete all recorded OpenAI responses")):
+    """
+    Inspect or purge the cache of recorded OpenAI responses.
+    
+    Responses are keyed by a hash of the exact request (model, messages and
+    sampling parameters). Set OPENAI_RESPONSE_CACHE to "read-through" to reuse
+    and record responses, or to "replay" to serve only recorded responses
+    without contacting the API.
+    
+    Example:
+        OPENAI_RESPONSE_CACHE=read-through python main.py batch questions.jsonl
+        OPENAI_RESPONSE_CACHE=replay python main.py batch questions.jsonl --out replay.jsonl
+        python main.py response-cache --purge
+    """
+    from response_cache import ResponseCache
+    
+    try:
+        cache = ResponseCache.from_env()
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    if purge:
+        removed = cache.store.purge()
+        console.print(f"[green]🧹 Removed {removed} recorded responses[/green]")
+        return
+    
+    stats = cache.store.stats()
+    console.print(Panel(
+        f"Mode: {cache.mode} (set OPENAI_RESPONSE_CACHE to off, read-through or replay)\n"
+        f"Directory: {stats['directory']}\n"
+        f"Responses: {stats['entries']}\n"
+        f"Size: {stats['total_bytes'] / (1024 * 1024):.1f} MB "
+        f"of {stats['max_bytes'] / (1024 * 1024):.0f} MB\n"
+        f"Oldest entry: {stats['oldest_entry_age_seconds'] / 3600:.1f} hours ago",
+        title="OpenAI Response Cache",
+        border_style="blue"
+    ))
+
+@app.command("quant-report")
+def quant_report(k: int = typer.Option(10, "--k", help="Number of neighbours compared for recall@k"),
+                 samples: int = typer.Option(200, "--samples", help="Number of synthetic queries"),
+                 backend: str = typer.Option("chroma", "--backend", help="Vector store backend to read: chroma or numpy")):
+    """
+    Compare index size and recall@k of float32, float16 and int8 embeddings.
+    
+    Reads the embeddings of the existing index (run chat or ask once first),
+    quantizes them in memory and measures how many of the exact float32
+    nearest neighbours each storage type finds, with and without float32
+    rescoring of the top candidates. Sizes are what the NumPy store keeps on
+    disk, including the float32 rows that rescoring needs.
+    
+    Example:
+        python main.py quant-report --k 5
+    """
+    from rich.table import Table
+    from vector_db import VectorDatabase
+    
+    vector_db = VectorDatabase(backend=backend, persist_query_cache=False)
+    rows = vector_db.quantization_report(k=k, sample_queries=samples)
+    if not rows:
+        console.print("[yellow]⚠️  The index is empty, run 'python main.py chat' first to build it[/yellow]")
+        return
+    
+    table = Table(title=f"Embedding storage vs float32 ({vector_db.collection.count()} chunks, recall@{k})")
+    table.add_column("Storage")
+    table.add_column("Size on disk", justify="right")
+    table.add_column("Recall", justify="right")
+    table.add_column("Size with float32 rows", justify="right")
+    table.add_column("Recall (rescored)", justify="right")
+    for row in rows:
+        table.add_row(
+            row["dtype"],
+            f"{row['bytes'] / (1024 * 1024):.2f} MB ({row['relative_size']:.0%})",
+            f"{row['recall_at_k']:.3f}",
+            f"{row['bytes_rescored'] / (1024 * 1024):.2f} MB ({row['relative_size_rescored']:.0%})",
+            f"{row['recall_at_k_rescored']:.3f}"
+        )
+    console.print(table)
+    console.print("[dim]Rescoring (--full-precision) keeps the float32 rows on disk next to the quantized matrix.[/dim]")
+
+@app.command("startup-report")
+def startup_report(backend: str = BACKEND_OPTION,
+                   embedding_backend: str = EMBEDDING_BACKEND_OPTION,
+                   as_json: bool = typer.Option(False, "--json", help="Print machine-readable JSON"),
+                   max_seconds: float = typer.Option(0.0, "--max-seconds", help="Exit with status 1 if the total exceeds this (0 = no limit)")):
+    """
+    Measure how long each startup phase takes.
+    
+    Phases: importing the CLI in a fresh interpreter, importing the agent,
+    constructing it, loading the embedding model, opening the collection,
+    syncing the index and the first search. Use --json and --max-seconds to
+    track startup regressions in scripts.
+    
+    Example:
+        python main.py startup-report --json --max-seconds 30
+    """
+    import json
+    import subprocess
+    
+    report = {}
+    
+    # Cost of 'python main.py <command>' before any command runs
+    probe = "import time; start = time.perf_counter(); import main; print(time.perf_counter() - start)"
+    result = subprocess.run([sys.executable, "-c", probe], capture_output=True, text=True,
+                            cwd=os.path.dirname(os.path.abspath(__file__)))
+    report["cli_import_seconds"] = float(result.stdout.strip() or "nan")
+    
+    start_time = time.perf_counter()
+    from aadhaar_agent import AadhaarChatAgent
+    report["agent_import_seconds"] = time.perf_counter() - start_time
+    
+    # No completion is requested, but the OpenAI client needs a key to be constructed
+    os.environ.setdefault("OPENAI_API_KEY", "startup-report")
+    start_time = time.perf_counter()
+    agent = AadhaarChatAgent("Supporting Documents", backend=backend, embedding_backend=embedding_backend)
+    report["agent_construct_seconds"] = time.perf_counter() - start_time
+    
+    agent.initialize()
+    report.update(agent.timings)
+    
+    start_time = time.perf_counter()
+    agent.vector_db.search("What documents are required for Aadhaar enrollment?", n_results=3)
+    report["first_search_seconds"] = time.perf_counter() - start_time
+    
+    report["total_seconds"] = sum(
+        seconds for phase, seconds in report.items()
+        if phase not in ("cli_import_seconds", "model_load_seconds", "collection_open_seconds")
+    )
+    report["embedding_model"] = agent.vector_db.model_name
+    report["embedding_backend"] = agent.vector_db.active_embedding_backend
+    
+    if as_json:
+        print(json.dumps(report, indent=2))
+    else:
+        from rich.table import Table
+        
+        table = Table(title="Startup Time")
+        table.add_column("Phase")
+        table.add_column("Seconds", justify="right")
+        for phase, seconds in report.items():
+            if phase.endswith("_seconds"):
+                table.add_row(phase[:-len("_seconds")].replace("_", " "), f"{seconds:.3f}")
+        console.print(table)
+        console.print(f"[dim]Embedding model: {report['embedding_model']} ({report['embedding_backend']})[/dim]")
+    
+    if max_seconds and report["total_seconds"] > max_seconds:
+        console.print(f"[red]❌ Startup took {report['total_seconds']:.1f}s, over the {max_seconds:.1f}s limit[/red]")
+        raise typer.Exit(code=1)
+
+@app.command("embedding-report")
+def embedding_report(threads: int = ONNX_THREADS_OPTION,
+                     passages: int = typer.Option(64, "--passages", help="Chunk-sized texts embedded per backend"),
+                     queries: int = typer.Option(32, "--queries", help="Questions embedded one at a time per backend")):
+    """
+    Compare the PyTorch, ONNX and ONNX int8 embedding backends.
+    
+    Exports the embedding model to ONNX if needed, then measures each backend
+    in a fresh process: model load time, passages embedded per second, query
+    latency and peak memory, and how closely its embeddings match PyTorch's.
+    Requires onnxruntime and onnx (pip install onnxruntime onnx).
+    
+    Example:
+        python main.py embedding-report --onnx-threads 4
+    """
+    from rich.table import Table
+    from onnx_embedder import PARITY_MIN_COSINE, backend_report
+    
+    console.print("🔄 Measuring embedding backends (the first run exports the model)...")
+    try:
+        rows = backend_report(threads=threads, passages=passages, queries=queries)
+    except RuntimeError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    
+    table = Table(title=f"Embedding backends ({rows[0]['model']})")
+    table.add_column("Backend")
+    table.add_column("Load", justify="right")
+    table.add_column("Passages/s", justify="right")
+    table.add_column("Speedup", justify="right")
+    table.add_column("Query p50", justify="right")
+    table.add_column("Peak memory", justify="right")
+    table.add_column("Memory saved", justify="right")
+    table.add_column("Model size", justify="right")
+    table.add_column("Min cosine", justify="right")
+    for row in rows:
+        cosine = f"{row['parity_min_cosine']:.4f}"
+        if row["parity_min_cosine"] < PARITY_MIN_COSINE:
+            cosine = f"[red]{cosine}[/red]"
+        table.add_row(
+            row["backend"],
+            f"{row['load_seconds']:.2f} s",
+            f"{row['passages_per_second']:.1f}",
+            f"{row['speedup']:.2f}x",
+            f"{row['query_p50_ms']:.1f} ms",
+            f"{row['peak_rss_bytes'] / (1024 * 1024):.0f} MB",
+            f"{row['memory_saved_bytes'] / (1024 * 1024):.0f} MB",
+            f"{row['model_bytes'] / (1024 * 1024):.1f} MB" if row["model_bytes"] else "-",
+            cosine
+        )
+    console.print(table)
+    if any(row["backend"] == "torch" for row in rows[1:]):
+        console.print("[yellow]⚠️  An ONNX backend fell back to PyTorch (missing onnxruntime or failed parity check)[/yellow]")
+
+@app.command()
+def benchmark(sizes: str = typer.Option("10,50,200", "--sizes", help="Comma-separated corpus sizes, in PDFs"),
+              embedders: str = typer.Option("fake,bge", "--embedders", help="Embedders to measure: fake and/or bge (bge-small, if cached locally)"),
+              backends: str = typer.Option("numpy,chroma", "--backends", help="Vector store backends to measure"),
+              queries: int = typer.Option(200, "--queries", help="Searches timed per configuration"),
+              asks: int = typer.Option(50, "--asks", help="ask_question calls timed per configuration (0 to skip)"),
+              llm_latency: float = typer.Option(0.0, "--llm-latency", help="Seconds the stubbed OpenAI client takes per completion"),
+              seed: int = typer.Option(0, "--seed", help="Random seed of the synthetic corpora and questions"),
+              repeats: int = typer.Option(3, "--repeats", help="Runs of extraction, chunking and embedding (the fastest counts)"),
+              out: str = typer.Option("benchmark_results.json", "--out", help="JSON file the results are written to"),
+              baseline: str = typer.Option(None, "--baseline", help="Results of an earlier run to compare with"),
+              threshold: float = typer.Option(0.2, "--threshold", help="Relative slowdown vs the baseline that counts as a regression")):
+    """
+    Measure ingest and retrieval throughput on synthetic PDF corpora.
+
+    Runs offline: the PDFs are generated, a deterministic fake embedder is
+    always available (the real bge-small model is used when it is in the local
+    Hugging Face cache) and OpenAI is replaced by a stub. Measures extraction
+    pages/sec, chunking MB/sec, embedding and indexing chunks/sec, search
+    p50/p99 latency and QPS, and ask_question p50/p99 latency. With --baseline,
+    exits with status 1 if any metric is worse than the baseline by more than
+    --threshold.
+
+    Example:
+        python main.py benchmark --sizes 10,50 --embedders fake --out base.json
+        python main.py benchmark --sizes 10,50 --embedders fake --baseline base.json
+    """
+    import json
+    from rich.table import Table
+    from benchmark import compare_results, run_benchmarks
+
+    def split(value: str):
+        return [item.strip() for item in value.split(",") if item.strip()]
+
+    try:
+        size_list = [int(size) for size in split(sizes)]
+    except ValueError:
+        console.print(f"[red]Error: --sizes must be comma-separated integers, got {sizes!r}[/red]")
+        raise typer.Exit(1)
+
+    baseline_results = None
+    if baseline:
+        try:
+            with open(baseline, "r", encoding="utf-8") as f:
+                baseline_results = json.load(f)
+        except (OSError, ValueError) as e:
+            console.print(f"[red]Error reading baseline {baseline}: {str(e)}[/red]")
+            raise typer.Exit(1)
+
+    results = run_benchmarks(sizes=size_list, embedders=split(embedders), backends=split(backends),
+                             queries=queries, asks=asks, llm_latency=llm_latency, seed=seed,
+                             repeats=repeats)
+    with open(out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+    console.print(f"[green]💾 Results written to {out}[/green]")
+
+    if baseline_results is None:
+        table = Table(title="Benchmark")
+        table.add_column("Metric", overflow="fold")
+        table.add_column("Value", justify="right")
+        for name, metric in results["metrics"].items():
+            table.add_row(name, f"{metric['value']:.2f} {metric['unit']}")
+        console.print(table)
+        return
+
+    try:
+        rows = compare_results(results, baseline_results, threshold)
+    except ValueError as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+    table = Table(title=f"Benchmark vs {baseline} (regression threshold {threshold:.0%})")
+    table.add_column("Metric", overflow="fold")
+    table.add_column("Baseline", justify="right")
+    table.add_column("Current", justify="right")
+    table.add_column("Change", justify="right")
+    for row in rows:
+        style = "red" if row["regressed"] else ("green" if row["change"] > threshold else "")
+        table.add_row(
+            row["name"],
+            f"{row['baseline']:.2f} {row['unit']}",
+            f"{row['current']:.2f} {row['unit']}",
+            f"[{style}]{row['change']:+.0%}[/{style}]" if style else f"{row['change']:+.0%}"
+        )
+    console.print(table)
+
+    regressions = [row for row in rows if row["regressed"]]
+    if regressions:
+        console.print(f"[red]❌ {len(regressions)} metrics regressed by more than {threshold:.0%}[/red]")
+        raise typer.Exit(code=1)
+    console.print(f"[green]✅ No regressions beyond {threshold:.0%} ({len(rows)} metrics compared)[/green]")
+
+@index_app.command("export")
+def index_export(path: str = typer.Argument(..., help="Bundle file to write"),
+                 backend: str = typer.Option("chroma", "--backend", help="Vector store backend to read: chroma or numpy")):
+    """
+    Package the built index into one portable, checksummed bundle file.
+    
+    The bundle holds the chunks and their metadata, embeddings, BM25 index,
+    embedding model identity and the manifest of indexed PDFs. Build the
+    index first (run chat or ask once), then ship the bundle to replicas.
+    
+    Example:
+        python main.py index export aadhaar_index.bundle
+    """
+    from index_bundle import export_index
+    from vector_db import VectorDatabase
+    
+    vector_db = VectorDatabase(backend=backend, persist_query_cache=False)
+    try:
+        stats = export_index(vector_db, path)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    console.print(
+        f"✅ Exported {stats['chunks']} chunks from {stats['files']} files ({stats['model']}, "
+        f"{stats['dimensions']}D) to {path}: {stats['bytes'] / (1024 * 1024):.1f} MB in {stats['seconds']:.1f}s"
+    )
+
+@index_app.command("import")
+def index_import(path: str = typer.Argument(..., help="Bundle file written by 'index export'"),
+                 backend: str = typer.Option("chroma", "--backend", help="Vector store backend to load into: chroma or numpy"),
+                 embedding_dtype: str = EMBEDDING_DTYPE_OPTION,
+                 full_precision: Optional[bool] = FULL_PRECISION_OPTION,
+                 force: bool = typer.Option(False, "--force", help="Replace an existing index"),
+                 verify: bool = typer.Option(True, "--verify/--no-verify", help="Check the bundle checksums before importing")):
+    """
+    Load a bundle into the local vector database without embedding anything.
+    
+    Checksums are verified, the embeddings are memory-mapped from the bundle
+    into the chosen backend, and the manifest is matched to the local
+    Supporting Documents folder, so the next start serves immediately.
+    
+    Example:
+        python main.py index import aadhaar_index.bundle --backend numpy
+    """
+    from index_bundle import import_index
+    
+    try:
+        stats = import_index(path, backend=backend, embedding_dtype=embedding_dtype,
+                             full_precision=full_precision, verify=verify, force=force)
+    except (OSError, ValueError) as e:
+        console.print(f"[red]Error: {str(e)}[/red]")
+        raise typer.Exit(1)
+    console.print(
+        f"✅ Imported {stats['chunks']} chunks ({stats['model']}, {stats['dimensions']}D) "
+        f"in {stats['seconds']:.1f}s; {len(stats['matched'])} documents match the local files"
+    )
+    if stats["changed"]:
+        console.print(f"[yellow]⚠️  {len(stats['changed'])} documents differ locally and will be "
+                      f"re-embedded on the next start: {', '.join(stats['changed'])}[/yellow]")
+    if stats["missing"]:
+        console.print(f"[yellow]⚠️  {len(stats['missing'])} documents are missing from 'Supporting Documents'; "
+                      f"their chunks will be removed on the next start: {', '.join(stats['missing'])}[/yellow]")
+    console.print(f"[dim]The next start loads {stats['model']}; it must be available offline or downloadable.[/dim]")
+
 @app.command()
 def setup():
     """
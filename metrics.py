@@ -0,0 +1,316 @@
+"""
+Metrics Module for Aadhaar Chat Agent
+
+This module records where the time of an answer goes. Every pipeline stage
+(PDF extraction, chunking, embedding, vector and lexical search, reranking,
+OpenAI completions and summaries) is timed into a latency histogram, token
+usage is counted, and the hit rates of the caches are collected when metrics
+are read.
+
+Key Features:
+- Process-wide registry of stage histograms and counters, safe to use from
+  any thread
+- Cache hit rates read on demand from the caches' own ``stats()``
+- Request profiles: every stage timed while a profile is active is also
+  recorded in it, giving a per-request breakdown (``--profile`` on chat and
+  ask, ``"profile": true`` on the server's /ask)
+- Export as JSON or in the Prometheus text format (server's /metrics)
+
+Usage:
+    with timed("vector_query"):
+        results = collection.query(query_embeddings=embeddings, n_results=5)
+
+    with request_profile() as profile:
+        agent.answer_question(question)
+    print(profile.breakdown())
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import bisect
+import contextvars
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Prefix of every exported metric name
+METRIC_PREFIX = "aadhaar"
+
+
+class Histogram:
+    """
+    Latency histogram with fixed bucket bounds.
+
+    Attributes:
+        bounds (Tuple[float, ...]): Upper bound of each bucket (an implicit
+            +Inf bucket follows)
+        count (int): Number of observations
+        total (float): Sum of the observations
+        maximum (float): Largest observation
+    """
+
+    def __init__(self, bounds: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.maximum = 0.0
+
+    def observe(self, value: float):
+        """Add one observation"""
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.maximum = max(self.maximum, value)
+
+    def quantile(self, q: float) -> float:
+        """Estimate a quantile (upper bound of the bucket that contains it)"""
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.maximum)
+        return self.maximum
+
+    def to_dict(self) -> Dict:
+        """Summary of the histogram"""
+        return {
+            "count": self.count,
+            "sum_seconds": self.total,
+            "mean_seconds": self.total / self.count if self.count else 0.0,
+            "p50_seconds": self.quantile(0.5),
+            "p95_seconds": self.quantile(0.95),
+            "max_seconds": self.maximum,
+            "buckets": {str(bound): count for bound, count in zip(self.bounds + ("+Inf",), self.counts)}
+        }
+
+
+class RequestProfile:
+    """
+    Stage timings and token counts of a single request.
+
+    Attributes:
+        stages (List[Tuple[str, float]]): (stage, seconds) in the order they finished
+        tokens (Dict[str, int]): Prompt and completion tokens used
+    """
+
+    def __init__(self):
+        self.stages: List[Tuple[str, float]] = []
+        self.tokens: Dict[str, int] = {"prompt": 0, "completion": 0}
+        self.started = time.perf_counter()
+        self.total_seconds: Optional[float] = None
+
+    def breakdown(self) -> List[Dict]:
+        """
+        Time per stage, with stages that ran several times added up.
+
+        Returns:
+            List[Dict]: Rows with stage, calls and seconds, in first-seen order
+        """
+        rows: Dict[str, Dict] = {}
+        for stage, seconds in self.stages:
+            row = rows.setdefault(stage, {"stage": stage, "calls": 0, "seconds": 0.0})
+            row["calls"] += 1
+            row["seconds"] += seconds
+        return list(rows.values())
+
+    def to_dict(self) -> Dict:
+        """Profile as plain data (sent by the server)"""
+        return {
+            "total_seconds": self.total_seconds,
+            "stages": self.breakdown(),
+            "tokens": dict(self.tokens)
+        }
+
+
+# Profile of the request being handled by the current thread or task
+_current_profile: contextvars.ContextVar = contextvars.ContextVar("request_profile", default=None)
+
+
+class MetricsRegistry:
+    """
+    Process-wide store of stage histograms, counters and cache collectors.
+
+    Attributes:
+        histograms (Dict[str, Histogram]): Latency histogram of each stage
+        counters (Dict[str, float]): Monotonic counters (tokens, pages, ...)
+    """
+
+    def __init__(self):
+        self.histograms: Dict[str, Histogram] = {}
+        self.counters: Dict[str, float] = {}
+        self._collectors: Dict[str, Callable[[], Optional[Dict]]] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, stage: str, seconds: float):
+        """Record the duration of a stage"""
+        with self._lock:
+            histogram = self.histograms.get(stage)
+            if histogram is None:
+                histogram = self.histograms[stage] = Histogram()
+            histogram.observe(seconds)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.stages.append((stage, seconds))
+
+    def increment(self, name: str, amount: float = 1):
+        """Add to a counter"""
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def record_tokens(self, prompt_tokens: int, completion_tokens: int):
+        """Count the tokens of a completion (also in the active request profile)"""
+        self.increment("prompt_tokens", prompt_tokens)
+        self.increment("completion_tokens", completion_tokens)
+        profile = _current_profile.get()
+        if profile is not None:
+            profile.tokens["prompt"] += prompt_tokens
+            profile.tokens["completion"] += completion_tokens
+
+    def register_cache(self, name: str, stats: Callable[[], Optional[Dict]]):
+        """
+        Register a cache whose hits and misses are reported.
+
+        Args:
+            name (str): Cache name used in the output
+            stats (Callable[[], Optional[Dict]]): Returns the cache's stats
+                (with "hits" and "misses"), or None if it is not in use
+        """
+        with self._lock:
+            self._collectors[name] = stats
+
+    def caches(self) -> Dict[str, Dict]:
+        """Hits, misses and hit rate of every registered cache in use"""
+        with self._lock:
+            collectors = dict(self._collectors)
+        caches = {}
+        for name, stats in collectors.items():
+            try:
+                current = stats()
+            except Exception:
+                continue
+            if not current:
+                continue
+            hits, misses = current.get("hits", 0), current.get("misses", 0)
+            caches[name] = {
+                "hits": hits,
+                "misses": misses,
+                "hit_rate": hits / (hits + misses) if hits + misses else 0.0
+            }
+        return caches
+
+    def to_json(self) -> Dict:
+        """
+        Snapshot of all metrics.
+
+        Returns:
+            Dict: "stages" (histogram summaries), "counters" and "caches"
+        """
+        with self._lock:
+            stages = {stage: histogram.to_dict() for stage, histogram in sorted(self.histograms.items())}
+            counters = dict(sorted(self.counters.items()))
+        return {"stages": stages, "counters": counters, "caches": self.caches()}
+
+    def to_prometheus(self) -> str:
+        """
+        All metrics in the Prometheus text exposition format.
+
+        Returns:
+            str: Metric families for stage latency, counters and caches
+        """
+        lines = [
+            f"# HELP {METRIC_PREFIX}_stage_seconds Duration of pipeline stages",
+            f"# TYPE {METRIC_PREFIX}_stage_seconds histogram"
+        ]
+        with self._lock:
+            for stage, histogram in sorted(self.histograms.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + ("+Inf",), histogram.counts):
+                    cumulative += count
+                    lines.append(f'{METRIC_PREFIX}_stage_seconds_bucket{{stage="{stage}",le="{bound}"}} {cumulative}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_sum{{stage="{stage}"}} {histogram.total}')
+                lines.append(f'{METRIC_PREFIX}_stage_seconds_count{{stage="{stage}"}} {histogram.count}')
+            counters = sorted(self.counters.items())
+        for name, value in counters:
+            lines.append(f"# TYPE {METRIC_PREFIX}_{name}_total counter")
+            lines.append(f"{METRIC_PREFIX}_{name}_total {value}")
+
+        caches = self.caches()
+        for family, key, kind in (("cache_hits_total", "hits", "counter"),
+                                  ("cache_misses_total", "misses", "counter"),
+                                  ("cache_hit_ratio", "hit_rate", "gauge")):
+            lines.append(f"# TYPE {METRIC_PREFIX}_{family} {kind}")
+            for name, stats in caches.items():
+                lines.append(f'{METRIC_PREFIX}_{family}{{cache="{name}"}} {stats[key]}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        """Forget every recorded observation (registered caches are kept)"""
+        with self._lock:
+            self.histograms.clear()
+            self.counters.clear()
+
+
+# Registry shared by every module of the process
+metrics = MetricsRegistry()
+
+
+@contextmanager
+def timed(stage: str) -> Iterator[None]:
+    """Time the enclosed block as one observation of ``stage``"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        metrics.observe(stage, time.perf_counter() - start)
+
+
+@contextmanager
+def request_profile() -> Iterator[RequestProfile]:
+    """Collect the stages and tokens of the enclosed request into a RequestProfile"""
+    profile = RequestProfile()
+    token = _current_profile.set(profile)
+    try:
+        yield profile
+    finally:
+        profile.total_seconds = time.perf_counter() - profile.started
+        _current_profile.reset(token)
+
+
+def profile_table(profile: Dict):
+    """
+    Render a request profile (``RequestProfile.to_dict()``) as a rich Table.
+
+    Args:
+        profile (Dict): Profile with total_seconds, stages and tokens
+
+    Returns:
+        rich.table.Table: One row per stage, then the total and the tokens
+    """
+    from rich.table import Table
+
+    total = profile.get("total_seconds") or 0.0
+    table = Table(title="Request profile", title_justify="left")
+    table.add_column("Stage")
+    table.add_column("Calls", justify="right")
+    table.add_column("Time", justify="right")
+    table.add_column("Share", justify="right")
+    for row in profile["stages"]:
+        table.add_row(
+            row["stage"],
+            str(row["calls"]),
+            f"{row['seconds'] * 1000:.1f} ms",
+            f"{row['seconds'] / total:.0%}" if total else "-"
+        )
+    table.add_row("[bold]total[/bold]", "", f"[bold]{total * 1000:.1f} ms[/bold]", "")
+    tokens = profile["tokens"]
+    table.caption = f"Tokens: {tokens['prompt']} prompt, {tokens['completion']} completion"
+    return table
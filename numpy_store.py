@@ -0,0 +1,603 @@
+"""
+NumPy Vector Store Module for Aadhaar Chat Agent
+
+This module provides an exact-search alternative to ChromaDB for corpora of up
+to tens of thousands of chunks. Normalized embeddings live in a memory-mapped
+matrix file and chunk text and metadata live in a small SQLite side store, so
+startup only opens two files and a search is one matrix product plus
+``argpartition``.
+
+The store implements the subset of the ChromaDB collection API used by
+VectorDatabase (``count``, ``upsert``, ``delete``, ``get`` and ``query``), so it
+can be swapped in with ``VectorDatabase(backend="numpy")`` and benchmarked
+against ChromaDB without changing any callers.
+
+Storage Layout (inside the store directory):
+- embeddings.f32: Row-major float32 matrix (capacity x dimensions), memory-mapped
+- embeddings.f16 / embeddings.i8: Optional quantized copy used for scanning
+- int8_scales.f32: Per-row scales of the int8 quantization, memory-mapped
+- records.sqlite3: Chunk ID, text and metadata for every occupied row
+
+Technical Details:
+- Similarity: Dot product of normalized vectors (cosine similarity)
+- Distances: Squared L2 (2 - 2 * cosine), matching ChromaDB's default space
+- Quantized search: the float16/int8 matrix is scanned, then the best
+  ``rescore_factor * n_results`` candidates are rescored with float32 rows
+- Deleted rows are reused by later inserts; the matrices grow by doubling
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import json
+import os
+import sqlite3
+import threading
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+
+# Storage type -> (NumPy dtype, matrix file name)
+_MATRIX_TYPES = {
+    "float32": (np.float32, "embeddings.f32"),
+    "float16": (np.float16, "embeddings.f16"),
+    "int8": (np.int8, "embeddings.i8")
+}
+
+# Per-row scales of the int8 matrix
+_SCALES_FILE = "int8_scales.f32"
+
+# Rows converted to float32 at a time when scanning a quantized matrix
+_SCAN_BLOCK_ROWS = 16384
+
+
+def quantize(vectors: np.ndarray, dtype: str) -> Tuple[np.ndarray, Optional[np.ndarray]]:
+    """
+    Convert float32 embeddings to a storage type.
+
+    int8 uses symmetric per-row scalar quantization: each row is divided by
+    its largest absolute value / 127 and rounded, so no value is ever clipped
+    and rows can be written in any order or batch size.
+
+    Args:
+        vectors (np.ndarray): Float32 embeddings, one per row
+        dtype (str): "float32", "float16" or "int8"
+
+    Returns:
+        Tuple[np.ndarray, Optional[np.ndarray]]: Quantized matrix and the int8
+            scale of each row (None for float types)
+    """
+    if dtype != "int8":
+        return vectors.astype(_MATRIX_TYPES[dtype][0]), None
+    scales = (np.maximum(np.abs(vectors).max(axis=1), 1e-12) / 127.0).astype(np.float32)
+    quantized = np.clip(np.rint(vectors / scales[:, None]), -127, 127).astype(np.int8)
+    return quantized, scales
+
+
+def approximate_scores(matrix: np.ndarray, queries: np.ndarray, dtype: str,
+                       scales: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Score queries against a (possibly quantized) matrix.
+
+    Quantized rows are converted to float32 block by block, so the scan never
+    holds more than one block of full-precision rows in memory. For int8 the
+    per-row scales are applied to the block's scores instead of its rows.
+
+    Args:
+        matrix (np.ndarray): Stored embeddings (rows)
+        queries (np.ndarray): Float32 query embeddings
+        dtype (str): Storage type of ``matrix``
+        scales (Optional[np.ndarray]): int8 scale of each row of ``matrix``
+
+    Returns:
+        np.ndarray: Similarity matrix of shape (queries, rows)
+    """
+    if dtype == "float32":
+        return queries @ matrix.T
+
+    scores = np.empty((len(queries), matrix.shape[0]), dtype=np.float32)
+    for start in range(0, matrix.shape[0], _SCAN_BLOCK_ROWS):
+        block = np.asarray(matrix[start:start + _SCAN_BLOCK_ROWS], dtype=np.float32)
+        block_scores = queries @ block.T
+        if dtype == "int8":
+            block_scores *= scales[start:start + len(block)]
+        scores[:, start:start + len(block)] = block_scores
+    return scores
+
+
+def quantization_report(vectors: np.ndarray, k: int = 10, sample_queries: int = 200,
+                        rescore_factor: int = 4, seed: int = 0) -> List[Dict]:
+    """
+    Compare index size and recall@k of each storage type against float32.
+
+    Queries are synthesized as normalized midpoints of random pairs of stored
+    vectors, so they are close to the corpus without being identical to any
+    stored row. Ground truth is exact float32 search.
+
+    Args:
+        vectors (np.ndarray): Float32 embeddings of the whole index
+        k (int): Number of neighbours compared
+        sample_queries (int): Number of synthetic queries
+        rescore_factor (int): Candidate multiplier used for rescoring
+        seed (int): Random seed for query sampling
+
+    Returns:
+        List[Dict]: One row per storage type with dtype, bytes and
+            relative_size of the scanned matrix alone, recall_at_k (quantized
+            scan only), bytes_rescored and relative_size_rescored (on-disk total
+            when the float32 copy is kept for rescoring) and recall_at_k_rescored
+    """
+    vectors = np.asarray(vectors, dtype=np.float32)
+    count = len(vectors)
+    if count == 0:
+        return []
+    k = min(k, count)
+
+    rng = np.random.default_rng(seed)
+    pairs = rng.integers(0, count, size=(sample_queries, 2))
+    queries = vectors[pairs[:, 0]] + vectors[pairs[:, 1]]
+    queries /= np.maximum(np.linalg.norm(queries, axis=1, keepdims=True), 1e-12)
+
+    exact = queries @ vectors.T
+    truth = np.argpartition(-exact, k - 1, axis=1)[:, :k]
+
+    rows = []
+    for dtype in ("float32", "float16", "int8"):
+        quantized, scales = quantize(vectors, dtype)
+        approx = approximate_scores(quantized, queries, dtype, scales)
+
+        found = np.argpartition(-approx, k - 1, axis=1)[:, :k]
+        candidates = min(k * rescore_factor, count)
+        pool = np.argpartition(-approx, candidates - 1, axis=1)[:, :candidates]
+        rescored = np.take_along_axis(
+            pool, np.argsort(-np.take_along_axis(exact, pool, axis=1), axis=1)[:, :k], axis=1
+        )
+
+        size = quantized.nbytes + (scales.nbytes if scales is not None else 0)
+        # Rescoring needs the float32 rows on disk next to the scanned matrix
+        size_rescored = size + (vectors.nbytes if dtype != "float32" else 0)
+        rows.append({
+            "dtype": dtype,
+            "bytes": int(size),
+            "relative_size": size / vectors.nbytes,
+            "recall_at_k": _recall(truth, found),
+            "bytes_rescored": int(size_rescored),
+            "relative_size_rescored": size_rescored / vectors.nbytes,
+            "recall_at_k_rescored": _recall(truth, rescored)
+        })
+    return rows
+
+
+def _recall(truth: np.ndarray, found: np.ndarray) -> float:
+    """Average fraction of true neighbours present in the found neighbours"""
+    hits = sum(len(set(t.tolist()) & set(f.tolist())) for t, f in zip(truth, found))
+    return hits / truth.size
+
+
+def stored_dimensions(directory: str) -> Optional[int]:
+    """Embedding dimensions of the store in ``directory``, or None if there is none"""
+    path = os.path.join(directory, "records.sqlite3")
+    if not os.path.exists(path):
+        return None
+    connection = sqlite3.connect(path)
+    try:
+        row = connection.execute("SELECT value FROM meta WHERE key = 'dimensions'").fetchone()
+        return int(row[0]) if row else None
+    except sqlite3.Error:
+        return None
+    finally:
+        connection.close()
+
+
+class NumpyStore:
+    """
+    Memory-mapped exact vector search with a ChromaDB-compatible interface.
+
+    Attributes:
+        name (str): Collection name reported by get_collection_info
+        directory (str): Directory holding the matrix and side store
+        dimensions (int): Embedding dimensions
+        dtype (str): Storage type of the scanned matrix: float32, float16 or int8
+        full_precision (bool): Whether float32 rows are kept for rescoring
+        rescore_factor (int): Candidates rescored per requested result
+    """
+
+    def __init__(self, directory: str, dimensions: int, name: str = "aadhaar_documents",
+                 initial_capacity: int = 1024, dtype: str = "float32",
+                 full_precision: Optional[bool] = None, rescore_factor: int = 4):
+        """
+        Open (or create) a store.
+
+        Args:
+            directory (str): Directory holding the matrix and side store
+            dimensions (int): Embedding dimensions
+            name (str): Collection name
+            initial_capacity (int): Number of rows allocated for a new store
+            dtype (str): Storage type of the scanned matrix. "float16" halves
+                and "int8" quarters its size and resident memory.
+            full_precision (Optional[bool]): Keep a float32 copy on disk and
+                rescore the top candidates with it. Only read for candidate rows,
+                so it adds disk space but little resident memory. Defaults to
+                off for float16/int8 (the store is then smaller than float32)
+                and is always on for float32.
+            rescore_factor (int): Candidates rescored per requested result
+        """
+        if dtype not in _MATRIX_TYPES:
+            raise ValueError(f"Unsupported embedding storage type: {dtype}")
+
+        self.name = name
+        self.directory = directory
+        self.dimensions = dimensions
+        self.dtype = dtype
+        self.full_precision = bool(full_precision) or dtype == "float32"
+        self.rescore_factor = max(1, rescore_factor)
+        os.makedirs(directory, exist_ok=True)
+
+        self._lock = threading.RLock()
+        self._db = sqlite3.connect(os.path.join(directory, "records.sqlite3"), check_same_thread=False)
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "row INTEGER PRIMARY KEY, id TEXT UNIQUE NOT NULL, document TEXT, metadata TEXT)"
+        )
+        self._db.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._db.commit()
+
+        stored_dimensions = self._get_meta("dimensions")
+        if stored_dimensions is not None and int(stored_dimensions) != dimensions:
+            raise ValueError(
+                f"NumPy store at {directory} holds {stored_dimensions}D embeddings, "
+                f"but the model produces {dimensions}D embeddings"
+            )
+        self._set_meta("dimensions", str(dimensions))
+
+        # Rebuild the row lookup from the side store
+        self._rows: Dict[str, int] = {
+            chunk_id: row for row, chunk_id in self._db.execute("SELECT row, id FROM records")
+        }
+        capacity = int(self._get_meta("capacity") or 0)
+        if capacity == 0:
+            capacity = max(1, initial_capacity)
+            self._set_meta("capacity", str(capacity))
+        self._valid = np.zeros(capacity, dtype=bool)
+        self._valid[list(self._rows.values())] = True
+
+        stored_layout = (self._get_meta("dtype") or "float32", self._get_meta("full_precision") != "0")
+        self._full = self._open_matrix("float32", capacity) if self.full_precision else None
+        self._scan = self._full if dtype == "float32" else self._open_matrix(dtype, capacity)
+        self._scales = self._open_scales(capacity) if dtype == "int8" else None
+
+        # Dropping the float32 copy of an unchanged storage type needs no conversion
+        layout_changed = stored_layout != (self.dtype, self.full_precision) and \
+            not (stored_layout[0] == self.dtype and not self.full_precision)
+        if self._rows and layout_changed:
+            self._convert_layout(*stored_layout)
+        self._set_meta("dtype", self.dtype)
+        self._set_meta("full_precision", "1" if self.full_precision else "0")
+
+        # Delete matrix files of layouts no longer in use, so the disk holds
+        # only the chosen storage type (plus float32 rows when rescoring)
+        in_use = {_MATRIX_TYPES[self.dtype][1]}
+        if self.full_precision:
+            in_use.add(_MATRIX_TYPES["float32"][1])
+        if self.dtype == "int8":
+            in_use.add(_SCALES_FILE)
+        for filename in [name for _, name in _MATRIX_TYPES.values()] + [_SCALES_FILE]:
+            path = os.path.join(directory, filename)
+            if filename not in in_use and os.path.exists(path):
+                os.remove(path)
+
+    # ------------------------------------------------------------------
+    # Storage helpers
+    # ------------------------------------------------------------------
+
+    def _get_meta(self, key: str) -> Optional[str]:
+        """Read a value from the meta table"""
+        row = self._db.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, key: str, value: str):
+        """Write a value to the meta table"""
+        self._db.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+        self._db.commit()
+
+    def _open_matrix(self, dtype: str, capacity: int) -> np.memmap:
+        """Memory-map (creating or growing as needed) the matrix file of a storage type"""
+        numpy_dtype, filename = _MATRIX_TYPES[dtype]
+        path = os.path.join(self.directory, filename)
+        size = capacity * self.dimensions * np.dtype(numpy_dtype).itemsize
+        with open(path, 'ab') as file:
+            if file.tell() < size:
+                file.truncate(size)
+        return np.memmap(path, dtype=numpy_dtype, mode='r+', shape=(capacity, self.dimensions))
+
+    def _open_scales(self, capacity: int) -> np.memmap:
+        """Memory-map (creating or growing as needed) the per-row int8 scales"""
+        path = os.path.join(self.directory, _SCALES_FILE)
+        with open(path, 'ab') as file:
+            if file.tell() < capacity * 4:
+                file.truncate(capacity * 4)
+        return np.memmap(path, dtype=np.float32, mode='r+', shape=(capacity,))
+
+    def _convert_layout(self, stored_dtype: str, stored_full_precision: bool):
+        """Rebuild the stored matrices after the storage type was changed"""
+        rows = np.flatnonzero(self._valid)
+        if stored_full_precision:
+            source = self._full if self._full is not None else self._open_matrix("float32", len(self._valid))
+            vectors = np.asarray(source[rows], dtype=np.float32)
+        else:
+            # Without float32 rows the stored values are dequantized (slightly lossy)
+            if (stored_dtype, False) != (self.dtype, self.full_precision):
+                print(f"⚠️  NumPy store kept no float32 rows; converting from its {stored_dtype} values "
+                      f"(re-index for exact float32 embeddings)")
+            vectors = np.asarray(self._open_matrix(stored_dtype, len(self._valid))[rows], dtype=np.float32)
+            if stored_dtype == "int8":
+                vectors *= np.asarray(self._open_scales(len(self._valid))[rows])[:, None]
+
+        if stored_dtype == self.dtype:
+            print("🔄 Adding float32 rows to the NumPy store...")
+        else:
+            print(f"🔄 Converting NumPy store from {stored_dtype} to {self.dtype}...")
+        self._write_rows(rows.tolist(), vectors)
+
+    def _write_rows(self, rows: List[int], vectors: np.ndarray):
+        """Write float32 vectors (and their quantized form) to the given rows"""
+        if self._full is not None:
+            self._full[rows] = vectors
+            self._full.flush()
+        if self._scan is not self._full:
+            quantized, scales = quantize(vectors, self.dtype)
+            self._scan[rows] = quantized
+            self._scan.flush()
+            if scales is not None:
+                self._scales[rows] = scales
+                self._scales.flush()
+
+    def _grow(self, needed_rows: int):
+        """Double the matrix capacity until ``needed_rows`` rows fit"""
+        capacity = len(self._valid)
+        if needed_rows <= capacity:
+            return
+        new_capacity = capacity
+        while new_capacity < needed_rows:
+            new_capacity *= 2
+
+        for matrix in (self._full, self._scan):
+            if matrix is not None:
+                matrix.flush()
+        self._full = self._open_matrix("float32", new_capacity) if self.full_precision else None
+        self._scan = self._full if self.dtype == "float32" else self._open_matrix(self.dtype, new_capacity)
+        if self._scales is not None:
+            self._scales.flush()
+            self._scales = self._open_scales(new_capacity)
+        self._valid = np.concatenate([self._valid, np.zeros(new_capacity - capacity, dtype=bool)])
+        self._set_meta("capacity", str(new_capacity))
+
+    def _free_rows(self, count: int) -> List[int]:
+        """Pick ``count`` unoccupied rows, reusing deleted rows first"""
+        free = np.flatnonzero(~self._valid)[:count].tolist()
+        if len(free) < count:
+            self._grow(len(self._valid) + count - len(free))
+            free = np.flatnonzero(~self._valid)[:count].tolist()
+        return free
+
+    @staticmethod
+    def _where_clause(where: Optional[Dict]):
+        """Translate a ChromaDB equality filter into SQL"""
+        if not where:
+            return "", []
+        conditions = []
+        params = []
+        for key, value in where.items():
+            conditions.append("json_extract(metadata, ?) = ?")
+            params.extend([f"$.{key}", value])
+        return " WHERE " + " AND ".join(conditions), params
+
+    def _fetch_rows(self, rows: List[int]) -> Dict[int, tuple]:
+        """Load (id, document, metadata) for the given matrix rows"""
+        if not rows:
+            return {}
+        placeholders = ",".join("?" * len(rows))
+        cursor = self._db.execute(
+            f"SELECT row, id, document, metadata FROM records WHERE row IN ({placeholders})", rows
+        )
+        return {row: (chunk_id, document, json.loads(metadata)) for row, chunk_id, document, metadata in cursor}
+
+    # ------------------------------------------------------------------
+    # ChromaDB-compatible collection API
+    # ------------------------------------------------------------------
+
+    def count(self) -> int:
+        """Number of stored chunks"""
+        return len(self._rows)
+
+    def upsert(self, ids: List[str], documents: List[str], metadatas: List[Dict],
+               embeddings: List[List[float]]):
+        """
+        Insert chunks or replace existing chunks with the same IDs.
+
+        Args:
+            ids (List[str]): Chunk IDs
+            documents (List[str]): Chunk texts
+            metadatas (List[Dict]): Chunk metadata
+            embeddings (List[List[float]]): Normalized chunk embeddings
+        """
+        vectors = np.asarray(embeddings, dtype=np.float32).reshape(len(ids), self.dimensions)
+        with self._lock:
+            new_ids = [chunk_id for chunk_id in dict.fromkeys(ids) if chunk_id not in self._rows]
+            for chunk_id, row in zip(new_ids, self._free_rows(len(new_ids))):
+                self._rows[chunk_id] = row
+                self._valid[row] = True
+
+            rows = [self._rows[chunk_id] for chunk_id in ids]
+            self._write_rows(rows, vectors)
+
+            self._db.executemany(
+                "INSERT OR REPLACE INTO records (row, id, document, metadata) VALUES (?, ?, ?, ?)",
+                [
+                    (row, chunk_id, document, json.dumps(metadata))
+                    for row, chunk_id, document, metadata in zip(rows, ids, documents, metadatas)
+                ]
+            )
+            self._db.commit()
+
+    # ChromaDB's add() fails on existing IDs; here it simply behaves like upsert
+    add = upsert
+
+    def delete(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None):
+        """
+        Delete chunks by ID or by metadata equality filter.
+
+        Args:
+            ids (Optional[List[str]]): Chunk IDs to delete
+            where (Optional[Dict]): Metadata equality filter, e.g. {"filename": "x.pdf"}
+        """
+        with self._lock:
+            if ids is None:
+                clause, params = self._where_clause(where)
+                ids = [row[0] for row in self._db.execute(f"SELECT id FROM records{clause}", params)]
+            rows = [self._rows.pop(chunk_id) for chunk_id in ids if chunk_id in self._rows]
+            if not rows:
+                return
+            self._valid[rows] = False
+            self._db.executemany("DELETE FROM records WHERE row = ?", [(row,) for row in rows])
+            self._db.commit()
+
+    def clear(self):
+        """Delete every chunk; the matrix files keep their capacity for reuse"""
+        with self._lock:
+            self._rows.clear()
+            self._valid[:] = False
+            self._db.execute("DELETE FROM records")
+            self._db.commit()
+
+    def get(self, ids: Optional[List[str]] = None, where: Optional[Dict] = None,
+            include: Optional[List[str]] = None, limit: Optional[int] = None,
+            offset: Optional[int] = None) -> Dict:
+        """
+        Fetch stored chunks.
+
+        Args:
+            ids (Optional[List[str]]): Chunk IDs to fetch (all chunks if omitted)
+            where (Optional[Dict]): Metadata equality filter
+            include (Optional[List[str]]): Any of "documents", "metadatas", "embeddings"
+            limit (Optional[int]): Maximum number of chunks
+            offset (Optional[int]): Chunks to skip first (in row order), for paging
+
+        Returns:
+            Dict: ChromaDB-style result with "ids" and the requested fields
+        """
+        include = ["documents", "metadatas"] if include is None else include
+        with self._lock:
+            if ids is not None:
+                rows = [self._rows[chunk_id] for chunk_id in ids if chunk_id in self._rows]
+                records = self._fetch_rows(rows)
+                ordered = [records[row] + (row,) for row in rows]
+            else:
+                clause, params = self._where_clause(where)
+                sql = f"SELECT id, document, metadata, row FROM records{clause} ORDER BY row"
+                if limit is not None or offset:
+                    # SQLite needs a LIMIT before an OFFSET; -1 means no limit
+                    sql += f" LIMIT {int(limit) if limit is not None else -1}"
+                if offset:
+                    sql += f" OFFSET {int(offset)}"
+                ordered = [
+                    (chunk_id, document, json.loads(metadata), row)
+                    for chunk_id, document, metadata, row in self._db.execute(sql, params)
+                ]
+
+            result = {"ids": [item[0] for item in ordered]}
+            if "documents" in include:
+                result["documents"] = [item[1] for item in ordered]
+            if "metadatas" in include:
+                result["metadatas"] = [item[2] for item in ordered]
+            if "embeddings" in include:
+                result["embeddings"] = self._vectors([item[3] for item in ordered])
+            return result
+
+    def _vectors(self, rows: List[int]) -> np.ndarray:
+        """Return float32 vectors for rows, dequantizing when no float32 copy is kept"""
+        if self._full is not None:
+            return np.asarray(self._full[rows], dtype=np.float32)
+        vectors = np.asarray(self._scan[rows], dtype=np.float32)
+        return vectors * np.asarray(self._scales[rows])[:, None] if self.dtype == "int8" else vectors
+
+    def storage_stats(self) -> Dict:
+        """
+        Report the on-disk and scanned size of the stored embeddings.
+
+        Returns:
+            Dict: dtype, stored rows, bytes of the scanned matrix for those rows,
+                bytes of the float32 rescoring copy and total matrix file size
+        """
+        rows = len(self._rows)
+        files = [self._full, self._scan] if self._scan is not self._full else [self._full]
+        return {
+            "dtype": self.dtype,
+            "rows": rows,
+            "scan_bytes": rows * self.dimensions * self._scan.dtype.itemsize,
+            "full_precision_bytes": rows * self.dimensions * 4 if self._full is not None else 0,
+            "file_bytes": sum(matrix.nbytes for matrix in files if matrix is not None)
+        }
+
+    def query(self, query_embeddings: List[List[float]], n_results: int = 10,
+              query_texts: Optional[List[str]] = None, include: Optional[List[str]] = None) -> Dict:
+        """
+        Nearest-neighbour search for one or more query embeddings.
+
+        Exact for float32 storage. For quantized storage the quantized matrix
+        is scanned and, when float32 rows are kept, the best candidates are
+        rescored at full precision.
+
+        Args:
+            query_embeddings (List[List[float]]): Normalized query embeddings
+            n_results (int): Number of results per query
+            query_texts (Optional[List[str]]): Unsupported; the NumPy backend
+                needs embeddings computed by the BGE model
+            include (Optional[List[str]]): Ignored; documents, metadatas and
+                distances are always returned
+
+        Returns:
+            Dict: ChromaDB-style result with "ids", "documents", "metadatas"
+                and "distances", each a list per query
+        """
+        if query_embeddings is None:
+            raise ValueError("The NumPy backend requires query_embeddings")
+
+        queries = np.asarray(query_embeddings, dtype=np.float32).reshape(-1, self.dimensions)
+        with self._lock:
+            valid_rows = np.flatnonzero(self._valid)
+            result = {"ids": [], "documents": [], "metadatas": [], "distances": []}
+            if valid_rows.size == 0:
+                for key in result:
+                    result[key] = [[] for _ in range(len(queries))]
+                return result
+
+            # One matrix product for every query at once (on the quantized rows if any)
+            high_water = int(valid_rows[-1]) + 1
+            scales = self._scales[:high_water] if self._scales is not None else None
+            similarities = approximate_scores(self._scan[:high_water], queries, self.dtype, scales)
+            similarities[:, ~self._valid[:high_water]] = -np.inf
+
+            k = min(n_results, valid_rows.size)
+            rescore = self._scan is not self._full and self._full is not None
+            candidates = min(k * self.rescore_factor, valid_rows.size) if rescore else k
+            top = np.argpartition(-similarities, candidates - 1, axis=1)[:, :candidates]
+
+            ranked = []
+            for query_index in range(len(queries)):
+                rows = top[query_index]
+                if rescore:
+                    # Exact float32 scores for the candidates only
+                    scores = np.asarray(self._full[rows], dtype=np.float32) @ queries[query_index]
+                else:
+                    scores = similarities[query_index, rows]
+                order = np.argsort(-scores)[:k]
+                ranked.append((rows[order], scores[order]))
+
+            records = self._fetch_rows(sorted({int(row) for rows, _ in ranked for row in rows}))
+            for rows, scores in ranked:
+                result["ids"].append([records[row][0] for row in rows])
+                result["documents"].append([records[row][1] for row in rows])
+                result["metadatas"].append([records[row][2] for row in rows])
+                # Squared L2 distance between unit vectors, as in ChromaDB's default space
+                result["distances"].append([float(2.0 - 2.0 * score) for score in scores])
+            return result
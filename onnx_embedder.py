@@ -0,0 +1,475 @@
+"""
+ONNX Embedding Module for Aadhaar Chat Agent
+
+This module runs the BGE embedding model with ONNX Runtime instead of
+PyTorch, for CPU-only deployments. The sentence-transformers model is
+exported to ONNX once (optionally with int8 dynamic quantization of its
+weights), checked against the PyTorch model, and stored next to the index.
+Later starts load the ONNX model and its tokenizer without importing torch.
+
+Key Features:
+- One-time export of the transformer to ONNX; pooling (CLS or mean) and
+  normalization are applied as in the sentence-transformers model
+- Optional int8 dynamic quantization (about a quarter of the weight size)
+- Parity check: cosine similarity between ONNX and PyTorch embeddings of
+  sample texts; a variant below the threshold is never used
+- Configurable number of ONNX Runtime threads
+- Same interface as SentenceTransformer (encode, tokenizer, max_seq_length),
+  so chunking and the vector stores work unchanged
+- Backend report: load time, encode speed, peak memory and parity of each
+  backend, each measured in a fresh process
+
+Requires ``onnxruntime`` and ``onnx`` (``pip install onnxruntime onnx``);
+without them the PyTorch model is used.
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import inspect
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional
+
+import numpy as np
+
+EMBEDDING_BACKENDS = ("torch", "onnx", "onnx-int8")
+
+# Minimum cosine similarity to the PyTorch embedding for every parity sample
+PARITY_MIN_COSINE = 0.99
+
+EXPORT_METADATA_FILE = "export.json"
+_EXPORT_FORMAT = 1
+_VARIANT_FILES = {"fp32": "model.onnx", "int8": "model.int8.onnx"}
+
+# Parity samples: short questions like user queries and a passage longer than
+# the model reads, so truncation is compared as well
+_PARITY_TEXTS = [
+    "What documents are required for Aadhaar enrollment?",
+    "How can I update my address in Aadhaar?",
+    "Is biometric authentication mandatory for children below five years?",
+    "Form 7",
+    "Proof of identity and proof of address documents accepted by UIDAI, "
+    "including passport, ration card, voter ID, driving licence and bank statement. " * 40
+]
+
+
+def onnx_directory(persist_directory: str, model_name: str) -> str:
+    """Directory holding the ONNX export of a model"""
+    return os.path.join(persist_directory, "onnx", model_name.replace("/", "__"))
+
+
+def read_export_metadata(directory: str) -> Optional[Dict]:
+    """Metadata of an ONNX export, or None if there is no (readable) export"""
+    try:
+        with open(os.path.join(directory, EXPORT_METADATA_FILE), "r", encoding="utf-8") as f:
+            metadata = json.load(f)
+    except (OSError, ValueError):
+        return None
+    return metadata if metadata.get("format") == _EXPORT_FORMAT else None
+
+
+def _pooling_mode(model) -> str:
+    """Pooling of a SentenceTransformer: "cls" or "mean" """
+    for module in model:
+        if type(module).__name__ != "Pooling":
+            continue
+        mode = getattr(module, "pooling_mode", None)
+        if isinstance(mode, str):
+            return mode
+        # Older sentence-transformers store one flag per mode
+        if getattr(module, "pooling_mode_cls_token", False):
+            return "cls"
+        if getattr(module, "pooling_mode_mean_tokens", False):
+            return "mean"
+    return "mean"
+
+
+class _ChunkerTokenizer:
+    """
+    Minimal Hugging Face style tokenizer call over a ``tokenizers`` tokenizer.
+
+    Provides what TextChunker uses (token offsets without special tokens)
+    without importing transformers and torch.
+    """
+
+    # Offsets come from the same Rust tokenizer as the Hugging Face "fast" one
+    is_fast = True
+
+    def __init__(self, tokenizer):
+        self._tokenizer = tokenizer
+
+    def __call__(self, text: str, add_special_tokens: bool = True,
+                 return_offsets_mapping: bool = False, **kwargs) -> Dict:
+        encoding = self._tokenizer.encode(text, add_special_tokens=add_special_tokens)
+        result = {"input_ids": encoding.ids}
+        if return_offsets_mapping:
+            result["offset_mapping"] = encoding.offsets
+        return result
+
+
+class OnnxEmbedder:
+    """
+    Exported BGE model run with ONNX Runtime, used in place of a SentenceTransformer.
+
+    Attributes:
+        model_name (str): Hugging Face name of the exported model
+        quantized (bool): Whether the int8 variant is loaded
+        max_seq_length (int): Tokens read per text (longer texts are truncated)
+        tokenizer: Tokenizer used by the chunker (token offsets)
+        threads (int): ONNX Runtime intra-op threads (0 = ONNX Runtime default)
+    """
+
+    def __init__(self, directory: str, quantized: bool = False, threads: int = 0):
+        """
+        Load an exported model.
+
+        Args:
+            directory (str): Export directory (see onnx_directory)
+            quantized (bool): Load the int8 variant instead of float32
+            threads (int): ONNX Runtime intra-op threads; 0 lets ONNX Runtime decide
+
+        Raises:
+            ImportError: If onnxruntime or tokenizers is not installed
+            ValueError: If the directory holds no export of the variant
+        """
+        import onnxruntime as ort
+        from tokenizers import Tokenizer
+
+        metadata = read_export_metadata(directory)
+        variant = "int8" if quantized else "fp32"
+        if metadata is None or variant not in metadata["variants"]:
+            raise ValueError(f"No {variant} ONNX export in {directory}")
+
+        self.model_name = metadata["model_name"]
+        self.quantized = quantized
+        self.max_seq_length = metadata["max_seq_length"]
+        self.threads = threads
+        self._dimensions = metadata["dimensions"]
+        self._pooling = metadata["pooling"]
+        self._normalize = metadata["normalize"]
+        self._input_names = metadata["input_names"]
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads > 0:
+            options.intra_op_num_threads = threads
+        self.session = ort.InferenceSession(
+            os.path.join(directory, _VARIANT_FILES[variant]),
+            options,
+            providers=["CPUExecutionProvider"]
+        )
+
+        tokenizer_path = os.path.join(directory, "tokenizer.json")
+        self.tokenizer = _ChunkerTokenizer(Tokenizer.from_file(tokenizer_path))
+        self._batch_tokenizer = Tokenizer.from_file(tokenizer_path)
+        self._batch_tokenizer.enable_truncation(max_length=self.max_seq_length)
+        self._batch_tokenizer.enable_padding(pad_id=metadata["pad_token_id"], pad_token=metadata["pad_token"])
+
+    @classmethod
+    def load(cls, directory: str, quantized: bool = False, threads: int = 0) -> Optional["OnnxEmbedder"]:
+        """
+        Load an export if it exists and passed its parity check.
+
+        Returns:
+            Optional[OnnxEmbedder]: The model, or None if it has to be (re-)exported
+        """
+        metadata = read_export_metadata(directory)
+        variant = metadata and metadata["variants"].get("int8" if quantized else "fp32")
+        if not variant or not variant.get("parity_ok"):
+            return None
+        return cls(directory, quantized=quantized, threads=threads)
+
+    def get_sentence_embedding_dimension(self) -> int:
+        """Embedding size"""
+        return self._dimensions
+
+    def encode(self, sentences, batch_size: int = 32, normalize_embeddings: bool = False,
+               show_progress_bar: bool = False, convert_to_numpy: bool = True, **kwargs) -> np.ndarray:
+        """
+        Embed one text or a list of texts (the SentenceTransformer.encode arguments are accepted).
+
+        Returns:
+            np.ndarray: Embedding, or matrix of embeddings in input order
+        """
+        single = isinstance(sentences, str)
+        texts = [sentences] if single else list(sentences)
+        batches = []
+        for start in range(0, len(texts), max(1, batch_size)):
+            encodings = self._batch_tokenizer.encode_batch(texts[start:start + batch_size])
+            inputs = {
+                "input_ids": np.array([e.ids for e in encodings], dtype=np.int64),
+                "attention_mask": np.array([e.attention_mask for e in encodings], dtype=np.int64),
+                "token_type_ids": np.array([e.type_ids for e in encodings], dtype=np.int64)
+            }
+            hidden = self.session.run(None, {name: inputs[name] for name in self._input_names})[0]
+            if self._pooling == "cls":
+                pooled = hidden[:, 0]
+            else:
+                mask = inputs["attention_mask"][:, :, None].astype(np.float32)
+                pooled = (hidden * mask).sum(axis=1) / np.maximum(mask.sum(axis=1), 1e-9)
+            batches.append(pooled.astype(np.float32))
+
+        embeddings = np.concatenate(batches) if batches else np.zeros((0, self._dimensions), dtype=np.float32)
+        if self._normalize or normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.maximum(norms, 1e-12)
+        return embeddings[0] if single else embeddings
+
+
+def export_onnx_model(model, model_name: str, directory: str, quantize: bool = False,
+                      threads: int = 0, min_cosine: float = PARITY_MIN_COSINE) -> Optional[OnnxEmbedder]:
+    """
+    Export a SentenceTransformer to ONNX, check parity and load the result.
+
+    The float32 export is reused if it already exists; the int8 variant is
+    produced from it with dynamic quantization when requested. If the int8
+    variant fails the parity check, the float32 one is returned instead.
+
+    Args:
+        model (SentenceTransformer): Loaded PyTorch model
+        model_name (str): Hugging Face name of the model
+        directory (str): Export directory (see onnx_directory)
+        quantize (bool): Also produce and return the int8 variant
+        threads (int): ONNX Runtime intra-op threads (0 = default)
+        min_cosine (float): Lowest acceptable cosine similarity to PyTorch
+
+    Returns:
+        Optional[OnnxEmbedder]: Loaded export, or None if no variant passed parity
+
+    Raises:
+        ImportError: If onnxruntime or onnx is not installed
+        ValueError: If the model's pooling is not supported
+    """
+    import onnxruntime
+    import torch
+
+    pooling = _pooling_mode(model)
+    if pooling not in ("cls", "mean"):
+        raise ValueError(f"Unsupported pooling for ONNX export: {pooling}")
+
+    os.makedirs(directory, exist_ok=True)
+    metadata = read_export_metadata(directory) or {}
+    if metadata.get("model_name") != model_name:
+        metadata = {}
+    variants = metadata.get("variants", {})
+    tokenizer = model.tokenizer
+    input_names = [name for name in ("input_ids", "attention_mask", "token_type_ids")
+                   if name in tokenizer.model_input_names]
+
+    if "fp32" not in variants:
+        print(f"🔄 Exporting {model_name} to ONNX...")
+        start_time = time.perf_counter()
+        transformer = model[0].auto_model.eval()
+
+        class _Encoder(torch.nn.Module):
+            """Transformer taking positional inputs and returning the token embeddings"""
+
+            def __init__(self):
+                super().__init__()
+                self.transformer = transformer
+
+            def forward(self, *inputs):
+                return self.transformer(**dict(zip(input_names, inputs))).last_hidden_state
+
+        sample = tokenizer(["Aadhaar enrolment", "Update the address in Aadhaar"],
+                           padding=True, return_tensors="pt")
+        # The TorchScript exporter needs no extra packages; newer torch defaults to dynamo
+        options = {"dynamo": False} if "dynamo" in inspect.signature(torch.onnx.export).parameters else {}
+        with torch.no_grad():
+            torch.onnx.export(
+                _Encoder(),
+                tuple(sample[name] for name in input_names),
+                os.path.join(directory, _VARIANT_FILES["fp32"]),
+                input_names=input_names,
+                output_names=["last_hidden_state"],
+                dynamic_axes={name: {0: "batch", 1: "sequence"} for name in input_names + ["last_hidden_state"]},
+                opset_version=17,
+                **options
+            )
+        tokenizer.save_pretrained(directory)
+        variants["fp32"] = {"file": _VARIANT_FILES["fp32"]}
+        print(f"✅ Exported ONNX model in {time.perf_counter() - start_time:.1f}s")
+
+    if quantize and "int8" not in variants:
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        print("🔄 Quantizing ONNX model to int8...")
+        quantize_dynamic(
+            os.path.join(directory, _VARIANT_FILES["fp32"]),
+            os.path.join(directory, _VARIANT_FILES["int8"]),
+            weight_type=QuantType.QInt8
+        )
+        variants["int8"] = {"file": _VARIANT_FILES["int8"]}
+
+    metadata.update({
+        "format": _EXPORT_FORMAT,
+        "model_name": model_name,
+        "dimensions": model.get_sentence_embedding_dimension(),
+        "max_seq_length": model.max_seq_length,
+        "pooling": pooling,
+        "normalize": any(type(module).__name__ == "Normalize" for module in model),
+        "input_names": input_names,
+        "pad_token": tokenizer.pad_token,
+        "pad_token_id": tokenizer.pad_token_id,
+        "torch_parameter_bytes": sum(p.numel() * p.element_size() for p in model.parameters()),
+        "onnxruntime_version": onnxruntime.__version__,
+        "variants": variants
+    })
+    _write_metadata(directory, metadata)
+
+    # Parity of every variant not checked yet
+    reference = None
+    for variant, info in variants.items():
+        if "parity_ok" in info:
+            continue
+        if reference is None:
+            reference = model.encode(_PARITY_TEXTS, normalize_embeddings=True, convert_to_numpy=True)
+        candidate = OnnxEmbedder(directory, quantized=variant == "int8", threads=threads)
+        cosines = (candidate.encode(_PARITY_TEXTS, normalize_embeddings=True) * reference).sum(axis=1)
+        info.update({
+            "bytes": os.path.getsize(os.path.join(directory, info["file"])),
+            "parity_min_cosine": float(cosines.min()),
+            "parity_mean_cosine": float(cosines.mean()),
+            "parity_ok": bool(cosines.min() >= min_cosine)
+        })
+        status = "✅" if info["parity_ok"] else "❌"
+        print(f"{status} ONNX {variant} parity with PyTorch: min cosine {cosines.min():.4f}, "
+              f"mean {cosines.mean():.4f} (threshold {min_cosine})")
+    _write_metadata(directory, metadata)
+
+    if quantize:
+        embedder = OnnxEmbedder.load(directory, quantized=True, threads=threads)
+        if embedder is not None:
+            return embedder
+        print("⚠️  The int8 model is not accurate enough, using the float32 ONNX model")
+    return OnnxEmbedder.load(directory, quantized=False, threads=threads)
+
+
+def _write_metadata(directory: str, metadata: Dict):
+    """Write the export metadata atomically"""
+    path = os.path.join(directory, EXPORT_METADATA_FILE)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(tmp_path, path)
+
+
+def measure_backend(backend: str, persist_directory: str, threads: int = 0,
+                    passages: int = 64, queries: int = 32) -> Dict:
+    """
+    Measure one embedding backend in the current process.
+
+    Meant to run in a fresh interpreter (see backend_report), so the peak
+    memory belongs to this backend alone.
+
+    Args:
+        backend (str): "torch", "onnx" or "onnx-int8"
+        persist_directory (str): Index directory (holds the resolved model and exports)
+        threads (int): ONNX Runtime intra-op threads
+        passages (int): Chunk-sized texts embedded in batches
+        queries (int): Questions embedded one at a time
+
+    Returns:
+        Dict: backend in use, model, load seconds, passages/sec, query p50 ms,
+            peak RSS bytes and the embeddings of the queries (for parity)
+    """
+    import random
+    import resource
+    from benchmark import synthetic_pages, synthetic_questions
+    from vector_db import VectorDatabase
+
+    vector_db = VectorDatabase(persist_directory=persist_directory, embedding_backend=backend,
+                               onnx_threads=threads, persist_query_cache=False)
+    model = vector_db.embedding_model
+    if model is None:
+        raise RuntimeError("No embedding model could be loaded")
+
+    texts = synthetic_pages(random.Random("embedding-report"), passages)
+    questions = synthetic_questions(queries)
+    vector_db.embed_texts(texts[:4])
+
+    start_time = time.perf_counter()
+    vector_db.embed_texts(texts)
+    passage_seconds = time.perf_counter() - start_time
+
+    timings = []
+    embeddings = []
+    for question in questions:
+        start_time = time.perf_counter()
+        embeddings.append(model.encode([question], normalize_embeddings=True)[0])
+        timings.append(time.perf_counter() - start_time)
+
+    # ru_maxrss is in kilobytes on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    peak_bytes = peak if sys.platform == "darwin" else peak * 1024
+    return {
+        "backend": vector_db.active_embedding_backend,
+        "model": vector_db.model_name,
+        "load_seconds": vector_db.timings["model_load_seconds"],
+        "passages_per_second": passages / passage_seconds,
+        "query_p50_ms": float(np.percentile(timings, 50) * 1000),
+        "peak_rss_bytes": peak_bytes,
+        "query_embeddings": np.array(embeddings).tolist()
+    }
+
+
+def backend_report(persist_directory: str = "./chroma_db", threads: int = 0,
+                   passages: int = 64, queries: int = 32) -> List[Dict]:
+    """
+    Compare the PyTorch, ONNX and ONNX int8 backends.
+
+    Exports the model first if needed, then measures each backend in its own
+    interpreter and compares its query embeddings with PyTorch's.
+
+    Args:
+        persist_directory (str): Index directory (holds the resolved model and exports)
+        threads (int): ONNX Runtime intra-op threads
+        passages (int): Chunk-sized texts embedded per backend
+        queries (int): Questions embedded per backend
+
+    Returns:
+        List[Dict]: One row per backend with the measure_backend figures
+            (without embeddings), speedup and memory saved relative to
+            PyTorch, parity (min and mean cosine to PyTorch) and model bytes
+    """
+    package_directory = os.path.dirname(os.path.abspath(__file__))
+
+    def run(code: str) -> str:
+        result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True,
+                                cwd=os.getcwd(), env=dict(os.environ, PYTHONPATH=package_directory))
+        if result.returncode != 0:
+            raise RuntimeError(result.stderr.strip().splitlines()[-1] if result.stderr.strip() else "failed")
+        return result.stdout
+
+    # Export (and quantize) once, so no measurement includes it
+    run(f"from vector_db import VectorDatabase; "
+        f"VectorDatabase(persist_directory={persist_directory!r}, embedding_backend='onnx-int8', "
+        f"persist_query_cache=False).embedding_model")
+
+    rows = []
+    for backend in EMBEDDING_BACKENDS:
+        output = run(
+            f"import json, onnx_embedder; "
+            f"print('\\n' + json.dumps(onnx_embedder.measure_backend({backend!r}, {persist_directory!r}, "
+            f"{threads}, {passages}, {queries})))"
+        )
+        rows.append(json.loads(output.strip().splitlines()[-1]))
+
+    reference = rows[0]
+    reference_embeddings = np.array(reference["query_embeddings"])
+    metadata = read_export_metadata(onnx_directory(persist_directory, reference["model"])) or {}
+    for row in rows:
+        embeddings = np.array(row.pop("query_embeddings"))
+        cosines = (embeddings * reference_embeddings).sum(axis=1)
+        row["parity_min_cosine"] = float(cosines.min())
+        row["parity_mean_cosine"] = float(cosines.mean())
+        row["speedup"] = row["passages_per_second"] / reference["passages_per_second"]
+        row["memory_saved_bytes"] = reference["peak_rss_bytes"] - row["peak_rss_bytes"]
+        variant = {"onnx": "fp32", "onnx-int8": "int8"}.get(row["backend"])
+        row["model_bytes"] = (metadata.get("variants", {}).get(variant, {}).get("bytes")
+                              if variant else metadata.get("torch_parameter_bytes"))
+    return rows
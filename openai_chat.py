@@ -9,15 +9,25 @@ contextual responses.
 Key Features:
 - OpenAI GPT-3.5-turbo integration
 - Enhanced conversation memory (20 exchanges + summaries)
-- Automatic conversation summarization
+- Automatic rolling conversation summarization in the background
 - Strict document adherence with professional responses
 - Context-aware response generation
+- Optional streaming of the response as it is generated
 - Memory management and cleanup
+- Asynchronous client (AsyncOpenAIChat) with per-session conversations and a
+  shared HTTP connection pool
+- All calls go through one shared rate limiter (RPM/TPM budgets, retries with
+  backoff, adaptive concurrency; see rate_limiter.py)
+- Optional on-disk cache of responses keyed by the exact request, with a
+  replay-only mode for offline runs (see response_cache.py)
 
 Technical Implementation:
 - Conversation history: Last 20 exchanges (40 messages)
-- Summary generation: Every 20 exchanges using GPT-3.5-turbo
+- Summary generation: After every 20 new messages, in a background thread,
+  folding only the new messages into the previous summary
 - Context layers: System message → Summary → History → Current query
+- Prompt budget: 3000 tokens, filled with system prompt, context, history and
+  summary in that order (see prompt_builder.py)
 - Response filtering: Strict adherence to provided documents
 
 Author: Avinav Mishra
@@ -25,14 +35,164 @@ Repository: https://github.com/avinav86/Aadhar_Agent
 """
 
 import openai
-from typing import List, Dict
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from collections import OrderedDict
+from typing import Iterator, List, Dict, Optional, Union
 import os
 from dotenv import load_dotenv
+from prompt_builder import PromptBuilder, format_source, merge_overlapping_chunks
+from rate_limiter import RateLimiter, default_rate_limiter
+from response_cache import REPLAY, ResponseCache, default_response_cache, usage_dict
+from metrics import metrics, timed
 
 # Load environment variables from config.env file
 # This enables automatic API key loading from the configuration file
 load_dotenv('config.env')
 
+# Prefix of the message returned when a completion fails
+ERROR_PREFIX = "Error generating response"
+
+# Chat model and number of history messages sent with every question
+CHAT_MODEL = "gpt-3.5-turbo"
+HISTORY_MESSAGES = 20
+
+# New messages (10 exchanges) that trigger a background summary update
+SUMMARY_INTERVAL = 20
+
+# Summaries are written off the request path, by these threads (joined at
+# interpreter exit, so a running update is not cut off when the CLI exits)
+_SUMMARY_EXECUTOR = ThreadPoolExecutor(max_workers=2, thread_name_prefix="summary")
+
+SYSTEM_MESSAGE = """You are a specialized Aadhaar assistant that ONLY answers questions based on the provided official Aadhaar documents.
+
+STRICT RULES:
+1. ONLY use information from the provided Aadhaar documents
+2. If information is NOT in the provided documents, respond with: "Information unavailable at the moment."
+3. Do NOT provide any external knowledge or general information
+4. Do NOT answer questions unrelated to Aadhaar processes
+5. Always cite the specific document source when providing information
+
+You have access to:
+1. Official Aadhaar documents (provided as context)
+2. Conversation history (previous questions and answers in this chat)
+
+For questions about the conversation itself (like "when did we discuss X?" or "what did you say about Y?"), refer to the conversation history.
+
+Stay strictly within the bounds of the provided Aadhaar documents."""
+
+
+def prepare_context(documents: List[Dict]) -> str:
+    """Prepare context string from retrieved documents (overlapping chunks merged)"""
+    return "\n".join(format_source(i, span) for i, span in enumerate(merge_overlapping_chunks(documents), 1))
+
+
+def _user_message(user_query: str, context: str) -> str:
+    """Final user message: document context, question and grounding reminder"""
+    return f"""RELEVANT DOCUMENT CONTEXT:
+{context}
+
+CURRENT QUESTION: {user_query}
+
+IMPORTANT: Only answer if the information is available in the document context above. If not available, respond with "Information unavailable at the moment." Do not provide any external knowledge."""
+
+
+_default_builder: Optional[PromptBuilder] = None
+_default_builder_lock = threading.Lock()
+
+
+def default_prompt_builder() -> PromptBuilder:
+    """Shared PromptBuilder for CHAT_MODEL with the default token budget"""
+    global _default_builder
+    with _default_builder_lock:
+        if _default_builder is None:
+            _default_builder = PromptBuilder(model=CHAT_MODEL, max_history_messages=HISTORY_MESSAGES)
+    return _default_builder
+
+
+def build_messages(user_query: str, context_documents: List[Dict], history: List[Dict],
+                   summary: str = "", builder: Optional[PromptBuilder] = None) -> List[Dict]:
+    """
+    Assemble the chat messages for one question within the prompt token budget.
+    
+    Context layers: System message → Summary → History → Current query.
+    Overlapping chunks are merged, and the budget goes to the system prompt,
+    context, recent history and summary, in that order (see PromptBuilder).
+    Shared by the synchronous and asynchronous clients.
+    
+    Args:
+        user_query (str): Current question
+        context_documents (List[Dict]): Retrieved chunks
+        history (List[Dict]): Conversation messages so far
+        summary (str): Summary of older conversation context
+        builder (Optional[PromptBuilder]): Builder to use; defaults to the shared one
+    
+    Returns:
+        List[Dict]: Messages for chat.completions.create
+    """
+    with timed("prompt_build"):
+        return (builder or default_prompt_builder()).build(
+            SYSTEM_MESSAGE,
+            lambda context: _user_message(user_query, context),
+            context_documents,
+            history,
+            summary
+        )
+
+
+def estimate_tokens(messages: List[Dict], max_tokens: int,
+                    builder: Optional[PromptBuilder] = None) -> int:
+    """Tokens a completion may use: its prompt plus the maximum completion"""
+    return (builder or default_prompt_builder()).count_messages(messages) + max_tokens
+
+
+def track_usage(response) -> Optional[Dict]:
+    """Count the tokens of a completion in the metrics and return its usage dict"""
+    usage = usage_dict(response)
+    if usage is not None:
+        metrics.record_tokens(usage["prompt_tokens"], usage["completion_tokens"])
+    return usage
+
+
+def api_key(response_cache: ResponseCache) -> Optional[str]:
+    """Key for a new client; replay mode never reaches the API, so it runs without one"""
+    key = os.getenv("OPENAI_API_KEY")
+    if not key and response_cache.mode == REPLAY:
+        return "replay-only"
+    return key
+
+
+def needs_summary(history: List[Dict], summarized_messages: int = 0) -> bool:
+    """True when 20 or more messages have been added since the last summary"""
+    return len(history) - summarized_messages >= SUMMARY_INTERVAL
+
+
+def build_summary_prompt(previous_summary: str, new_messages: List[Dict]) -> str:
+    """
+    Create the prompt that folds new messages into the rolling summary.
+    
+    Only the messages added since the last summary are sent, together with
+    that summary, so the prompt stays small however long the chat gets.
+    """
+    conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in new_messages])
+    
+    return f"""Update the running summary of this Aadhaar-related conversation with the new messages below. Keep what still matters from the current summary. Focus on:
+1. Main topics discussed
+2. Key information provided
+3. User's specific needs or questions
+4. Important details that should be remembered
+
+Current summary:
+{previous_summary or "(none yet)"}
+
+New messages:
+{conversation_text}
+
+Provide the updated concise summary:"""
+
+
 class OpenAIChat:
     """
     Handles OpenAI LLM interactions with enhanced memory and context management.
@@ -51,128 +211,430 @@ class OpenAIChat:
     
     Attributes:
         client (openai.OpenAI): OpenAI API client instance
+        prompt_builder (Optional[PromptBuilder]): Prompt assembly and token budget
         conversation_history (List[Dict]): Recent conversation messages
         conversation_summary (str): Summary of older conversation context
         topic_context (Dict): Additional context tracking for topics
+        rate_limiter (RateLimiter): Limiter every completion goes through
+        response_cache (ResponseCache): Recorded responses checked before the API
+        last_usage (Optional[Dict]): Token usage of the last completion
+            (prompt_tokens, completion_tokens, total_tokens), if reported;
+            None for responses served from the response cache
+        stream_failed (bool): Whether the last streamed response failed part
+            way through (its final piece is then an ERROR_PREFIX message)
     """
     
-    def __init__(self):
-        self.client = openai.OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+    def __init__(self, client: Optional[openai.OpenAI] = None,
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None):
+        """
+        Args:
+            client (Optional[openai.OpenAI]): Client to use. Conversations served
+                by one process share a client (and its connection pool).
+            prompt_builder (Optional[PromptBuilder]): Prompt assembly and token
+                budget; defaults to the shared builder for CHAT_MODEL
+            rate_limiter (Optional[RateLimiter]): Limiter for the completions;
+                defaults to the limiter shared by the whole process
+            response_cache (Optional[ResponseCache]): Cache of responses;
+                defaults to the cache shared by the whole process
+                (configured by OPENAI_RESPONSE_CACHE, off by default)
+        """
+        self.response_cache = response_cache or default_response_cache()
+        # Retries are left to the rate limiter
+        self.client = client or openai.OpenAI(api_key=api_key(self.response_cache), max_retries=0)
+        self.prompt_builder = prompt_builder
+        self.rate_limiter = rate_limiter or default_rate_limiter()
         self.conversation_history = []
         self.conversation_summary = ""
         self.topic_context = {}
+        self.last_usage: Optional[Dict] = None
+        self.stream_failed = False
         
-    def generate_response(self, user_query: str, context_documents: List[Dict]) -> str:
-        """Generate response using OpenAI with context from vector search"""
+        # Rolling summary state: messages already folded into the summary, the
+        # running background update, and a counter that invalidates updates
+        # started before clear_history
+        self._summarized_messages = 0
+        self._summary_future: Optional[Future] = None
+        self._summary_generation = 0
+        self._summary_lock = threading.Lock()
         
-        # Prepare context from retrieved documents
-        context = self._prepare_context(context_documents)
+    def generate_response(self, user_query: str, context_documents: List[Dict],
+                          stream: bool = False) -> Union[str, Iterator[str]]:
+        """
+        Generate response using OpenAI with context from vector search.
         
-        # Create system message
-        system_message = """You are a specialized Aadhaar assistant that ONLY answers questions based on the provided official Aadhaar documents.
-
-STRICT RULES:
-1. ONLY use information from the provided Aadhaar documents
-2. If information is NOT in the provided documents, respond with: "Information unavailable at the moment."
-3. Do NOT provide any external knowledge or general information
-4. Do NOT answer questions unrelated to Aadhaar processes
-5. Always cite the specific document source when providing information
-
-You have access to:
-1. Official Aadhaar documents (provided as context)
-2. Conversation history (previous questions and answers in this chat)
-
-For questions about the conversation itself (like "when did we discuss X?" or "what did you say about Y?"), refer to the conversation history.
-
-Stay strictly within the bounds of the provided Aadhaar documents."""
-
-        # Prepare messages for chat completion
-        messages = [{"role": "system", "content": system_message}]
-        
-        # Add conversation summary if available
-        if self.conversation_summary:
-            messages.append({"role": "system", "content": f"CONVERSATION SUMMARY: {self.conversation_summary}"})
+        Args:
+            user_query (str): Current question
+            context_documents (List[Dict]): Retrieved chunks
+            stream (bool): Return an iterator of text pieces as they arrive
+                instead of waiting for the whole completion. History and
+                summary are updated once the iterator is exhausted.
         
-        # Add conversation history (increased from 10 to 20 exchanges)
-        for msg in self.conversation_history[-20:]:  # Keep last 20 exchanges (40 messages)
-            messages.append(msg)
+        Returns:
+            Union[str, Iterator[str]]: Full response, or its pieces when streaming
+        """
         
-        # Add current query with context
-        user_message = f"""RELEVANT DOCUMENT CONTEXT:
-{context}
-
-CURRENT QUESTION: {user_query}
-
-IMPORTANT: Only answer if the information is available in the document context above. If not available, respond with "Information unavailable at the moment." Do not provide any external knowledge."""
+        messages = build_messages(
+            user_query,
+            context_documents,
+            self.conversation_history,
+            self.conversation_summary,
+            self.prompt_builder
+        )
         
-        messages.append({"role": "user", "content": user_message})
+        if stream:
+            return self._stream_response(user_query, messages)
         
+        self.last_usage = None
         try:
-            response = self.client.chat.completions.create(
-                model="gpt-3.5-turbo",
-                messages=messages,
-                max_tokens=1000,
-                temperature=0.7
-            )
+            with timed("completion"):
+                response = self._complete(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    max_tokens=1000,
+                    temperature=0.7
+                )
             
             assistant_response = response.choices[0].message.content
+            self.last_usage = track_usage(response)
             
-            # Update conversation history
-            self.conversation_history.append({"role": "user", "content": user_query})
-            self.conversation_history.append({"role": "assistant", "content": assistant_response})
-            
-            # Update conversation summary periodically
-            self._update_conversation_summary()
+            # Update conversation history and summary
+            self.record_exchange(user_query, assistant_response)
             
             return assistant_response
             
         except Exception as e:
-            return f"Error generating response: {str(e)}"
+            return f"{ERROR_PREFIX}: {str(e)}"
     
-    def _prepare_context(self, documents: List[Dict]) -> str:
-        """Prepare context string from retrieved documents"""
-        context_parts = []
+    def _stream_response(self, user_query: str, messages: List[Dict]) -> Iterator[str]:
+        """Yield the completion piece by piece, then record the exchange"""
+        parts = []
+        self.last_usage = None
+        self.stream_failed = False
+        start_time = time.perf_counter()
+        try:
+            # Rate limits are reported when the stream is opened, so only that
+            # call is retried; the concurrency slot is freed once it returns
+            stream = self._complete(
+                model=CHAT_MODEL,
+                messages=messages,
+                max_tokens=1000,
+                temperature=0.7,
+                stream=True,
+                # The last chunk then carries the token usage
+                extra_body={"stream_options": {"include_usage": True}}
+            )
+            for chunk in stream:
+                if getattr(chunk, "usage", None) is not None:
+                    self.last_usage = track_usage(chunk)
+                if not chunk.choices:
+                    continue
+                delta = chunk.choices[0].delta.content
+                if delta:
+                    if not parts:
+                        metrics.observe("completion_first_token", time.perf_counter() - start_time)
+                    parts.append(delta)
+                    yield delta
+        except Exception as e:
+            # Failed answers are not added to the history
+            self.stream_failed = True
+            separator = "\n\n" if parts else ""
+            yield f"{separator}{ERROR_PREFIX}: {str(e)}"
+            return
+        
+        metrics.observe("completion", time.perf_counter() - start_time)
+        
+        # Update conversation history and summary
+        self.record_exchange(user_query, "".join(parts))
+    
+    def _complete(self, **params):
+        """
+        Request a completion: from the response cache when it has one, else
+        from the API within the rate limits (and recorded, if caching).
         
-        for i, doc in enumerate(documents, 1):
-            source = doc["metadata"].get("filename", "Unknown")
-            content = doc["content"]
-            context_parts.append(f"Source {i} ({source}):\n{content}\n")
+        Args:
+            **params: Keyword arguments of ``chat.completions.create``
         
-        return "\n".join(context_parts)
+        Returns:
+            The completion, or its chunks when ``stream=True``
+        """
+        return self.response_cache.complete(
+            params,
+            lambda: self.rate_limiter.call(
+                lambda: self.client.chat.completions.create(**params),
+                estimate_tokens(params["messages"], params["max_tokens"], self.prompt_builder)
+            )
+        )
+    
+    def is_first_turn(self) -> bool:
+        """True while the conversation has no history or summary yet"""
+        with self._summary_lock:
+            return not self.conversation_history and not self.conversation_summary
+    
+    def record_exchange(self, user_query: str, assistant_response: str):
+        """
+        Add a question and its answer to the conversation history.
+        
+        Used after every completion, and by the agent when an answer is served
+        from its cache, so follow-up questions keep their context.
+        """
+        self.conversation_history.append({"role": "user", "content": user_query})
+        self.conversation_history.append({"role": "assistant", "content": assistant_response})
+        
+        # Update conversation summary periodically
+        self._update_conversation_summary()
+    
+    def _prepare_context(self, documents: List[Dict]) -> str:
+        """Prepare context string from retrieved documents"""
+        return prepare_context(documents)
     
     def _update_conversation_summary(self):
-        """Update conversation summary every 10 exchanges"""
-        if len(self.conversation_history) % 20 == 0 and len(self.conversation_history) > 0:
-            try:
-                # Create a summary of the conversation so far
-                recent_exchanges = self.conversation_history[-20:]
-                conversation_text = "\n".join([f"{msg['role']}: {msg['content']}" for msg in recent_exchanges])
-                
-                summary_prompt = f"""Summarize the key topics and information discussed in this Aadhaar-related conversation. Focus on:
-1. Main topics discussed
-2. Key information provided
-3. User's specific needs or questions
-4. Important details that should be remembered
-
-Conversation:
-{conversation_text}
-
-Provide a concise summary:"""
-                
-                summary_response = self.client.chat.completions.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "user", "content": summary_prompt}],
+        """
+        Start a background summary update once 20 new messages have accumulated.
+        
+        The request that triggers it does not wait; the next request uses the
+        new summary if it is ready by then. Only one update per conversation
+        runs at a time, and the next one picks up every message added meanwhile.
+        """
+        with self._summary_lock:
+            if not needs_summary(self.conversation_history, self._summarized_messages):
+                return
+            if self._summary_future is not None and not self._summary_future.done():
+                return
+            
+            self._summary_future = _SUMMARY_EXECUTOR.submit(
+                self._summarize,
+                self.conversation_summary,
+                self.conversation_history[self._summarized_messages:],
+                len(self.conversation_history),
+                self._summary_generation
+            )
+    
+    def _summarize(self, previous_summary: str, new_messages: List[Dict],
+                   summarized_messages: int, generation: int):
+        """Fold new messages into the summary (runs on a summary thread)"""
+        messages = [{"role": "user", "content": build_summary_prompt(previous_summary, new_messages)}]
+        try:
+            with timed("summary"):
+                summary_response = self._complete(
+                    model=CHAT_MODEL,
+                    messages=messages,
                     max_tokens=200,
                     temperature=0.3
                 )
-                
+            track_usage(summary_response)
+        except Exception as e:
+            print(f"Warning: Could not update conversation summary: {e}")
+            return
+        
+        with self._summary_lock:
+            # Drop the result if the history was cleared in the meantime
+            if generation == self._summary_generation:
                 self.conversation_summary = summary_response.choices[0].message.content
-                
-            except Exception as e:
-                print(f"Warning: Could not update conversation summary: {e}")
+                self._summarized_messages = summarized_messages
     
     def clear_history(self):
         """Clear conversation history"""
-        self.conversation_history = []
-        self.conversation_summary = ""
-        self.topic_context = {}
+        with self._summary_lock:
+            self.conversation_history = []
+            self.conversation_summary = ""
+            self.topic_context = {}
+            self._summarized_messages = 0
+            self._summary_generation += 1
+
+
+class Conversation:
+    """
+    Conversation state of one session, used by AsyncOpenAIChat.
+    
+    Attributes:
+        history (List[Dict]): Recent conversation messages
+        summary (str): Summary of older conversation context
+        topic_context (Dict): Additional context tracking for topics
+        last_used (float): Time of the last question
+        summarized_messages (int): Messages already folded into the summary
+    """
+    
+    def __init__(self):
+        self.history: List[Dict] = []
+        self.summary = ""
+        self.topic_context: Dict = {}
+        self.last_used = time.time()
+        # Turns of one session are answered in order
+        self.lock = asyncio.Lock()
+        # Rolling summary: messages already folded in, and the running update
+        self.summarized_messages = 0
+        self.summary_task: Optional[asyncio.Task] = None
+
+
+class AsyncOpenAIChat:
+    """
+    Asynchronous OpenAI chat serving many sessions from one event loop.
+    
+    A single ``AsyncOpenAI`` client and its HTTP connection pool are shared by
+    every session, while history and summaries live in a per-session
+    Conversation. Awaiting a completion does not block other sessions, so one
+    process can hold hundreds of chats in flight.
+    
+    Attributes:
+        client (openai.AsyncOpenAI): Shared asynchronous OpenAI client
+        rate_limiter (RateLimiter): Limiter every completion goes through
+        max_sessions (int): Maximum number of conversations kept (least recently used go first)
+        session_ttl (float): Idle seconds before a conversation is forgotten
+    """
+    
+    def __init__(self, client: Optional["openai.AsyncOpenAI"] = None, max_connections: int = 100,
+                 max_sessions: int = 10000, session_ttl: float = 3600,
+                 prompt_builder: Optional[PromptBuilder] = None,
+                 rate_limiter: Optional[RateLimiter] = None,
+                 response_cache: Optional[ResponseCache] = None):
+        """
+        Create the client and an empty session table.
+        
+        Args:
+            client (Optional[openai.AsyncOpenAI]): Client to use; by default one is
+                created with a pooled httpx client
+            max_connections (int): Size of the shared HTTP connection pool
+            max_sessions (int): Maximum number of conversations kept
+            session_ttl (float): Idle seconds before a conversation is forgotten
+            prompt_builder (Optional[PromptBuilder]): Prompt assembly and token budget
+            rate_limiter (Optional[RateLimiter]): Limiter for the completions;
+                defaults to the limiter shared by the whole process
+            response_cache (Optional[ResponseCache]): Cache of responses;
+                defaults to the cache shared by the whole process
+        """
+        self.response_cache = response_cache or default_response_cache()
+        if client is None:
+            import httpx
+            
+            http_client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=max_connections,
+                    max_keepalive_connections=max_connections
+                ),
+                timeout=httpx.Timeout(60.0, connect=5.0)
+            )
+            client = openai.AsyncOpenAI(api_key=api_key(self.response_cache), http_client=http_client,
+                                        max_retries=0)
+        self.client = client
+        self.prompt_builder = prompt_builder
+        self.rate_limiter = rate_limiter or default_rate_limiter()
+        self.max_sessions = max(1, max_sessions)
+        self.session_ttl = session_ttl
+        self._sessions: "OrderedDict[str, Conversation]" = OrderedDict()
+    
+    def session(self, session_id: str) -> Conversation:
+        """Return the conversation of a session, creating it if needed"""
+        self._expire()
+        conversation = self._sessions.get(session_id)
+        if conversation is None:
+            conversation = Conversation()
+            self._sessions[session_id] = conversation
+            while len(self._sessions) > self.max_sessions:
+                self._sessions.popitem(last=False)
+        conversation.last_used = time.time()
+        self._sessions.move_to_end(session_id)
+        return conversation
+    
+    async def generate_response(self, session_id: str, user_query: str,
+                                context_documents: List[Dict]) -> str:
+        """
+        Generate a response within a session's conversation.
+        
+        Args:
+            session_id (str): Conversation to answer in
+            user_query (str): Current question
+            context_documents (List[Dict]): Retrieved chunks
+        
+        Returns:
+            str: Assistant response, or an ERROR_PREFIX message on failure
+        """
+        conversation = self.session(session_id)
+        async with conversation.lock:
+            messages = build_messages(user_query, context_documents, conversation.history,
+                                      conversation.summary, self.prompt_builder)
+            try:
+                with timed("completion"):
+                    response = await self._complete(
+                        model=CHAT_MODEL,
+                        messages=messages,
+                        max_tokens=1000,
+                        temperature=0.7
+                    )
+                assistant_response = response.choices[0].message.content
+                track_usage(response)
+            except Exception as e:
+                return f"{ERROR_PREFIX}: {str(e)}"
+            
+            await self._record(conversation, user_query, assistant_response)
+            return assistant_response
+    
+    async def _complete(self, **params):
+        """Request a completion from the response cache or, within the rate limits, the API"""
+        return await self.response_cache.complete_async(
+            params,
+            lambda: self.rate_limiter.call_async(
+                lambda: self.client.chat.completions.create(**params),
+                estimate_tokens(params["messages"], params["max_tokens"], self.prompt_builder)
+            )
+        )
+    
+    def is_first_turn(self, session_id: str) -> bool:
+        """True while a session has no history or summary yet"""
+        conversation = self._sessions.get(session_id)
+        return conversation is None or (not conversation.history and not conversation.summary)
+    
+    async def record_exchange(self, session_id: str, user_query: str, assistant_response: str):
+        """Add a question and its answer to a session's history (e.g. for cached answers)"""
+        conversation = self.session(session_id)
+        async with conversation.lock:
+            await self._record(conversation, user_query, assistant_response)
+    
+    async def _record(self, conversation: Conversation, user_query: str, assistant_response: str):
+        """Append an exchange and start a background summary update every 20 messages"""
+        conversation.history.append({"role": "user", "content": user_query})
+        conversation.history.append({"role": "assistant", "content": assistant_response})
+        
+        running = conversation.summary_task is not None and not conversation.summary_task.done()
+        if needs_summary(conversation.history, conversation.summarized_messages) and not running:
+            conversation.summary_task = asyncio.create_task(self._summarize(
+                conversation,
+                conversation.history[conversation.summarized_messages:],
+                len(conversation.history)
+            ))
+    
+    async def _summarize(self, conversation: Conversation, new_messages: List[Dict], summarized_messages: int):
+        """Fold new messages into a session's summary (runs as a background task)"""
+        messages = [{"role": "user", "content": build_summary_prompt(conversation.summary, new_messages)}]
+        try:
+            with timed("summary"):
+                summary_response = await self._complete(
+                    model=CHAT_MODEL,
+                    messages=messages,
+                    max_tokens=200,
+                    temperature=0.3
+                )
+            track_usage(summary_response)
+        except Exception as e:
+            print(f"Warning: Could not update conversation summary: {e}")
+            return
+        conversation.summary = summary_response.choices[0].message.content
+        conversation.summarized_messages = summarized_messages
+    
+    def clear_history(self, session_id: str):
+        """Forget a session's conversation"""
+        self._sessions.pop(session_id, None)
+    
+    async def aclose(self):
+        """Close the shared HTTP connection pool"""
+        await self.client.close()
+    
+    def _expire(self):
+        """Remove conversations idle for longer than the time-to-live"""
+        cutoff = time.time() - self.session_ttl
+        while self._sessions:
+            session_id, conversation = next(iter(self._sessions.items()))
+            if conversation.last_used >= cutoff:
+                break
+            del self._sessions[session_id]
@@ -7,18 +7,63 @@ provides methods for batch processing of multiple PDF files.
 
 Key Features:
 - Batch processing of all PDFs in a directory
+- Optional parallel extraction with a process pool (per file and per page range)
+- Content-hash keyed on-disk cache of extracted page text
 - Text extraction with error handling
-- Document metadata preservation
-- Text chunking for vector database storage
+- Document metadata preservation (including per-page text for chunking)
 
 Author: Avinav Mishra
 Repository: https://github.com/avinav86/Aadhar_Agent
 """
 
 import os
+import time
 import PyPDF2
-from typing import List, Dict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, List, Dict, Optional, Tuple
 from pathlib import Path
+from disk_cache import DiskCache, file_sha256
+from metrics import metrics, timed
+
+# Default location of the extracted-text cache shared by the agent and the CLI
+DEFAULT_CACHE_DIRECTORY = "./pdf_cache"
+
+
+def _extract_page_range(pdf_path: str, start: int, end: int) -> Optional[List[str]]:
+    """
+    Extract the text of pages [start, end) from a PDF file.
+    
+    Defined at module level so it can be pickled and run inside a worker
+    process of the extraction pool.
+    
+    Args:
+        pdf_path (str): Full path to the PDF file
+        start (int): Index of the first page to extract
+        end (int): Index one past the last page to extract
+        
+    Returns:
+        Optional[List[str]]: Text of each page in the range, or None on failure
+            (an empty list would silently drop the range from the document)
+    """
+    try:
+        with open(pdf_path, 'rb') as file:
+            pdf_reader = PyPDF2.PdfReader(file)
+            # Pages with no extractable text come back as None on some PDFs
+            return [pdf_reader.pages[i].extract_text() or "" for i in range(start, end)]
+    except Exception as e:
+        print(f"Error extracting pages {start}-{end} from {pdf_path}: {e}")
+        return None
+
+
+def _count_pages(pdf_path: str) -> Optional[int]:
+    """Return the number of pages in a PDF file, or None if it cannot be read"""
+    try:
+        with open(pdf_path, 'rb') as file:
+            return len(PyPDF2.PdfReader(file).pages)
+    except Exception as e:
+        print(f"Error reading {pdf_path}: {e}")
+        return None
+
 
 class PDFProcessor:
     """
@@ -32,17 +77,31 @@ class PDFProcessor:
     
     Attributes:
         pdf_directory (Path): Path to the directory containing PDF files
+        max_workers (int): Number of extraction processes (1 = sequential)
+        pages_per_task (int): Page range size used to split large PDFs across workers
+        cache (Optional[DiskCache]): Extraction cache keyed by file SHA-256
     """
     
-    def __init__(self, pdf_directory: str):
+    def __init__(self, pdf_directory: str, max_workers: Optional[int] = 1,
+                 pages_per_task: int = 25, cache: Optional[DiskCache] = None):
         """
         Initialize the PDF processor with a target directory.
         
         Args:
             pdf_directory (str): Path to the directory containing PDF files
+            max_workers (Optional[int]): Number of worker processes used for
+                extraction. 1 keeps the original sequential behaviour, None uses
+                all available CPU cores.
+            pages_per_task (int): PDFs with more pages than this are split into
+                page ranges of this size so a single large file can use several workers
+            cache (Optional[DiskCache]): Cache of extracted page text; unchanged
+                files are served from it instead of being parsed again
         """
         # Convert string path to Path object for better path handling
         self.pdf_directory = Path(pdf_directory)
+        self.max_workers = max_workers if max_workers is not None else (os.cpu_count() or 1)
+        self.pages_per_task = max(1, pages_per_task)
+        self.cache = cache
         
     def extract_text_from_pdf(self, pdf_path: str) -> str:
         """
@@ -58,25 +117,65 @@ class PDFProcessor:
         Returns:
             str: Extracted text content from all pages, or empty string if extraction fails
         """
+        pages = self.extract_pages_from_pdf(pdf_path)
+        # Join once instead of growing a string page by page
+        return "".join(page + "\n" for page in pages)
+    
+    def extract_pages_from_pdf(self, pdf_path: str) -> List[str]:
+        """
+        Extract the text of every page of a single PDF file.
+        
+        Args:
+            pdf_path (str): Full path to the PDF file to process
+            
+        Returns:
+            List[str]: Text of each page in order, or an empty list if extraction fails
+        """
+        if self.cache is not None:
+            sha256 = file_sha256(pdf_path)
+            cached = self.cache.get(sha256)
+            if cached is not None:
+                return cached["pages"]
+            pages = self._read_pages(pdf_path)
+            # Failed extractions are not cached, so they are retried next time
+            if pages is not None:
+                self.cache.put(sha256, {"filename": Path(pdf_path).name, "pages": pages})
+            return pages or []
+        
+        return self._read_pages(pdf_path) or []
+    
+    def _read_pages(self, pdf_path: str) -> Optional[List[str]]:
+        """Extract page texts with PyPDF2, bypassing the cache (None on failure)"""
+        with timed("pdf_extract"):
+            pages = self._parse_pages(pdf_path)
+        metrics.increment("pdf_pages_extracted", len(pages or []))
+        return pages
+    
+    def _parse_pages(self, pdf_path: str) -> Optional[List[str]]:
+        """
+        Parse a PDF and return the text of each page.
+        
+        Args:
+            pdf_path (str): Path to the PDF file
+            
+        Returns:
+            Optional[List[str]]: Page texts ("" for pages without text), or
+                None if the file cannot be read or parsed
+        """
         try:
             # Open PDF file in binary read mode
             with open(pdf_path, 'rb') as file:
                 # Create PyPDF2 reader object
                 pdf_reader = PyPDF2.PdfReader(file)
-                text = ""
-                
-                # Iterate through all pages in the PDF
-                for page in pdf_reader.pages:
-                    # Extract text from current page and add newline separator
-                    text += page.extract_text() + "\n"
                 
-                return text
+                # Collect page texts in a list; pages with no text yield ""
+                return [page.extract_text() or "" for page in pdf_reader.pages]
         except Exception as e:
-            # Log error and return empty string for failed extractions
+            # Log error and return None so the failure is not cached
             print(f"Error extracting text from {pdf_path}: {e}")
-            return ""
+            return None
     
-    def process_all_pdfs(self) -> List[Dict[str, str]]:
+    def process_all_pdfs(self) -> List[Dict]:
         """
         Process all PDF files in the configured directory.
         
@@ -86,55 +185,168 @@ class PDFProcessor:
         processed PDF.
         
         Returns:
-            List[Dict[str, str]]: List of document dictionaries with keys:
+            List[Dict]: List of document dictionaries with keys:
                 - filename: Name of the PDF file
                 - content: Extracted text content
                 - source: Full path to the source file
+                - pages: Extracted text of each page
+        """
+        return self.process_pdfs(self.list_pdfs())
+    
+    def list_pdfs(self) -> List[Path]:
+        """
+        List the PDF files in the configured directory.
+        
+        Returns:
+            List[Path]: PDF files sorted by name so documents (and therefore
+                chunk IDs) come back in a stable order
         """
-        documents = []
+        return sorted(self.pdf_directory.glob("*.pdf"))
+    
+    def process_pdfs(self, pdf_files: List[Path]) -> List[Dict]:
+        """
+        Extract text from a specific list of PDF files.
         
-        # Use glob to find all PDF files in the directory
-        for pdf_file in self.pdf_directory.glob("*.pdf"):
-            # Display progress information
-            print(f"Processing {pdf_file.name}...")
+        Used for incremental indexing, where only added or changed files need
+        to be processed. Files without any extractable text are skipped.
+        
+        Args:
+            pdf_files (List[Path]): PDF files to process
             
-            # Extract text from the current PDF file
-            text = self.extract_text_from_pdf(str(pdf_file))
+        Returns:
+            List[Dict]: Document dictionaries in the same format as
+                process_all_pdfs, in input order
+        """
+        # Only keep documents with non-empty content
+        return [doc for doc in self.iter_documents(pdf_files) if doc["content"].strip()]
+    
+    def iter_documents(self, pdf_files: List[Path]) -> Iterator[Dict]:
+        """
+        Lazily extract documents one at a time.
+        
+        Files are extracted in small windows (one file per worker), so at most a
+        window's worth of text is held in memory while the consumer processes
+        earlier documents. Documents without text are still yielded, with empty
+        content, so callers can tell when every file has been seen. Files whose
+        extraction failed are yielded with ``failed`` set, so they are not
+        mistaken for files that simply have no text.
+        
+        Args:
+            pdf_files (List[Path]): PDF files to process
             
-            # Only add documents with non-empty content
-            if text.strip():
-                documents.append({
-                    "filename": pdf_file.name,      # Just the filename
-                    "content": text,                # Extracted text content
-                    "source": str(pdf_file)        # Full path to source file
-                })
-        
-        return documents
+        Yields:
+            Dict: Document dictionaries in input order, with the per-page
+                text under ``pages`` in addition to the joined ``content``, and
+                ``failed`` set when the file could not be extracted
+        """
+        window = max(1, self.max_workers)
+        for start in range(0, len(pdf_files), window):
+            batch = pdf_files[start:start + window]
+            for pdf_file, pages in zip(batch, self._extract_with_cache(batch)):
+                yield {
+                    "filename": pdf_file.name,                    # Just the filename
+                    "content": "".join(page + "\n" for page in pages or []),  # Extracted text content
+                    "source": str(pdf_file),                     # Full path to source file
+                    "pages": pages or [],                        # Text of each page
+                    "failed": pages is None                      # Extraction failed; retry later
+                }
     
-    def chunk_text(self, text: str, chunk_size: int = 1000, overlap: int = 200) -> List[str]:
+    def _extract_with_cache(self, pdf_files: List[Path]) -> List[Optional[List[str]]]:
         """
-        Split text into overlapping chunks for better retrieval performance.
+        Extract page texts for several PDFs, serving unchanged files from the cache.
         
-        This method divides large text documents into smaller, manageable chunks
-        with overlapping content. This approach improves vector search performance
-        and ensures that related information isn't split across chunk boundaries.
+        Only cache misses are handed to the (possibly parallel) extractor, and
+        their results are written back to the cache.
         
         Args:
-            text (str): The input text to be chunked
-            chunk_size (int): Number of words per chunk (default: 1000)
-            overlap (int): Number of words to overlap between chunks (default: 200)
+            pdf_files (List[Path]): PDF files to extract
             
         Returns:
-            List[str]: List of text chunks with overlapping content
+            List[Optional[List[str]]]: Page texts for each input file, in input
+                order, or None for a file whose extraction failed
+        """
+        if self.cache is None:
+            return self._extract_many(pdf_files)
+        
+        results: List[Optional[List[str]]] = []
+        missing = []
+        for pdf_file in pdf_files:
+            sha256 = file_sha256(str(pdf_file))
+            cached = self.cache.get(sha256)
+            if cached is not None:
+                print(f"♻️  Using cached text for {pdf_file.name}")
+                results.append(cached["pages"])
+            else:
+                results.append(None)
+                missing.append((len(results) - 1, pdf_file, sha256))
+        
+        extracted = self._extract_many([pdf_file for _, pdf_file, _ in missing])
+        for (index, pdf_file, sha256), pages in zip(missing, extracted):
+            # Only complete extractions are cached; failed ones (None) are
+            # retried next time instead of being served truncated forever
+            if pages is not None:
+                self.cache.put(sha256, {"filename": pdf_file.name, "pages": pages})
+            results[index] = pages
+        
+        return results
+    
+    def _extract_many(self, pdf_files: List[Path]) -> List[Optional[List[str]]]:
         """
-        # Split text into individual words
-        words = text.split()
-        chunks = []
+        Extract page texts for several PDFs, in parallel when configured.
         
-        # Create overlapping chunks by stepping through words
-        for i in range(0, len(words), chunk_size - overlap):
-            # Join words to create chunk text
-            chunk = " ".join(words[i:i + chunk_size])
-            chunks.append(chunk)
+        Results are returned in the same order as ``pdf_files`` regardless of
+        which worker finishes first.
+        
+        Args:
+            pdf_files (List[Path]): PDF files to extract
             
-        return chunks
+        Returns:
+            List[Optional[List[str]]]: Page texts for each input file, or None
+                for a file whose extraction failed (in any page range), so no
+                document is returned or cached with pages missing from the middle.
+        """
+        if self.max_workers <= 1 or not pdf_files:
+            results = []
+            for pdf_file in pdf_files:
+                # Display progress information
+                print(f"Processing {pdf_file.name}...")
+                results.append(self._read_pages(str(pdf_file)))
+            return results
+        
+        # Split every file into page ranges so large PDFs use several workers
+        tasks: List[Tuple[int, int, int]] = []
+        failed = set()
+        for file_index, pdf_file in enumerate(pdf_files):
+            page_count = _count_pages(str(pdf_file))
+            if page_count is None:
+                failed.add(file_index)
+                continue
+            for start in range(0, page_count, self.pages_per_task):
+                tasks.append((file_index, start, min(start + self.pages_per_task, page_count)))
+        
+        print(f"Processing {len(pdf_files)} PDFs with {self.max_workers} workers ({len(tasks)} tasks)...")
+        
+        results: List[Optional[List[str]]] = [[] for _ in pdf_files]
+        start_time = time.perf_counter()
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = [
+                executor.submit(_extract_page_range, str(pdf_files[file_index]), start, end)
+                for file_index, start, end in tasks
+            ]
+            # Tasks are ordered by (file, start page), so extending in submission
+            # order reassembles each document's pages deterministically
+            for (file_index, _, _), future in zip(tasks, futures):
+                pages = future.result()
+                if pages is None:
+                    failed.add(file_index)
+                elif file_index not in failed:
+                    results[file_index].extend(pages)
+        
+        for file_index in sorted(failed):
+            print(f"Error extracting {pdf_files[file_index].name}: skipping the whole file")
+            results[file_index] = None
+        
+        # Pages are extracted in worker processes; record the wall time of the batch
+        metrics.observe("pdf_extract_parallel", time.perf_counter() - start_time)
+        metrics.increment("pdf_pages_extracted", sum(len(pages or []) for pages in results))
+        return results
@@ -0,0 +1,231 @@
+"""
+Prompt Builder Module for Aadhaar Chat Agent
+
+This module assembles the chat messages sent to OpenAI within a fixed token
+budget. Retrieved chunks overlap by design (consecutive chunks share up to
+``overlap_tokens`` tokens), so chunks from the same file whose character
+ranges overlap or touch are merged into one span before they are counted.
+The budget is then filled in priority order, so the parts that matter most
+for a grounded answer are never crowded out by conversation history.
+
+Key Features:
+- Token counts for the target chat model (tiktoken, with a character-based
+  estimate when tiktoken is not installed)
+- Overlapping chunks from the same file merged by character offsets
+- Budget filled in order: system prompt, document context, recent history,
+  conversation summary
+- The lowest-ranked context span is truncated rather than dropped when it
+  only partly fits
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+from typing import Callable, Dict, List
+
+# Characters per token for English text, used when tiktoken is unavailable
+_CHARS_PER_TOKEN = 4
+
+# Tokens added by the chat format for every message (role and separators)
+_TOKENS_PER_MESSAGE = 4
+
+# A truncated context span shorter than this is not worth including
+_MIN_SPAN_TOKENS = 50
+
+
+def merge_overlapping_chunks(documents: List[Dict]) -> List[Dict]:
+    """
+    Merge retrieved chunks of the same file whose character ranges overlap.
+
+    Chunk texts are slices of their document, so two overlapping chunks are
+    joined by appending only the part of the second one beyond the end of the
+    first. Merged spans keep the rank of their best chunk. Chunks without
+    character offsets (indexed before offsets were stored) are kept as they
+    are, except for exact duplicates.
+
+    Args:
+        documents (List[Dict]): Search results (content and metadata), best first
+
+    Returns:
+        List[Dict]: Spans with content and metadata (filename, page_start,
+            page_end, char_start, char_end), best first
+    """
+    spans_by_file: Dict[str, List[Dict]] = {}
+    loose = []
+    seen_texts = set()
+
+    for rank, doc in enumerate(documents):
+        metadata = doc.get("metadata") or {}
+        filename = metadata.get("filename", "Unknown")
+        start, end = metadata.get("char_start"), metadata.get("char_end")
+        if start is None or end is None:
+            if doc["content"] not in seen_texts:
+                seen_texts.add(doc["content"])
+                loose.append({"rank": rank, "content": doc["content"], "metadata": dict(metadata)})
+            continue
+        spans_by_file.setdefault(filename, []).append({
+            "rank": rank,
+            "content": doc["content"],
+            "metadata": {
+                "filename": filename,
+                "page_start": metadata.get("page_start"),
+                "page_end": metadata.get("page_end"),
+                "char_start": start,
+                "char_end": end
+            }
+        })
+
+    merged = []
+    for spans in spans_by_file.values():
+        spans.sort(key=lambda span: span["metadata"]["char_start"])
+        current = spans[0]
+        for span in spans[1:]:
+            current_meta, span_meta = current["metadata"], span["metadata"]
+            if span_meta["char_start"] > current_meta["char_end"]:
+                merged.append(current)
+                current = span
+                continue
+            # Overlapping or touching: append whatever extends past the current end
+            if span_meta["char_end"] > current_meta["char_end"]:
+                current["content"] += span["content"][current_meta["char_end"] - span_meta["char_start"]:]
+                current_meta["char_end"] = span_meta["char_end"]
+                current_meta["page_end"] = span_meta["page_end"]
+            current["rank"] = min(current["rank"], span["rank"])
+        merged.append(current)
+
+    merged.extend(loose)
+    merged.sort(key=lambda span: span["rank"])
+    return [{"content": span["content"], "metadata": span["metadata"]} for span in merged]
+
+
+def format_source(index: int, span: Dict) -> str:
+    """Format one context span as it appears in the prompt"""
+    source = span["metadata"].get("filename", "Unknown")
+    return f"Source {index} ({source}):\n{span['content']}\n"
+
+
+class PromptBuilder:
+    """
+    Builds chat messages that fit a prompt token budget.
+
+    Attributes:
+        model (str): Chat model the tokens are counted for
+        max_prompt_tokens (int): Token budget of the whole prompt
+        max_history_messages (int): Most recent history messages considered
+    """
+
+    def __init__(self, model: str = "gpt-3.5-turbo", max_prompt_tokens: int = 3000,
+                 max_history_messages: int = 20):
+        """
+        Initialize the builder and its tokenizer.
+
+        Args:
+            model (str): Chat model the tokens are counted for
+            max_prompt_tokens (int): Token budget of the whole prompt (the
+                completion's max_tokens comes on top of this)
+            max_history_messages (int): Most recent history messages considered
+        """
+        self.model = model
+        self.max_prompt_tokens = max_prompt_tokens
+        self.max_history_messages = max_history_messages
+        self._encoding = self._load_encoding(model)
+
+    @staticmethod
+    def _load_encoding(model: str):
+        """Return the tiktoken encoding of a model, or None if tiktoken is unavailable"""
+        try:
+            import tiktoken
+        except ImportError:
+            return None
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+        except Exception as e:
+            print(f"Warning: Could not load tokenizer for {model}, estimating tokens: {e}")
+            return None
+
+    def count(self, text: str) -> int:
+        """Number of tokens in a text"""
+        if self._encoding is not None:
+            return len(self._encoding.encode(text, disallowed_special=()))
+        return (len(text) + _CHARS_PER_TOKEN - 1) // _CHARS_PER_TOKEN
+
+    def count_messages(self, messages: List[Dict]) -> int:
+        """Number of prompt tokens used by a list of chat messages"""
+        return sum(self.count(message["content"]) + _TOKENS_PER_MESSAGE for message in messages)
+
+    def truncate(self, text: str, max_tokens: int) -> str:
+        """Cut a text down to at most ``max_tokens`` tokens"""
+        if max_tokens <= 0:
+            return ""
+        if self._encoding is not None:
+            tokens = self._encoding.encode(text, disallowed_special=())
+            return text if len(tokens) <= max_tokens else self._encoding.decode(tokens[:max_tokens])
+        return text[:max_tokens * _CHARS_PER_TOKEN]
+
+    def build(self, system_message: str, user_message: Callable[[str], str],
+              documents: List[Dict], history: List[Dict], summary: str = "") -> List[Dict]:
+        """
+        Assemble messages in the order System → Summary → History → Question,
+        spending the token budget on system prompt, context, history and
+        summary, in that order.
+
+        Args:
+            system_message (str): System instructions (always included)
+            user_message (Callable[[str], str]): Builds the final user message
+                from the formatted context (the question is always included)
+            documents (List[Dict]): Retrieved chunks, best first
+            history (List[Dict]): Conversation messages so far
+            summary (str): Summary of older conversation context
+
+        Returns:
+            List[Dict]: Messages for chat.completions.create
+        """
+        remaining = self.max_prompt_tokens
+        remaining -= self.count(system_message) + _TOKENS_PER_MESSAGE
+        remaining -= self.count(user_message("")) + _TOKENS_PER_MESSAGE
+
+        # Context: best spans first; the first span that does not fit is truncated
+        context_parts = []
+        for span in merge_overlapping_chunks(documents):
+            part = format_source(len(context_parts) + 1, span)
+            # Parts are joined with a newline
+            cost = self.count(part) + 1
+            if cost <= remaining:
+                context_parts.append(part)
+                remaining -= cost
+                continue
+            if remaining >= _MIN_SPAN_TOKENS:
+                header = format_source(len(context_parts) + 1, {"content": "", "metadata": span["metadata"]})
+                content = self.truncate(span["content"], remaining - self.count(header) - 2)
+                part = format_source(len(context_parts) + 1, {"content": content, "metadata": span["metadata"]})
+                context_parts.append(part)
+                remaining -= self.count(part) + 1
+            break
+
+        # History: newest exchanges first, whole user/assistant pairs only
+        recent = history[-self.max_history_messages:] if self.max_history_messages > 0 else []
+        if len(recent) % 2:
+            recent = recent[1:]
+        kept_history: List[Dict] = []
+        for i in range(len(recent) - 2, -1, -2):
+            pair = recent[i:i + 2]
+            cost = self.count_messages(pair)
+            if cost > remaining:
+                break
+            kept_history[:0] = pair
+            remaining -= cost
+
+        messages = [{"role": "system", "content": system_message}]
+
+        # Summary: only if it still fits
+        if summary:
+            summary_message = {"role": "system", "content": f"CONVERSATION SUMMARY: {summary}"}
+            if self.count_messages([summary_message]) <= remaining:
+                messages.append(summary_message)
+
+        messages.extend(kept_history)
+        messages.append({"role": "user", "content": user_message("\n".join(context_parts))})
+        return messages
+
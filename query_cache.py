@@ -0,0 +1,168 @@
+"""
+Query Embedding Cache Module for Aadhaar Chat Agent
+
+This module caches the embeddings of user queries so that frequently asked
+questions do not have to be encoded by the BGE model again. On CPU, encoding
+the query is a large share of retrieval latency, while a cache lookup is a
+dictionary access.
+
+Key Features:
+- LRU eviction with a configurable number of entries
+- Keys normalized for case and whitespace
+- Optional persistence to a NumPy ``.npz`` file so the cache survives restarts
+- Hit and miss counters for monitoring
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import atexit
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Optional
+import numpy as np
+
+
+def normalize_query(query: str) -> str:
+    """Normalize a query for cache lookups (lowercase, collapsed whitespace)"""
+    return " ".join(query.lower().split())
+
+
+class QueryEmbeddingCache:
+    """
+    Least-recently-used cache of query embeddings.
+
+    Embeddings are only valid for the model that produced them, so the model
+    name is stored with a persisted cache and a cache written by a different
+    model is ignored on load.
+
+    Attributes:
+        max_entries (int): Maximum number of cached embeddings
+        persist_path (Optional[str]): ``.npz`` file used to persist the cache
+        model_name (Optional[str]): Embedding model the cached vectors belong to
+        hits (int): Number of lookups served from the cache
+        misses (int): Number of lookups that required encoding
+    """
+
+    def __init__(self, max_entries: int = 1024, persist_path: Optional[str] = None,
+                 model_name: Optional[str] = None):
+        """
+        Initialize the cache and load persisted entries if available.
+
+        Args:
+            max_entries (int): Maximum number of cached embeddings
+            persist_path (Optional[str]): ``.npz`` file to load from and save to.
+                None keeps the cache in memory only.
+            model_name (Optional[str]): Embedding model the vectors belong to
+        """
+        self.max_entries = max(1, max_entries)
+        self.persist_path = persist_path
+        self.model_name = model_name
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._dirty = False
+
+        if persist_path:
+            self._load()
+            # Save whatever was learned during this process on exit
+            atexit.register(self.save)
+
+    def get(self, query: str) -> Optional[np.ndarray]:
+        """
+        Look up the embedding of a query.
+
+        Args:
+            query (str): Raw query text
+
+        Returns:
+            Optional[np.ndarray]: Cached embedding, or None on a miss
+        """
+        key = normalize_query(query)
+        with self._lock:
+            embedding = self._entries.get(key)
+            if embedding is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return embedding
+
+    def put(self, query: str, embedding: np.ndarray):
+        """
+        Store the embedding of a query, evicting the least recently used entry if full.
+
+        Args:
+            query (str): Raw query text
+            embedding (np.ndarray): Normalized query embedding
+        """
+        key = normalize_query(query)
+        with self._lock:
+            self._entries[key] = np.asarray(embedding, dtype=np.float32)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._dirty = True
+
+    def stats(self) -> Dict:
+        """
+        Report cache size and hit rate.
+
+        Returns:
+            Dict: Entry count, capacity, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "max_entries": self.max_entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }
+
+    def clear(self):
+        """Remove every cached embedding"""
+        with self._lock:
+            self._entries.clear()
+            self._dirty = True
+
+    def _load(self):
+        """Load persisted entries written by the same model"""
+        if not os.path.exists(self.persist_path):
+            return
+        try:
+            with np.load(self.persist_path) as data:
+                if str(data["model_name"]) != str(self.model_name):
+                    return
+                keys = data["keys"]
+                embeddings = data["embeddings"]
+        except Exception as e:
+            print(f"Warning: Could not load query embedding cache: {e}")
+            return
+
+        # Keys were saved least recently used first, preserving LRU order
+        for key, embedding in zip(keys[-self.max_entries:], embeddings[-self.max_entries:]):
+            self._entries[str(key)] = embedding
+
+    def save(self):
+        """Persist the cache to disk if it changed since it was loaded"""
+        if not self.persist_path or not self._dirty:
+            return
+        with self._lock:
+            keys = list(self._entries.keys())
+            embeddings = list(self._entries.values())
+            self._dirty = False
+
+        try:
+            tmp_path = self.persist_path + ".tmp.npz"
+            np.savez(
+                tmp_path,
+                model_name=np.array(str(self.model_name)),
+                keys=np.array(keys, dtype=str),
+                embeddings=np.stack(embeddings) if embeddings else np.zeros((0, 0), dtype=np.float32)
+            )
+            os.replace(tmp_path, self.persist_path)
+        except Exception as e:
+            print(f"Warning: Could not save query embedding cache: {e}")
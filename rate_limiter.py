@@ -0,0 +1,394 @@
+"""
+Rate Limiter Module for Aadhaar Chat Agent
+
+This module keeps the OpenAI calls of one process within the account's rate
+limits instead of turning every 429 into a failed answer. One limiter is
+shared by the answer and summary calls of every conversation (chat, server
+sessions, batch workers and the async API), so they draw from the same
+request and token budgets.
+
+Key Features:
+- Token buckets for requests per minute (RPM) and tokens per minute (TPM);
+  a call is charged its prompt tokens plus ``max_tokens``, as the API counts
+  it against the TPM limit
+- Retries of rate-limited, timed-out and 5xx calls with jittered exponential
+  backoff, honouring the Retry-After header when the API sends one
+- Adaptive concurrency: the number of calls in flight grows by one per window
+  of successful calls and shrinks on 429s or when latency exceeds a target
+- The same limiter serves threads (``call``) and asyncio (``call_async``)
+
+The OpenAI clients are created with ``max_retries=0`` so retries happen only
+here. Point ``OPENAI_BASE_URL`` at a local stub server to exercise the limiter
+without an API key.
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import asyncio
+import os
+import random
+import threading
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import openai
+
+from metrics import metrics
+
+
+def is_retryable(error: Exception) -> bool:
+    """Whether a failed OpenAI call is worth retrying"""
+    if isinstance(error, openai.RateLimitError):
+        # An exhausted quota does not recover by waiting
+        return getattr(error, "code", None) != "insufficient_quota"
+    return isinstance(error, (openai.APIConnectionError, openai.InternalServerError))
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Seconds the API asked us to wait (Retry-After header), if any"""
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+    value = response.headers.get("retry-after")
+    try:
+        return max(0.0, float(value)) if value is not None else None
+    except ValueError:
+        return None
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket refilled continuously at a per-minute rate.
+
+    Reservations may overdraw the bucket: the caller is told how long to wait
+    for the debt to be refilled, so large requests are never starved and
+    waiting callers are served in arrival order.
+
+    Attributes:
+        rate_per_minute (float): Refill rate
+        capacity (float): Largest burst (ten seconds of refill by default)
+    """
+
+    def __init__(self, rate_per_minute: float, capacity: Optional[float] = None):
+        """
+        Args:
+            rate_per_minute (float): Refill rate
+            capacity (Optional[float]): Largest burst; defaults to ten seconds of refill
+        """
+        self.rate_per_minute = rate_per_minute
+        self.capacity = capacity or max(1.0, rate_per_minute / 6)
+        self._available = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """
+        Take ``amount`` from the bucket.
+
+        Args:
+            amount (float): Requests or tokens to take
+
+        Returns:
+            float: Seconds to wait before the reservation is covered
+        """
+        with self._lock:
+            self._refill()
+            self._available -= amount
+            if self._available >= 0:
+                return 0.0
+            return -self._available * 60.0 / self.rate_per_minute
+
+    def _refill(self):
+        """Add the tokens accrued since the last update"""
+        now = time.monotonic()
+        self._available = min(
+            self.capacity,
+            self._available + (now - self._updated) * self.rate_per_minute / 60.0
+        )
+        self._updated = now
+
+
+class AdaptiveConcurrency:
+    """
+    Limit on calls in flight that adapts to rate limiting and latency (AIMD).
+
+    Every successful call within the latency target raises the limit by
+    1/limit while the limit is in use, so a full window of successes adds one
+    slot. A 429, or a call
+    slower than the target, cuts the limit (halved for 429s, by 10% for
+    latency), at most once per ``cooldown`` seconds so a burst of failures
+    from one window counts once.
+
+    Attributes:
+        limit (float): Current limit (the integer part is enforced)
+        minimum (int): Lowest limit
+        maximum (int): Highest limit
+        latency_target (Optional[float]): Seconds above which a call counts as congestion
+        cooldown (float): Minimum seconds between two decreases
+    """
+
+    def __init__(self, initial: int = 8, minimum: int = 1, maximum: int = 64,
+                 latency_target: Optional[float] = 30.0, cooldown: float = 2.0):
+        """
+        Args:
+            initial (int): Starting limit
+            minimum (int): Lowest limit
+            maximum (int): Highest limit
+            latency_target (Optional[float]): Seconds above which a call counts
+                as congestion; None to react to 429s only
+            cooldown (float): Minimum seconds between two decreases
+        """
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.latency_target = latency_target
+        self.cooldown = cooldown
+        self.in_flight = 0
+        self._last_decrease = 0.0
+        self._condition = threading.Condition()
+        self._async_waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    def acquire(self):
+        """Block until a slot is free and take it"""
+        with self._condition:
+            while self.in_flight >= int(self.limit):
+                self._condition.wait()
+            self.in_flight += 1
+
+    async def acquire_async(self):
+        """Wait (without blocking the event loop) until a slot is free and take it"""
+        loop = asyncio.get_running_loop()
+        while True:
+            with self._condition:
+                if self.in_flight < int(self.limit):
+                    self.in_flight += 1
+                    return
+                waiter = loop.create_future()
+                self._async_waiters.append((loop, waiter))
+            await waiter
+
+    def release(self):
+        """Give a slot back"""
+        with self._condition:
+            self.in_flight -= 1
+            self._wake()
+
+    def on_success(self, latency: float):
+        """Adjust the limit after a successful call (made while still holding its slot)"""
+        if self.latency_target is not None and latency > self.latency_target:
+            self._decrease(0.9)
+            return
+        with self._condition:
+            # Grow only while the limit is what holds calls back, and not right
+            # after a cut (calls started before it are still completing)
+            at_limit = self.in_flight >= int(self.limit)
+            if at_limit and time.monotonic() - self._last_decrease >= self.cooldown:
+                self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+                self._wake()
+
+    def on_rate_limited(self):
+        """Adjust the limit after a 429"""
+        self._decrease(0.5)
+
+    def _decrease(self, factor: float):
+        """Multiply the limit by ``factor``, at most once per cooldown"""
+        with self._condition:
+            now = time.monotonic()
+            if now - self._last_decrease < self.cooldown:
+                return
+            self._last_decrease = now
+            self.limit = max(float(self.minimum), self.limit * factor)
+
+    def _wake(self):
+        """Let every waiter re-check for a free slot (caller holds the condition)"""
+        self._condition.notify_all()
+        waiters, self._async_waiters = self._async_waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_resolve, waiter)
+            except RuntimeError:
+                # The waiter's event loop has been closed
+                pass
+
+
+def _resolve(waiter: asyncio.Future):
+    """Wake an async waiter unless it was cancelled meanwhile"""
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class RateLimiter:
+    """
+    RPM/TPM budgets, retries with backoff and adaptive concurrency for OpenAI calls.
+
+    Attributes:
+        requests (Optional[TokenBucket]): Requests-per-minute bucket (None = unlimited)
+        tokens (Optional[TokenBucket]): Tokens-per-minute bucket (None = unlimited)
+        concurrency (AdaptiveConcurrency): Limit on calls in flight
+        max_retries (int): Retries after the first attempt
+        base_delay (float): Backoff ceiling of the first retry in seconds
+        max_delay (float): Largest backoff in seconds
+    """
+
+    def __init__(self, requests_per_minute: Optional[float] = 3500,
+                 tokens_per_minute: Optional[float] = 90000, max_retries: int = 5,
+                 base_delay: float = 0.5, max_delay: float = 30.0,
+                 concurrency: Optional[AdaptiveConcurrency] = None):
+        """
+        Args:
+            requests_per_minute (Optional[float]): RPM limit; None or 0 for no limit
+            tokens_per_minute (Optional[float]): TPM limit; None or 0 for no limit
+            max_retries (int): Retries after the first attempt
+            base_delay (float): Backoff ceiling of the first retry in seconds
+            max_delay (float): Largest backoff in seconds
+            concurrency (Optional[AdaptiveConcurrency]): Concurrency limit; a
+                default AdaptiveConcurrency if not given
+        """
+        self.requests = TokenBucket(requests_per_minute) if requests_per_minute else None
+        self.tokens = TokenBucket(tokens_per_minute) if tokens_per_minute else None
+        self.concurrency = concurrency or AdaptiveConcurrency()
+        self.max_retries = max(0, max_retries)
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self._counters = {"calls": 0, "retries": 0, "rate_limited": 0, "failures": 0, "throttled_seconds": 0.0}
+        self._counters_lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "RateLimiter":
+        """
+        Build a limiter from OPENAI_RPM, OPENAI_TPM, OPENAI_MAX_CONCURRENCY and
+        OPENAI_MAX_RETRIES (each optional; 0 disables the RPM/TPM bucket).
+        """
+        maximum = int(os.getenv("OPENAI_MAX_CONCURRENCY", "64"))
+        return cls(
+            requests_per_minute=float(os.getenv("OPENAI_RPM", "3500")),
+            tokens_per_minute=float(os.getenv("OPENAI_TPM", "90000")),
+            max_retries=int(os.getenv("OPENAI_MAX_RETRIES", "5")),
+            concurrency=AdaptiveConcurrency(initial=min(8, maximum), maximum=maximum)
+        )
+
+    def call(self, request: Callable[[], Any], estimated_tokens: int = 0) -> Any:
+        """
+        Run an OpenAI call within the limits, retrying retryable failures.
+
+        Args:
+            request (Callable[[], Any]): Makes the call and returns its response
+            estimated_tokens (int): Prompt plus maximum completion tokens
+
+        Returns:
+            Any: The response
+
+        Raises:
+            Exception: The last error, once it is not retryable or retries are exhausted
+        """
+        for attempt in range(self.max_retries + 1):
+            self._sleep(self._reserve(estimated_tokens))
+            self.concurrency.acquire()
+            start = time.monotonic()
+            try:
+                response = request()
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.on_success(time.monotonic() - start)
+                return response
+            finally:
+                # Also on KeyboardInterrupt and the like, or the slot leaks
+                self.concurrency.release()
+            time.sleep(delay)
+
+    async def call_async(self, request: Callable[[], Awaitable[Any]], estimated_tokens: int = 0) -> Any:
+        """
+        Asynchronous ``call``: ``request`` returns an awaitable of the response.
+        """
+        for attempt in range(self.max_retries + 1):
+            delay = self._reserve(estimated_tokens)
+            if delay > 0:
+                await asyncio.sleep(delay)
+            await self.concurrency.acquire_async()
+            start = time.monotonic()
+            try:
+                response = await request()
+            except Exception as e:
+                delay = self._after_failure(e, attempt)
+                if delay is None:
+                    raise
+            else:
+                self.concurrency.on_success(time.monotonic() - start)
+                return response
+            finally:
+                # Cancellation raises CancelledError (not an Exception); the
+                # slot must still be given back or in_flight leaks
+                self.concurrency.release()
+            await asyncio.sleep(delay)
+
+    def stats(self) -> Dict:
+        """
+        Report call counters and the current concurrency limit.
+
+        Returns:
+            Dict: Calls, retries, 429s, failures, seconds spent waiting for the
+                buckets, concurrency limit and calls in flight
+        """
+        with self._counters_lock:
+            stats = dict(self._counters)
+        stats["concurrency_limit"] = int(self.concurrency.limit)
+        stats["in_flight"] = self.concurrency.in_flight
+        return stats
+
+    def _reserve(self, estimated_tokens: int) -> float:
+        """Take one request and the estimated tokens; return the seconds to wait"""
+        delay = 0.0
+        if self.requests is not None:
+            delay = self.requests.reserve(1)
+        if self.tokens is not None and estimated_tokens:
+            delay = max(delay, self.tokens.reserve(estimated_tokens))
+        with self._counters_lock:
+            self._counters["calls"] += 1
+            self._counters["throttled_seconds"] += delay
+        if delay > 0:
+            metrics.observe("rate_limit_wait", delay)
+        return delay
+
+    def _after_failure(self, error: Exception, attempt: int) -> Optional[float]:
+        """Return the backoff before the next attempt, or None to give up"""
+        rate_limited = isinstance(error, openai.RateLimitError)
+        if rate_limited:
+            self.concurrency.on_rate_limited()
+        with self._counters_lock:
+            self._counters["rate_limited"] += int(rate_limited)
+            if not is_retryable(error) or attempt >= self.max_retries:
+                self._counters["failures"] += 1
+                return None
+            self._counters["retries"] += 1
+        metrics.increment("openai_retries")
+
+        # Full jitter keeps retries from many callers from arriving together
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        requested = retry_after(error)
+        if requested is not None:
+            delay = min(self.max_delay, requested) + random.uniform(0, self.base_delay)
+        return delay
+
+    @staticmethod
+    def _sleep(seconds: float):
+        """Wait for the buckets to refill"""
+        if seconds > 0:
+            time.sleep(seconds)
+
+
+# Limiter shared by every OpenAI call in the process
+_default_limiter: Optional[RateLimiter] = None
+_default_limiter_lock = threading.Lock()
+
+
+def default_rate_limiter() -> RateLimiter:
+    """Shared RateLimiter configured from the environment (see RateLimiter.from_env)"""
+    global _default_limiter
+    with _default_limiter_lock:
+        if _default_limiter is None:
+            _default_limiter = RateLimiter.from_env()
+    return _default_limiter
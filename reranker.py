@@ -0,0 +1,169 @@
+"""
+Reranker Module for Aadhaar Chat Agent
+
+This module adds an optional second retrieval stage. The vector (or hybrid)
+search returns a wider candidate set, a small cross-encoder reads each
+question together with each candidate chunk, and only the best chunks that
+clear a relevance cutoff are passed to the LLM. Fewer, better chunks mean
+smaller prompts and faster completions.
+
+Key Features:
+- Small CPU cross-encoder (MiniLM trained on MS MARCO, about 22M parameters)
+- One batched forward pass for all (question, chunk) pairs of a call,
+  including every question of a batch run
+- LRU cache of pair scores, so repeated questions and chunks are not rescored
+- Score cutoff with a minimum number of chunks kept per question
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from query_cache import normalize_query
+
+DEFAULT_RERANK_MODEL = "cross-encoder/ms-marco-MiniLM-L-6-v2"
+
+
+class CrossEncoderReranker:
+    """
+    Reranks retrieved chunks with a cross-encoder and drops irrelevant ones.
+
+    Scores are relevance probabilities in [0, 1] (sentence-transformers
+    applies a sigmoid to single-label cross-encoders).
+
+    Attributes:
+        model_name (str): Hugging Face cross-encoder model
+        min_score (float): Chunks scoring below this are dropped
+        min_results (int): Chunks always kept per question, whatever their score
+        batch_size (int): Pairs per forward pass
+        max_cache_entries (int): Maximum number of cached pair scores
+        hits (int): Pair scores served from the cache
+        misses (int): Pair scores computed by the model
+        load_seconds (Optional[float]): Time taken to load the model
+    """
+
+    def __init__(self, model_name: str = DEFAULT_RERANK_MODEL, min_score: float = 0.1,
+                 min_results: int = 1, batch_size: int = 32, max_cache_entries: int = 8192):
+        """
+        Configure the reranker; the model is loaded on first use.
+
+        Args:
+            model_name (str): Hugging Face cross-encoder model
+            min_score (float): Relevance cutoff in [0, 1]
+            min_results (int): Chunks always kept per question
+            batch_size (int): Pairs per forward pass
+            max_cache_entries (int): Maximum number of cached pair scores
+        """
+        self.model_name = model_name
+        self.min_score = min_score
+        self.min_results = max(0, min_results)
+        self.batch_size = batch_size
+        self.max_cache_entries = max(1, max_cache_entries)
+        self.hits = 0
+        self.misses = 0
+        self.load_seconds: Optional[float] = None
+        self._model = None
+        self._cache: "OrderedDict[Tuple[str, str, int], float]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        """The cross-encoder, loaded on first access"""
+        with self._lock:
+            if self._model is None:
+                # Imported here so that startup does not pay for it when reranking is off
+                from sentence_transformers import CrossEncoder
+
+                start_time = time.perf_counter()
+                self._model = CrossEncoder(self.model_name, device="cpu")
+                self.load_seconds = time.perf_counter() - start_time
+                print(f"✅ Loaded reranker {self.model_name} in {self.load_seconds:.2f}s")
+            return self._model
+
+    def rerank(self, queries: List[str], candidates: List[List[Dict]], n_results: int) -> List[List[Dict]]:
+        """
+        Rerank the candidates of each query and keep the best relevant ones.
+
+        Args:
+            queries (List[str]): User queries
+            candidates (List[List[Dict]]): Search results of each query
+            n_results (int): Maximum number of chunks kept per query
+
+        Returns:
+            List[List[Dict]]: Kept chunks of each query, best first, each with
+                an added "rerank_score"
+        """
+        keys = [
+            [self._key(query, doc) for doc in docs]
+            for query, docs in zip(queries, candidates)
+        ]
+
+        # Score every uncached pair of every query in one batched predict
+        with self._lock:
+            scores = {}
+            for query_keys in keys:
+                for key in query_keys:
+                    score = self._cache.get(key)
+                    if score is not None:
+                        self._cache.move_to_end(key)
+                        scores[key] = score
+            self.hits += sum(key in scores for query_keys in keys for key in query_keys)
+
+        pending: Dict[Tuple[str, str, int], Tuple[str, str]] = {}
+        for query, docs, query_keys in zip(queries, candidates, keys):
+            for doc, key in zip(docs, query_keys):
+                if key not in scores:
+                    pending[key] = (query, doc["content"])
+        if pending:
+            predicted = self.model.predict(
+                list(pending.values()),
+                batch_size=self.batch_size,
+                show_progress_bar=False,
+                convert_to_numpy=True
+            )
+            with self._lock:
+                self.misses += len(pending)
+                for key, score in zip(pending, predicted):
+                    scores[key] = float(score)
+                    self._cache[key] = float(score)
+                while len(self._cache) > self.max_cache_entries:
+                    self._cache.popitem(last=False)
+
+        reranked = []
+        for docs, query_keys in zip(candidates, keys):
+            ranked = sorted(
+                (dict(doc, rerank_score=scores[key]) for doc, key in zip(docs, query_keys)),
+                key=lambda doc: doc["rerank_score"],
+                reverse=True
+            )[:n_results]
+            reranked.append([
+                doc for i, doc in enumerate(ranked)
+                if i < self.min_results or doc["rerank_score"] >= self.min_score
+            ])
+        return reranked
+
+    def stats(self) -> Dict:
+        """
+        Report cache size and hit rate.
+
+        Returns:
+            Dict: Model, cutoff, cached pairs, hits, misses and hit rate
+        """
+        lookups = self.hits + self.misses
+        return {
+            "model": self.model_name,
+            "min_score": self.min_score,
+            "entries": len(self._cache),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }
+
+    @staticmethod
+    def _key(query: str, doc: Dict) -> Tuple[str, str, int]:
+        """Cache key of a (query, chunk) pair; the content hash catches re-indexed chunks"""
+        return normalize_query(query), doc["id"], hash(doc["content"])
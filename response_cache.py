@@ -0,0 +1,296 @@
+"""
+Response Cache Module for Aadhaar Chat Agent
+
+This module records OpenAI completions on disk, keyed by a hash of the exact
+request: the model, the full ``messages`` list (system prompt, document
+context, history and question) and the sampling parameters. Re-running the
+same question set then only sends the prompts that actually changed.
+
+Modes (``OPENAI_RESPONSE_CACHE``):
+- off: every completion goes to the API (default)
+- read-through: recorded responses are reused; other requests go to the API
+  and their responses are recorded
+- replay: only recorded responses are served and any other request fails
+  without contacting the API, so runs are offline and repeatable (no API key
+  is needed)
+
+Key Features:
+- SHA-256 keys over a canonical JSON form of the request; streaming options
+  are left out, so streamed and non-streamed calls share entries
+- Hits are replayed as a stream when one was requested
+- Hits skip the rate limiter and cost no tokens
+- Size cap with least-recently-used eviction (one JSON file per response)
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from types import SimpleNamespace
+from typing import Any, Awaitable, Callable, Dict, Iterator, Optional
+
+from disk_cache import DiskCache
+from metrics import metrics
+
+OFF, READ_THROUGH, REPLAY = "off", "read-through", "replay"
+RESPONSE_CACHE_MODES = (OFF, READ_THROUGH, REPLAY)
+
+# Environment variables configuring the shared cache
+RESPONSE_CACHE_ENV = "OPENAI_RESPONSE_CACHE"
+RESPONSE_CACHE_DIR_ENV = "OPENAI_RESPONSE_CACHE_DIR"
+RESPONSE_CACHE_MAX_MB_ENV = "OPENAI_RESPONSE_CACHE_MAX_MB"
+
+DEFAULT_RESPONSE_CACHE_DIRECTORY = "./response_cache"
+
+# Bump to invalidate every recorded response (e.g. if the key format changes)
+_KEY_VERSION = 1
+
+# Request options that change how a completion is delivered, not what it says
+_DELIVERY_PARAMS = ("stream", "stream_options", "extra_body", "extra_headers", "timeout")
+
+
+class ReplayMissError(Exception):
+    """Raised in replay mode for a request that was never recorded"""
+
+
+def request_key(params: Dict) -> str:
+    """
+    Cache key of a chat completion request.
+
+    Args:
+        params (Dict): Keyword arguments of ``chat.completions.create``
+
+    Returns:
+        str: SHA-256 hex digest of the model, messages and sampling parameters
+    """
+    request = {name: value for name, value in params.items() if name not in _DELIVERY_PARAMS}
+    payload = json.dumps({"version": _KEY_VERSION, "request": request},
+                         sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _completion(entry: Dict) -> SimpleNamespace:
+    """A recorded response shaped like the OpenAI completion object (no tokens were used)"""
+    return SimpleNamespace(
+        model=entry["model"],
+        choices=[SimpleNamespace(
+            message=SimpleNamespace(role="assistant", content=entry["content"]),
+            finish_reason=entry.get("finish_reason")
+        )],
+        usage=None
+    )
+
+
+def _chunks(entry: Dict) -> Iterator[SimpleNamespace]:
+    """A recorded response as a stream of one chunk"""
+    yield SimpleNamespace(
+        model=entry["model"],
+        choices=[SimpleNamespace(
+            delta=SimpleNamespace(role="assistant", content=entry["content"]),
+            finish_reason=entry.get("finish_reason")
+        )],
+        usage=None
+    )
+
+
+def usage_dict(response) -> Optional[Dict]:
+    """Token usage of a completion (or stream chunk) as a plain dict, or None if not reported"""
+    usage = getattr(response, "usage", None)
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": usage.prompt_tokens,
+        "completion_tokens": usage.completion_tokens,
+        "total_tokens": usage.total_tokens
+    }
+
+
+class ResponseCache:
+    """
+    On-disk cache of chat completions keyed by the exact request.
+
+    Attributes:
+        mode (str): "off", "read-through" or "replay"
+        directory (str): Directory holding one JSON file per response
+        max_bytes (int): Size cap before least recently used responses are evicted
+        hits (int): Requests answered from the cache
+        misses (int): Requests not found in the cache
+        recorded (int): Responses written to the cache
+    """
+
+    def __init__(self, mode: str = OFF, directory: str = DEFAULT_RESPONSE_CACHE_DIRECTORY,
+                 max_bytes: int = 256 * 1024 * 1024):
+        """
+        Args:
+            mode (str): "off", "read-through" or "replay"
+            directory (str): Directory holding the recorded responses
+            max_bytes (int): Size cap in bytes
+
+        Raises:
+            ValueError: If the mode is unknown
+        """
+        if mode not in RESPONSE_CACHE_MODES:
+            raise ValueError(f"Unknown response cache mode {mode!r}, expected one of {', '.join(RESPONSE_CACHE_MODES)}")
+        self.mode = mode
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.recorded = 0
+        # Created on first use, so the "off" mode never touches the disk
+        self._store: Optional[DiskCache] = None
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> "ResponseCache":
+        """
+        Build a cache from OPENAI_RESPONSE_CACHE (mode), OPENAI_RESPONSE_CACHE_DIR
+        and OPENAI_RESPONSE_CACHE_MAX_MB (each optional).
+        """
+        return cls(
+            mode=os.getenv(RESPONSE_CACHE_ENV, OFF).strip().lower() or OFF,
+            directory=os.getenv(RESPONSE_CACHE_DIR_ENV, DEFAULT_RESPONSE_CACHE_DIRECTORY),
+            max_bytes=int(float(os.getenv(RESPONSE_CACHE_MAX_MB_ENV, "256")) * 1024 * 1024)
+        )
+
+    @property
+    def store(self) -> DiskCache:
+        """The directory of recorded responses, created on first access"""
+        with self._lock:
+            if self._store is None:
+                self._store = DiskCache(self.directory, max_bytes=self.max_bytes)
+            return self._store
+
+    def complete(self, params: Dict, request: Callable[[], Any]) -> Any:
+        """
+        Serve a completion from the cache, or request and record it.
+
+        Args:
+            params (Dict): Keyword arguments of ``chat.completions.create``
+            request (Callable[[], Any]): Sends the request (with rate limiting
+                and retries) and returns the response or stream
+
+        Returns:
+            Any: Completion, or an iterator of chunks when ``params`` has stream=True
+
+        Raises:
+            ReplayMissError: In replay mode, if the request was never recorded
+        """
+        if self.mode == OFF:
+            return request()
+        key = request_key(params)
+        entry = self._lookup(key)
+        if entry is not None:
+            return _chunks(entry) if params.get("stream") else _completion(entry)
+
+        response = request()
+        if params.get("stream"):
+            return self._record_stream(key, params, response)
+        choice = response.choices[0]
+        self._record(key, params, choice.message.content, choice.finish_reason, usage_dict(response))
+        return response
+
+    async def complete_async(self, params: Dict, request: Callable[[], Awaitable[Any]]) -> Any:
+        """
+        Asynchronous ``complete`` for non-streaming requests: ``request``
+        returns an awaitable of the response.
+        """
+        if self.mode == OFF:
+            return await request()
+        key = request_key(params)
+        entry = self._lookup(key)
+        if entry is not None:
+            return _completion(entry)
+
+        response = await request()
+        choice = response.choices[0]
+        self._record(key, params, choice.message.content, choice.finish_reason, usage_dict(response))
+        return response
+
+    def stats(self) -> Optional[Dict]:
+        """
+        Report the mode, size and hit rate of the cache.
+
+        Returns:
+            Optional[Dict]: Mode, directory, entries, total and maximum bytes,
+                hits, misses, recorded responses and hit rate; None when off
+        """
+        if self.mode == OFF:
+            return None
+        store_stats = self.store.stats()
+        lookups = self.hits + self.misses
+        return {
+            "mode": self.mode,
+            "directory": store_stats["directory"],
+            "entries": store_stats["entries"],
+            "total_bytes": store_stats["total_bytes"],
+            "max_bytes": store_stats["max_bytes"],
+            "hits": self.hits,
+            "misses": self.misses,
+            "recorded": self.recorded,
+            "hit_rate": (self.hits / lookups) if lookups else 0.0
+        }
+
+    def _lookup(self, key: str) -> Optional[Dict]:
+        """Recorded response of a request; raises ReplayMissError when replaying a new request"""
+        entry = self.store.get(key)
+        with self._lock:
+            if entry is None:
+                self.misses += 1
+            else:
+                self.hits += 1
+        if entry is None and self.mode == REPLAY:
+            raise ReplayMissError(
+                f"No recorded response for this request (response cache in replay mode, key {key[:12]})"
+            )
+        return entry
+
+    def _record_stream(self, key: str, params: Dict, stream) -> Iterator:
+        """Pass a stream through and record it once it has been read to the end"""
+        parts = []
+        finish_reason = None
+        usage = None
+        for chunk in stream:
+            if getattr(chunk, "usage", None) is not None:
+                usage = usage_dict(chunk)
+            if chunk.choices:
+                choice = chunk.choices[0]
+                if choice.delta.content:
+                    parts.append(choice.delta.content)
+                finish_reason = choice.finish_reason or finish_reason
+            yield chunk
+        self._record(key, params, "".join(parts), finish_reason, usage)
+
+    def _record(self, key: str, params: Dict, content: Optional[str],
+                finish_reason: Optional[str], usage: Optional[Dict]):
+        """Write a response to the cache"""
+        if not content:
+            return
+        self.store.put(key, {
+            "model": params.get("model"),
+            "content": content,
+            "finish_reason": finish_reason,
+            "usage": usage,
+            "recorded_at": time.time()
+        })
+        with self._lock:
+            self.recorded += 1
+
+
+# Cache shared by every OpenAI call in the process
+_default_cache: Optional[ResponseCache] = None
+_default_cache_lock = threading.Lock()
+
+
+def default_response_cache() -> ResponseCache:
+    """Shared ResponseCache configured from the environment (see ResponseCache.from_env)"""
+    global _default_cache
+    with _default_cache_lock:
+        if _default_cache is None:
+            _default_cache = ResponseCache.from_env()
+            metrics.register_cache("response", _default_cache.stats)
+    return _default_cache
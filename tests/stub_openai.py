@@ -0,0 +1,101 @@
+"""
+Stub OpenAI Server for the Aadhaar Chat Agent tests
+
+A minimal OpenAI-compatible chat completions endpoint that runs in a thread,
+so the rate limiter and the OpenAI clients can be exercised without an API key
+or network access (point ``base_url`` at ``server.base_url``).
+
+Key Features:
+- Answers ``POST /v1/chat/completions`` with a fixed completion
+- Returns HTTP 429 (with a Retry-After header) for the first
+  ``rate_limited_requests`` requests, then succeeds
+- Counts the requests it has seen
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Text of every successful completion
+STUB_ANSWER = "Stub answer"
+
+
+class StubOpenAIServer:
+    """
+    OpenAI-compatible stub serving chat completions on a free local port.
+
+    Attributes:
+        rate_limited_requests (int): Requests answered with 429 before the first success
+        retry_after (str): Value of the Retry-After header sent with 429s
+        requests (int): Requests received so far
+        base_url (str): URL to pass to the OpenAI client
+    """
+
+    def __init__(self, rate_limited_requests: int = 0, retry_after: str = "0"):
+        """
+        Args:
+            rate_limited_requests (int): Requests answered with 429 before the first success
+            retry_after (str): Value of the Retry-After header sent with 429s
+        """
+        self.rate_limited_requests = rate_limited_requests
+        self.retry_after = retry_after
+        self.requests = 0
+        self._lock = threading.Lock()
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), self._handler())
+        self.base_url = f"http://127.0.0.1:{self._server.server_address[1]}/v1"
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "StubOpenAIServer":
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+    def _next_status(self) -> int:
+        """Count a request and return the status to answer it with"""
+        with self._lock:
+            self.requests += 1
+            return 429 if self.requests <= self.rate_limited_requests else 200
+
+    def _handler(self):
+        """Request handler class bound to this server"""
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                if stub._next_status() == 429:
+                    payload = {"error": {"message": "Rate limit reached", "type": "requests",
+                                         "code": "rate_limit_exceeded"}}
+                    self._send(429, payload, {"Retry-After": stub.retry_after})
+                    return
+                self._send(200, {
+                    "id": "chatcmpl-stub",
+                    "object": "chat.completion",
+                    "created": 0,
+                    "model": body.get("model", "stub"),
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": STUB_ANSWER}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 2, "total_tokens": 12}
+                })
+
+            def _send(self, status, payload, headers=None):
+                data = json.dumps(payload).encode()
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                # Keep test output quiet
+                pass
+
+        return Handler
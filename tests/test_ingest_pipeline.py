@@ -0,0 +1,105 @@
+"""
+Tests for the ingest pipeline's handling of files whose extraction fails.
+
+Run from the repository root with ``python -m unittest``.
+"""
+
+import os
+import random
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Dict, List
+
+from benchmark import synthetic_pages, write_pdf
+from disk_cache import file_sha256
+from index_manifest import IndexManifest
+from ingest_pipeline import IngestPipeline
+from pdf_processor import PDFProcessor
+
+
+class InMemoryVectorDatabase:
+    """The part of VectorDatabase the pipeline uses, with one chunk per page"""
+
+    embedding_model = None
+
+    def __init__(self, index_directory: str):
+        self.index_directory = index_directory
+        self.chunks: Dict[str, Dict] = {}
+
+    def chunk_document(self, doc: Dict) -> List[Dict]:
+        return [
+            {"id": f"{doc['filename']}_chunk_{i}", "text": page,
+             "metadata": {"filename": doc["filename"], "chunk_index": i}}
+            for i, page in enumerate(doc["pages"])
+        ]
+
+    def upsert_chunks(self, chunks: List[Dict], embeddings=None):
+        for chunk in chunks:
+            self.chunks[chunk["id"]] = chunk
+
+    def delete_stale_chunks(self, filename: str, keep_ids: List[str]):
+        keep = set(keep_ids)
+        for chunk_id in [chunk_id for chunk_id, chunk in self.chunks.items()
+                         if chunk["metadata"]["filename"] == filename and chunk_id not in keep]:
+            del self.chunks[chunk_id]
+
+    def chunk_ids(self, filename: str) -> List[str]:
+        return sorted(chunk_id for chunk_id, chunk in self.chunks.items()
+                      if chunk["metadata"]["filename"] == filename)
+
+
+class FailedExtractionTest(unittest.TestCase):
+    """A file that cannot be extracted keeps its chunks and manifest entry"""
+
+    def setUp(self):
+        self._directory = tempfile.TemporaryDirectory()
+        self.root = Path(self._directory.name)
+        self.docs = self.root / "docs"
+        self.docs.mkdir()
+        for index in range(2):
+            write_pdf(self.docs / f"f{index}.pdf", synthetic_pages(random.Random(index), 3))
+        self.vector_db = InMemoryVectorDatabase(str(self.root))
+        self.manifest = IndexManifest(str(self.root / "index_manifest.json"), signature="test")
+
+    def tearDown(self):
+        self._directory.cleanup()
+
+    def _sync(self, processor: PDFProcessor) -> Dict:
+        """Index the added and changed files, as AadhaarChatAgent._sync_index does"""
+        changes = self.manifest.diff(sorted(self.docs.glob("*.pdf")))
+        pipeline = IngestPipeline(processor, self.vector_db, self.manifest)
+        stats = pipeline.run(changes["changed"] + changes["added"], changes["hashes"])
+        self.manifest.save()
+        return stats
+
+    def test_failed_file_is_left_as_it_was(self):
+        processor = PDFProcessor(str(self.docs))
+        self._sync(processor)
+        old_entry = dict(self.manifest.entries["f1.pdf"])
+        old_chunks = self.vector_db.chunk_ids("f1.pdf")
+        self.assertEqual(len(old_chunks), 3)
+
+        # Change f1.pdf, then make its extraction fail
+        write_pdf(self.docs / "f1.pdf", synthetic_pages(random.Random(7), 2))
+        parse_pages = processor._parse_pages
+        processor._parse_pages = lambda path: None if path.endswith("f1.pdf") else parse_pages(path)
+        stats = self._sync(processor)
+
+        self.assertEqual(stats["failed"], 1)
+        self.assertEqual(self.manifest.entries["f1.pdf"], old_entry)
+        self.assertEqual(self.vector_db.chunk_ids("f1.pdf"), old_chunks)
+        self.assertEqual(len(self.vector_db.chunk_ids("f0.pdf")), 3)
+
+        # The next sync retries the file and indexes its new version
+        processor._parse_pages = parse_pages
+        stats = self._sync(processor)
+        self.assertEqual(stats["failed"], 0)
+        self.assertEqual(stats["files"], 1)
+        self.assertEqual(self.manifest.entries["f1.pdf"]["sha256"], file_sha256(str(self.docs / "f1.pdf")))
+        self.assertEqual(len(self.vector_db.chunk_ids("f1.pdf")), 2)
+        self.assertFalse(os.path.exists(self.root / "ingest_checkpoint.json"))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Tests for the rate limiter's 429 handling and concurrency slots.
+
+Run from the repository root with ``python -m unittest``.
+"""
+
+import asyncio
+import unittest
+
+import openai
+
+from rate_limiter import RateLimiter
+from tests.stub_openai import STUB_ANSWER, StubOpenAIServer
+
+MESSAGES = [{"role": "user", "content": "What is Form 7?"}]
+
+
+def make_limiter(max_retries: int = 3) -> RateLimiter:
+    """Limiter without RPM/TPM budgets and with millisecond backoff"""
+    return RateLimiter(requests_per_minute=None, tokens_per_minute=None,
+                       max_retries=max_retries, base_delay=0.001, max_delay=0.01)
+
+
+class RateLimitedCallTest(unittest.TestCase):
+    """429s from the API are retried, and every slot is given back"""
+
+    def test_retries_429_until_success(self):
+        limiter = make_limiter()
+        with StubOpenAIServer(rate_limited_requests=2) as server:
+            client = openai.OpenAI(api_key="sk-test", base_url=server.base_url, max_retries=0)
+            response = limiter.call(
+                lambda: client.chat.completions.create(model="stub", messages=MESSAGES)
+            )
+        self.assertEqual(response.choices[0].message.content, STUB_ANSWER)
+        self.assertEqual(server.requests, 3)
+        stats = limiter.stats()
+        self.assertEqual(stats["rate_limited"], 2)
+        self.assertEqual(stats["retries"], 2)
+        self.assertEqual(stats["failures"], 0)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_gives_up_after_max_retries(self):
+        limiter = make_limiter(max_retries=1)
+        with StubOpenAIServer(rate_limited_requests=5) as server:
+            client = openai.OpenAI(api_key="sk-test", base_url=server.base_url, max_retries=0)
+            with self.assertRaises(openai.RateLimitError):
+                limiter.call(lambda: client.chat.completions.create(model="stub", messages=MESSAGES))
+        self.assertEqual(server.requests, 2)
+        stats = limiter.stats()
+        self.assertEqual(stats["failures"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+        # A 429 halves the concurrency limit
+        self.assertLess(limiter.concurrency.limit, 8)
+
+    def test_async_retries_429_until_success(self):
+        limiter = make_limiter()
+
+        async def run(base_url):
+            client = openai.AsyncOpenAI(api_key="sk-test", base_url=base_url, max_retries=0)
+            try:
+                return await limiter.call_async(
+                    lambda: client.chat.completions.create(model="stub", messages=MESSAGES)
+                )
+            finally:
+                await client.close()
+
+        with StubOpenAIServer(rate_limited_requests=2) as server:
+            response = asyncio.run(run(server.base_url))
+        self.assertEqual(response.choices[0].message.content, STUB_ANSWER)
+        self.assertEqual(limiter.stats()["rate_limited"], 2)
+        self.assertEqual(limiter.stats()["in_flight"], 0)
+
+
+class ReleaseOnCancellationTest(unittest.TestCase):
+    """Calls that end without an Exception still release their slot"""
+
+    def test_cancelled_async_call_releases_slot(self):
+        limiter = make_limiter()
+
+        async def run():
+            started = asyncio.Event()
+
+            async def request():
+                started.set()
+                await asyncio.sleep(60)
+
+            task = asyncio.create_task(limiter.call_async(request))
+            await started.wait()
+            self.assertEqual(limiter.concurrency.in_flight, 1)
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(run())
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+    def test_interrupted_call_releases_slot(self):
+        limiter = make_limiter()
+
+        def request():
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            limiter.call(request)
+        self.assertEqual(limiter.concurrency.in_flight, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,180 @@
+"""
+Text Chunking Module for Aadhaar Chat Agent
+
+This module splits extracted PDF text into overlapping chunks sized in
+embedding-model tokens rather than words. Chunks never exceed what the
+embedding model can actually see, so no text is silently truncated at
+encoding time.
+
+Key Features:
+- Chunk size and overlap measured with the embedding model's tokenizer
+- Page numbers and character offsets kept for every chunk
+- Single tokenization pass per document; chunks are slices of the original text
+- Word-based fallback when no fast tokenizer is available
+
+Author: Avinav Mishra
+Repository: https://github.com/avinav86/Aadhar_Agent
+"""
+
+import re
+from bisect import bisect_right
+from typing import Dict, List, Tuple
+
+# Approximate tokens per whitespace-separated word for English text, used to
+# size chunks when no tokenizer is available
+_TOKENS_PER_WORD = 1.3
+
+
+class TextChunker:
+    """
+    Splits documents into token-sized, overlapping chunks with position metadata.
+
+    The document text is tokenized once with offset mapping enabled. Windows of
+    ``chunk_tokens`` tokens, advancing by ``chunk_tokens - overlap_tokens``, are
+    then turned into character ranges and sliced out of the original text.
+
+    Attributes:
+        tokenizer: Hugging Face fast tokenizer of the embedding model, or None
+        chunk_tokens (int): Maximum number of tokens per chunk
+        overlap_tokens (int): Number of tokens shared by consecutive chunks
+        min_chars (int): Chunks shorter than this (after stripping) are dropped
+    """
+
+    def __init__(self, tokenizer=None, chunk_tokens: int = 510, overlap_tokens: int = 64,
+                 min_chars: int = 50):
+        """
+        Initialize the chunker.
+
+        Args:
+            tokenizer: Tokenizer of the embedding model. It must support
+                ``return_offsets_mapping`` (a "fast" tokenizer); otherwise a
+                word-based approximation is used.
+            chunk_tokens (int): Maximum number of tokens per chunk, excluding
+                the model's special tokens
+            overlap_tokens (int): Number of tokens shared by consecutive chunks
+            min_chars (int): Minimum chunk length in characters
+        """
+        self.tokenizer = tokenizer if getattr(tokenizer, "is_fast", False) else None
+        self.chunk_tokens = max(1, chunk_tokens)
+        self.overlap_tokens = min(max(0, overlap_tokens), self.chunk_tokens - 1)
+        self.min_chars = min_chars
+
+    @property
+    def signature(self) -> str:
+        """Short description of the chunking settings, used to detect config changes"""
+        mode = "tokenizer" if self.tokenizer is not None else "words"
+        return f"{mode}:{self.chunk_tokens}/{self.overlap_tokens}/{self.min_chars}"
+
+    def chunk_pages(self, pages: List[str]) -> List[Dict]:
+        """
+        Chunk a document given as a list of page texts.
+
+        Pages are joined with newlines, matching PDFProcessor's document
+        content, so character offsets index into that content.
+
+        Args:
+            pages (List[str]): Text of each page in order
+
+        Returns:
+            List[Dict]: Chunks with keys:
+                - text: Chunk text (a slice of the joined document)
+                - char_start / char_end: Character range in the document
+                - page_start / page_end: 1-based page numbers covered
+                - token_count: Number of tokens in the chunk
+        """
+        page_starts = []
+        offset = 0
+        for page in pages:
+            page_starts.append(offset)
+            offset += len(page) + 1
+        text = "".join(page + "\n" for page in pages)
+        return self._chunk(text, page_starts)
+
+    def chunk_text(self, text: str) -> List[Dict]:
+        """
+        Chunk a document given as a single string (treated as one page).
+
+        Args:
+            text (str): Document text
+
+        Returns:
+            List[Dict]: Chunks in the same format as chunk_pages
+        """
+        return self._chunk(text, [0])
+
+    def _token_spans(self, text: str) -> List[Tuple[int, int]]:
+        """Return the (start, end) character span of every token in the text"""
+        if self.tokenizer is not None:
+            encoding = self.tokenizer(
+                text,
+                add_special_tokens=False,
+                return_offsets_mapping=True,
+                return_attention_mask=False,
+                return_token_type_ids=False,
+                verbose=False
+            )
+            return encoding["offset_mapping"]
+        return [match.span() for match in re.finditer(r"\S+", text)]
+
+    def _chunk(self, text: str, page_starts: List[int]) -> List[Dict]:
+        """Slide a token window over the text and slice out each chunk"""
+        spans = self._token_spans(text)
+        if not spans:
+            return []
+
+        window = self.chunk_tokens
+        overlap = self.overlap_tokens
+        if self.tokenizer is None:
+            # Words stand in for tokens; shrink the window so chunks stay under the limit
+            window = max(1, int(window / _TOKENS_PER_WORD))
+            overlap = min(int(overlap / _TOKENS_PER_WORD), window - 1)
+        step = window - overlap
+
+        chunks = []
+        for start in range(0, len(spans), step):
+            end = min(start + window, len(spans))
+            char_start = spans[start][0]
+            char_end = spans[end - 1][1]
+            chunk_text = text[char_start:char_end]
+
+            # Ensure chunk has meaningful content
+            if len(chunk_text.strip()) > self.min_chars:
+                chunks.append({
+                    "text": chunk_text,
+                    "char_start": char_start,
+                    "char_end": char_end,
+                    "page_start": bisect_right(page_starts, char_start),
+                    "page_end": bisect_right(page_starts, max(char_start, char_end - 1)),
+                    "token_count": end - start
+                })
+
+            # The last window already reaches the end of the text
+            if end == len(spans):
+                break
+
+        return chunks
+
+
+def build_chunker(embedding_model=None, overlap_tokens: int = 64) -> TextChunker:
+    """
+    Create a chunker sized for an embedding model.
+
+    Args:
+        embedding_model (Optional[SentenceTransformer]): Model whose tokenizer
+            and maximum sequence length determine the chunk size
+        overlap_tokens (int): Number of tokens shared by consecutive chunks
+
+    Returns:
+        TextChunker: Chunker producing chunks the model can embed without truncation
+    """
+    if embedding_model is None:
+        # ChromaDB's default embedding model reads up to 256 tokens
+        return TextChunker(chunk_tokens=254, overlap_tokens=overlap_tokens)
+
+    max_seq_length = getattr(embedding_model, "max_seq_length", None) or 512
+    # Leave room for the [CLS] and [SEP] tokens the model adds
+    return TextChunker(
+        tokenizer=getattr(embedding_model, "tokenizer", None),
+        chunk_tokens=max_seq_length - 2,
+        overlap_tokens=overlap_tokens
+    )
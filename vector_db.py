@@ -9,27 +9,46 @@ semantic similarity.
 Key Features:
 - BGE-large-en-v1.5 embeddings (1024 dimensions)
 - ChromaDB persistent storage
-- Intelligent text chunking with overlap
+- Token-aware, page-aware text chunking with overlap
 - Semantic similarity search
+- Batched, length-sorted embedding with optional multi-process encoding
+- LRU cache of query embeddings (optionally persisted across restarts)
+- Hybrid retrieval: BM25 lexical ranking fused with vector ranking (RRF)
+- Pluggable storage: ChromaDB or a memory-mapped NumPy matrix for exact search
+- Optional float16/int8 embedding storage (NumPy backend) with float32 rescoring
+- Optional ONNX Runtime embedding backend (float32 or int8) for CPU inference
 - Fallback mechanisms for robustness
 
 Technical Details:
 - Embedding Model: BAAI/bge-large-en-v1.5
 - Vector Dimensions: 1024
 - Similarity Metric: Cosine similarity with normalized embeddings
-- Storage: Persistent ChromaDB collection
+- Storage: Persistent ChromaDB collection (default) or NumPy memmap + SQLite
 
 Author: Avinav Mishra
 Repository: https://github.com/avinav86/Aadhar_Agent
 """
 
-import chromadb
-from sentence_transformers import SentenceTransformer
-from typing import List, Dict
+from typing import List, Dict, Optional
 import uuid
 import hashlib
+import json
+import os
 import re
+import shutil
+import threading
+import time
 import numpy as np
+from text_chunker import TextChunker, build_chunker
+from query_cache import QueryEmbeddingCache
+from lexical_index import BM25Index, reciprocal_rank_fusion
+from numpy_store import NumpyStore, quantization_report, stored_dimensions
+from reranker import CrossEncoderReranker
+from onnx_embedder import EMBEDDING_BACKENDS, OnnxEmbedder, export_onnx_model, onnx_directory
+from metrics import metrics, timed
+
+# File in persist_directory recording which embedding model resolved last time
+RESOLVED_MODEL_FILE = "embedding_model.json"
 
 class VectorDatabase:
     """
@@ -47,179 +66,803 @@ class VectorDatabase:
     
     Attributes:
         persist_directory (str): Directory for ChromaDB persistence
-        embedding_model (SentenceTransformer): BGE model for embeddings
-        client (chromadb.PersistentClient): ChromaDB client instance
-        collection (chromadb.Collection): Document collection for storage
+        embedding_model (SentenceTransformer | OnnxEmbedder): BGE model for embeddings
+        embedding_backend (str): Requested embedding runtime, "torch", "onnx" or "onnx-int8"
+        active_embedding_backend (Optional[str]): Embedding runtime actually in use
+        model_name (Optional[str]): Name of the embedding model that loaded
+        chunker (TextChunker): Chunker sized for the embedding model's tokenizer
+        backend (str): Storage backend in use, "chroma" or "numpy"
+        index_directory (str): Directory holding backend-specific index files
+            (manifest, BM25 index, ingest checkpoint)
+        client (Optional[chromadb.PersistentClient]): ChromaDB client instance
+        collection (chromadb.Collection | NumpyStore): Document collection for storage
+        embed_batch_size (int): Number of chunks encoded per model batch
+        embed_processes (int): Worker processes for encoding (0 = single process)
+        query_cache (QueryEmbeddingCache): Cache of query embeddings used by search
+        lexical_index (Optional[BM25Index]): BM25 index over the stored chunks
+        search_mode (str): Default retrieval mode, "vector" or "hybrid"
+        reranker (Optional[CrossEncoderReranker]): Second retrieval stage, if enabled
+        rerank_candidates (int): Candidates retrieved per query for the reranker
+        timings (Dict[str, float]): Seconds spent loading the model and opening the collection
     """
     
-    def __init__(self, persist_directory: str = "./chroma_db"):
+    def __init__(self, persist_directory: str = "./chroma_db", embed_batch_size: int = 32,
+                 embed_processes: int = 0, query_cache_size: int = 1024,
+                 persist_query_cache: bool = True, search_mode: str = "vector",
+                 backend: str = "chroma", embedding_dtype: str = "float32",
+                 full_precision: Optional[bool] = None, rescore_factor: int = 4, reranker: Optional[CrossEncoderReranker] = None,
+                 rerank_candidates: int = 20, embedding_backend: str = "torch",
+                 onnx_threads: int = 0):
         """
-        Initialize the vector database with BGE embeddings and ChromaDB storage.
+        Configure the vector database with BGE embeddings and ChromaDB storage.
         
-        This constructor sets up the complete vector database infrastructure:
-        1. Loads the BGE embedding model (with fallback options)
+        Construction is cheap: on first use (search, ingest or any access to
+        the model or collection) the database
+        1. Loads the BGE embedding model (the last resolved model first, then fallbacks)
         2. Initializes ChromaDB client with persistent storage
         3. Creates or connects to the document collection
         
         Args:
             persist_directory (str): Directory path for ChromaDB persistence
+            embed_batch_size (int): Number of chunks encoded per model batch
+            embed_processes (int): Number of processes in the sentence-transformers
+                multi-process pool used during ingest. 0 encodes in this process,
+                -1 uses every CPU core.
+            query_cache_size (int): Number of query embeddings kept in the LRU cache
+            persist_query_cache (bool): Save the query embedding cache in
+                ``persist_directory`` so it survives restarts
+            search_mode (str): Default retrieval mode. "vector" (the default)
+                uses embeddings only; "hybrid" fuses BM25 and vector rankings,
+                which helps exact terms such as form numbers but costs a
+                lexical search and a wider candidate fetch per query.
+            backend (str): "chroma" for a persistent ChromaDB collection, or
+                "numpy" for exact search over a memory-mapped embedding matrix
+                (requires a BGE model; falls back to ChromaDB otherwise)
+            embedding_dtype (str): Storage type of the NumPy backend's search
+                matrix: "float32", "float16" or "int8". ChromaDB always stores
+                float32, so this only applies to the NumPy backend.
+            full_precision (Optional[bool]): Keep float32 rows next to a
+                float16/int8 matrix and rescore the best candidates with them.
+                Defaults to off, so quantized storage actually shrinks the index.
+            rescore_factor (int): Candidates per result rescored with float32
+                embeddings when ``full_precision`` is on
+            reranker (Optional[CrossEncoderReranker]): Cross-encoder that
+                reranks a wider candidate set and drops chunks below its cutoff
+            rerank_candidates (int): Candidates retrieved per query for the reranker
+            embedding_backend (str): "torch" runs the model with PyTorch; "onnx"
+                and "onnx-int8" run an ONNX export (float32 or int8 weights) with
+                ONNX Runtime. The export is made on first use and only used if
+                its embeddings match PyTorch's; otherwise PyTorch is used.
+            onnx_threads (int): ONNX Runtime intra-op threads (0 = ONNX Runtime default)
         """
         self.persist_directory = persist_directory
+        self.embed_batch_size = max(1, embed_batch_size)
+        self.embed_processes = (os.cpu_count() or 1) if embed_processes < 0 else embed_processes
         
-        print("🔄 Loading BGE embedding model...")
+        self.backend = backend
+        self.search_mode = search_mode
+        self.embedding_dtype = embedding_dtype
+        self.full_precision = full_precision
+        self.rescore_factor = rescore_factor
+        self.query_cache_size = query_cache_size
+        self.persist_query_cache = persist_query_cache
+        self.reranker = reranker
+        self.rerank_candidates = rerank_candidates
         
-        # Initialize BGE embedding model with fallback hierarchy
-        try:
-            # Try BGE models in order of preference (higher dimensions first)
-            # BGE models are specifically designed for retrieval tasks
-            bge_models = [
-                'BAAI/bge-large-en-v1.5',      # 1024 dimensions - best quality
-                'BAAI/bge-base-en-v1.5',       # 768 dimensions - good balance
-                'BAAI/bge-small-en-v1.5',      # 384 dimensions - faster
-                'sentence-transformers/all-mpnet-base-v2'  # 768 dimensions fallback
-            ]
+        # Each backend keeps its own manifest and BM25 index so switching
+        # between them does not force a re-index
+        if backend not in ("chroma", "numpy"):
+            raise ValueError(f"Unknown vector database backend: {backend}")
+        if embedding_backend not in EMBEDDING_BACKENDS:
+            raise ValueError(f"Unknown embedding backend: {embedding_backend}")
+        self.embedding_backend = embedding_backend
+        self.onnx_threads = onnx_threads
+        self.active_embedding_backend = None
+        self.index_directory = os.path.join(persist_directory, "numpy_store") if backend == "numpy" else persist_directory
+        
+        # The model, collection and caches are loaded on first use, so commands
+        # that never search or ingest do not pay for torch and ChromaDB
+        self.model_name = None
+        self.client = None
+        self.lexical_index = None
+        self.lexical_index_path = os.path.join(self.index_directory, "bm25_index.npz")
+        self.timings: Dict[str, float] = {}
+        self._embedding_model = None
+        self._chunker = None
+        self._collection = None
+        self._query_cache = None
+        self._loaded = False
+        self._load_lock = threading.Lock()
+    
+    @property
+    def embedding_model(self):
+        """BGE model (None when only ChromaDB's default embeddings are available)"""
+        self._ensure_loaded()
+        return self._embedding_model
+    
+    @property
+    def chunker(self) -> TextChunker:
+        """Chunker sized for the embedding model's tokenizer"""
+        self._ensure_loaded()
+        return self._chunker
+    
+    @property
+    def collection(self):
+        """ChromaDB collection or NumpyStore holding the chunks"""
+        self._ensure_loaded()
+        return self._collection
+    
+    @property
+    def query_cache(self) -> QueryEmbeddingCache:
+        """Cache of query embeddings used by search"""
+        self._ensure_loaded()
+        return self._query_cache
+    
+    def _ensure_loaded(self):
+        """Load the embedding model, open the collection and load the caches (once)"""
+        if self._loaded:
+            return
+        with self._load_lock:
+            if self._loaded:
+                return
             
-            self.embedding_model = None
-            # Try each model until one loads successfully
-            for model_name in bge_models:
+            start_time = time.perf_counter()
+            self._embedding_model = self._load_embedding_model()
+            self.timings["model_load_seconds"] = time.perf_counter() - start_time
+            metrics.observe("model_load", self.timings["model_load_seconds"])
+            
+            # Size chunks by what the embedding model can actually read
+            self._chunker = build_chunker(self._embedding_model)
+            
+            if self.backend == "numpy" and not self._embedding_model:
+                print("⚠️  NumPy backend needs a BGE model, falling back to ChromaDB...")
+                self.backend = "chroma"
+                self.index_directory = self.persist_directory
+                self.lexical_index_path = os.path.join(self.index_directory, "bm25_index.npz")
+            
+            start_time = time.perf_counter()
+            if self.backend == "numpy":
+                dimensions = self._embedding_model.get_sentence_embedding_dimension()
+                previous = stored_dimensions(self.index_directory)
+                if previous is not None and previous != dimensions:
+                    # Embeddings of another model cannot be searched or extended;
+                    # its manifest goes too, so every document is re-indexed
+                    print(f"🔄 NumPy store holds {previous}D embeddings but the model produces "
+                          f"{dimensions}D, rebuilding it")
+                    shutil.rmtree(self.index_directory)
+                self._collection = NumpyStore(
+                    self.index_directory,
+                    dimensions,
+                    dtype=self.embedding_dtype,
+                    full_precision=self.full_precision,
+                    rescore_factor=self.rescore_factor
+                )
+                print(f"✅ Vector database initialized with NumPy backend ({dimensions}D {self.embedding_dtype} embeddings)!")
+            else:
+                if self.embedding_dtype != "float32":
+                    print(f"⚠️  ChromaDB stores float32 embeddings, ignoring embedding dtype {self.embedding_dtype}")
+                self._open_chroma_collection(self.persist_directory)
+            self.timings["collection_open_seconds"] = time.perf_counter() - start_time
+            metrics.observe("collection_open", self.timings["collection_open_seconds"])
+            
+            self._query_cache = QueryEmbeddingCache(
+                max_entries=self.query_cache_size,
+                persist_path=os.path.join(self.persist_directory, "query_cache.npz") if self.persist_query_cache else None,
+                model_name=self.model_name
+            )
+            metrics.register_cache("query_embedding", self._query_cache.stats)
+            if self.reranker is not None:
+                metrics.register_cache("rerank", self.reranker.stats)
+            
+            # BM25 index built at ingest time and stored next to the collection
+            if os.path.exists(self.lexical_index_path):
                 try:
-                    print(f"🔄 Loading BGE model: {model_name}")
-                    self.embedding_model = SentenceTransformer(model_name)
-                    dimensions = self.embedding_model.get_sentence_embedding_dimension()
-                    print(f"✅ Loaded BGE model: {model_name} ({dimensions} dimensions)")
-                    break
-                except Exception as model_error:
-                    print(f"⚠️  Failed to load {model_name}: {model_error}")
-                    continue
+                    self.lexical_index = BM25Index.load(self.lexical_index_path)
+                except Exception as e:
+                    print(f"⚠️  Could not load lexical index, it will be rebuilt: {e}")
             
-            # Ensure at least one model loaded successfully
-            if not self.embedding_model:
-                raise Exception("All BGE models failed to load")
-                
+            self._loaded = True
+    
+    def _load_embedding_model(self):
+        """
+        Load the embedding model with the requested runtime.
+        
+        For the ONNX backends an existing export of the last resolved model is
+        loaded without importing torch. Otherwise the PyTorch model is loaded,
+        exported and checked; if ONNX Runtime is missing or the export fails
+        its parity check, the PyTorch model is used. Both runtimes keep the
+        same model name, so switching between them does not force a re-index.
+        
+        Returns:
+            Optional[SentenceTransformer | OnnxEmbedder]: Loaded model, or None
+                if every model failed
+        """
+        quantized = self.embedding_backend == "onnx-int8"
+        resolved = self._read_resolved_model()
+        if self.embedding_backend != "torch" and resolved:
+            try:
+                model = OnnxEmbedder.load(onnx_directory(self.persist_directory, resolved),
+                                          quantized=quantized, threads=self.onnx_threads)
+            except Exception as e:
+                print(f"⚠️  Could not load ONNX model, exporting it again: {e}")
+                model = None
+            if model is not None:
+                return self._use_onnx_model(model)
+        
+        model = self._load_torch_model()
+        self.active_embedding_backend = "torch" if model is not None else None
+        if model is None or self.embedding_backend == "torch":
+            return model
+        try:
+            onnx_model = export_onnx_model(model, self.model_name,
+                                           onnx_directory(self.persist_directory, self.model_name),
+                                           quantize=quantized, threads=self.onnx_threads)
         except Exception as e:
-            print(f"❌ Error loading BGE models: {e}")
-            print("🔄 Falling back to ChromaDB default embeddings...")
-            self.embedding_model = None
+            print(f"⚠️  ONNX export failed, using PyTorch: {e}")
+            return model
+        if onnx_model is None:
+            print("⚠️  ONNX model does not match PyTorch, using PyTorch")
+            return model
+        return self._use_onnx_model(onnx_model)
+    
+    def _use_onnx_model(self, model: OnnxEmbedder) -> OnnxEmbedder:
+        """Record an ONNX model as the one in use"""
+        self.model_name = model.model_name
+        self.active_embedding_backend = "onnx-int8" if model.quantized else "onnx"
+        print(f"✅ Loaded ONNX model: {model.model_name} ({'int8' if model.quantized else 'float32'}, "
+              f"{model.get_sentence_embedding_dimension()} dimensions)")
+        return model
+    
+    def _load_torch_model(self):
+        """
+        Load the first BGE model that works, trying the last resolved one first.
+        
+        The name of the model that loaded is saved in ``persist_directory`` so
+        later starts load it directly (from the local Hugging Face cache when
+        possible) instead of walking the fallback list again.
+        
+        Returns:
+            Optional[SentenceTransformer]: Loaded model, or None if every model failed
+        """
+        print("🔄 Loading BGE embedding model...")
+        from sentence_transformers import SentenceTransformer
+        
+        resolved = self._read_resolved_model()
+        # Try BGE models in order of preference (higher dimensions first)
+        # BGE models are specifically designed for retrieval tasks
+        bge_models = [
+            'BAAI/bge-large-en-v1.5',      # 1024 dimensions - best quality
+            'BAAI/bge-base-en-v1.5',       # 768 dimensions - good balance
+            'BAAI/bge-small-en-v1.5',      # 384 dimensions - faster
+            'sentence-transformers/all-mpnet-base-v2'  # 768 dimensions fallback
+        ]
+        if resolved in bge_models:
+            bge_models.remove(resolved)
+            bge_models.insert(0, resolved)
+        
+        # Try each model until one loads successfully
+        for model_name in bge_models:
+            try:
+                print(f"🔄 Loading BGE model: {model_name}")
+                model = None
+                if model_name == resolved:
+                    # Skip the Hugging Face Hub round-trips for a model known to be cached
+                    try:
+                        model = SentenceTransformer(model_name, local_files_only=True)
+                    except Exception:
+                        model = None
+                if model is None:
+                    model = SentenceTransformer(model_name)
+                self.model_name = model_name
+                dimensions = model.get_sentence_embedding_dimension()
+                print(f"✅ Loaded BGE model: {model_name} ({dimensions} dimensions)")
+                if model_name != resolved:
+                    self._save_resolved_model(model_name, dimensions)
+                return model
+            except Exception as model_error:
+                print(f"⚠️  Failed to load {model_name}: {model_error}")
+                continue
+        
+        print("❌ Error loading BGE models: All BGE models failed to load")
+        print("🔄 Falling back to ChromaDB default embeddings...")
+        self.model_name = None
+        return None
+    
+    def _read_resolved_model(self) -> Optional[str]:
+        """Return the model name saved by a previous start, if any"""
+        try:
+            with open(os.path.join(self.persist_directory, RESOLVED_MODEL_FILE), 'r', encoding='utf-8') as file:
+                return json.load(file).get("model_name")
+        except (OSError, ValueError):
+            return None
+    
+    def _save_resolved_model(self, model_name: str, dimensions: int):
+        """Remember which model loaded so the next start tries it first"""
+        try:
+            os.makedirs(self.persist_directory, exist_ok=True)
+            with open(os.path.join(self.persist_directory, RESOLVED_MODEL_FILE), 'w', encoding='utf-8') as file:
+                json.dump({"model_name": model_name, "dimensions": dimensions}, file)
+        except OSError as e:
+            print(f"Warning: Could not save resolved embedding model: {e}")
+    
+    def _open_chroma_collection(self, persist_directory: str):
+        """Create the ChromaDB client and open the document collection"""
+        import chromadb
         
         # Create ChromaDB client
         self.client = chromadb.PersistentClient(path=persist_directory)
         
-        if self.embedding_model:
-            dimensions = self.embedding_model.get_sentence_embedding_dimension()
-            self.collection = self.client.get_or_create_collection(
+        if self._embedding_model:
+            dimensions = self._embedding_model.get_sentence_embedding_dimension()
+            self._collection = self.client.get_or_create_collection(
                 name="aadhaar_documents",
                 metadata={"description": f"Aadhaar documents with BGE {dimensions}D embeddings"}
             )
             print(f"✅ Vector database initialized with BGE {dimensions}-dimensional embeddings!")
         else:
-            self.collection = self.client.get_or_create_collection(
+            self._collection = self.client.get_or_create_collection(
                 name="aadhaar_documents",
                 metadata={"description": "Aadhaar documents with default embeddings"}
             )
             print("✅ Vector database initialized with default embeddings!")
     
-    def add_documents(self, documents: List[Dict[str, str]]):
-        """Add documents to the vector database with BGE embeddings"""
+    def add_documents(self, documents: List[Dict]) -> Dict[str, List[str]]:
+        """
+        Add documents to the vector database with BGE embeddings.
+        
+        Chunks are written with upsert using deterministic
+        ``{filename}_chunk_{i}`` IDs, so re-adding a document overwrites its
+        previous chunks instead of failing on duplicate IDs.
+        
+        Args:
+            documents (List[Dict]): Documents from PDFProcessor
+            
+        Returns:
+            Dict[str, List[str]]: Chunk IDs written for each filename
+        """
         if self.embedding_model:
             dimensions = self.embedding_model.get_sentence_embedding_dimension()
             print(f"📄 Adding documents to vector database with BGE {dimensions}D embeddings...")
         else:
             print("📄 Adding documents to vector database with default embeddings...")
         
-        all_texts = []
-        all_metadatas = []
-        all_ids = []
-        all_embeddings = []
+        all_chunks = []
+        chunk_ids_by_file = {}
         
         for doc in documents:
             # Chunk the document content
-            chunks = self.chunk_text(doc["content"])
-            
-            for i, chunk in enumerate(chunks):
-                all_texts.append(chunk)
-                all_metadatas.append({
-                    "filename": doc["filename"],
-                    "source": doc["source"],
-                    "chunk_index": i,
-                    "total_chunks": len(chunks)
-                })
-                all_ids.append(f"{doc['filename']}_chunk_{i}")
-                
-                # Generate BGE embeddings if model is available
-                if self.embedding_model:
-                    # Use BGE model for encoding
-                    embedding = self.embedding_model.encode(chunk, normalize_embeddings=True)
-                    all_embeddings.append(embedding.tolist())
+            chunks = self.chunk_document(doc)
+            chunk_ids_by_file[doc["filename"]] = [chunk["id"] for chunk in chunks]
+            all_chunks.extend(chunks)
+        
+        if not all_chunks:
+            print("⚠️  No document chunks to add")
+            return chunk_ids_by_file
+        
+        all_texts = [chunk["text"] for chunk in all_chunks]
         
         # Add to collection with BGE embeddings if available
-        if self.embedding_model and all_embeddings:
-            self.collection.add(
-                documents=all_texts,
-                metadatas=all_metadatas,
-                ids=all_ids,
-                embeddings=all_embeddings
-            )
-            dimensions = len(all_embeddings[0])
+        if self.embedding_model:
+            start_time = time.perf_counter()
+            all_embeddings = self.embed_texts(all_texts)
+            elapsed = time.perf_counter() - start_time
+            
+            self.upsert_chunks(all_chunks, all_embeddings)
+            dimensions = all_embeddings.shape[1]
             print(f"✅ Added {len(all_texts)} document chunks with BGE {dimensions}D embeddings")
+            print(f"⚡ Embedded {len(all_texts) / max(elapsed, 1e-9):.1f} chunks/sec "
+                  f"({elapsed:.1f}s, batch size {self.embed_batch_size})")
         else:
             # Fallback to default embeddings
-            self.collection.add(
-                documents=all_texts,
-                metadatas=all_metadatas,
-                ids=all_ids
-            )
+            self.upsert_chunks(all_chunks)
             print(f"✅ Added {len(all_texts)} document chunks with default embeddings")
+        
+        return chunk_ids_by_file
     
-    def chunk_text(self, text: str, chunk_size: int = 800, overlap: int = 150) -> List[str]:
-        """Split text into intelligent overlapping chunks for better embeddings"""
-        # Clean and normalize text
-        text = text.replace('\n', ' ').replace('\r', ' ')
-        text = ' '.join(text.split())  # Remove extra whitespace
+    def chunk_document(self, doc: Dict) -> List[Dict]:
+        """
+        Split a document into chunks ready to be stored.
         
-        words = text.split()
-        chunks = []
+        Chunks are sized in embedding-model tokens and carry the page range
+        and character offsets they were cut from.
         
-        # Use smaller chunks for better semantic understanding
-        for i in range(0, len(words), chunk_size - overlap):
-            chunk = " ".join(words[i:i + chunk_size])
+        Args:
+            doc (Dict): Document from PDFProcessor (``pages`` is used when present)
             
-            # Ensure chunk is not empty and has meaningful content
-            if chunk.strip() and len(chunk.strip()) > 50:
-                chunks.append(chunk.strip())
+        Returns:
+            List[Dict]: Chunks with keys ``id`` (``{filename}_chunk_{i}``),
+                ``text`` and ``metadata``
+        """
+        chunker = self.chunker
+        with timed("chunk"):
+            if doc.get("pages") is not None:
+                pieces = chunker.chunk_pages(doc["pages"])
+            else:
+                pieces = chunker.chunk_text(doc["content"])
         
-        return chunks
+        return [
+            {
+                "id": f"{doc['filename']}_chunk_{i}",
+                "text": piece["text"],
+                "metadata": {
+                    "filename": doc["filename"],
+                    "source": doc["source"],
+                    "chunk_index": i,
+                    "total_chunks": len(pieces),
+                    "page_start": piece["page_start"],
+                    "page_end": piece["page_end"],
+                    "char_start": piece["char_start"],
+                    "char_end": piece["char_end"],
+                    "token_count": piece["token_count"]
+                }
+            }
+            for i, piece in enumerate(pieces)
+        ]
     
-    def search(self, query: str, n_results: int = 5) -> List[Dict]:
-        """Search for relevant documents using BGE embeddings"""
-        if self.embedding_model:
-            # Use BGE model to encode the query
-            query_embedding = self.embedding_model.encode(query, normalize_embeddings=True)
-            results = self.collection.query(
-                query_embeddings=[query_embedding.tolist()],
-                n_results=n_results
-            )
+    def index_signature(self) -> str:
+        """
+        Describe the settings that determine stored chunks and embeddings.
+        
+        When this changes (different model or chunking), previously indexed
+        documents must be re-embedded.
+        """
+        chunker_signature = self.chunker.signature  # loads the model, which sets model_name
+        return f"{self.model_name or 'chroma-default'}|{chunker_signature}"
+    
+    def upsert_chunks(self, chunks: List[Dict], embeddings: Optional[np.ndarray] = None):
+        """
+        Write chunks to the collection, replacing any existing chunks with the same IDs.
+        
+        Args:
+            chunks (List[Dict]): Chunks produced by chunk_document
+            embeddings (Optional[np.ndarray]): Matching BGE embeddings. When
+                omitted, ChromaDB computes its default embeddings.
+        """
+        if not chunks:
+            return
+        
+        kwargs = {
+            "documents": [chunk["text"] for chunk in chunks],
+            "metadatas": [chunk["metadata"] for chunk in chunks],
+            "ids": [chunk["id"] for chunk in chunks]
+        }
+        if embeddings is not None:
+            kwargs["embeddings"] = embeddings.tolist()
+        collection = self.collection
+        with timed("index_write"):
+            collection.upsert(**kwargs)
+    
+    def embed_texts(self, texts: List[str]) -> np.ndarray:
+        """
+        Encode many texts with the BGE model in length-sorted batches.
+        
+        Texts are sorted by length (longest first) before batching so each
+        batch holds similarly sized inputs and wastes little work on padding.
+        When ``embed_processes`` is greater than 1, the sentence-transformers
+        multi-process pool spreads the batches across CPU cores. Embeddings are
+        returned in the original input order and L2-normalized.
+        
+        Args:
+            texts (List[str]): Texts to encode
+            
+        Returns:
+            np.ndarray: Matrix of shape (len(texts), dimensions)
+        """
+        with timed("encode"):
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]), reverse=True)
+            sorted_texts = [texts[i] for i in order]
+        
+            # The multi-process pool is a sentence-transformers feature; ONNX Runtime
+            # spreads each batch over its own threads instead
+            if (self.embed_processes > 1 and len(texts) > self.embed_batch_size
+                    and not isinstance(self.embedding_model, OnnxEmbedder)):
+                pool = self.embedding_model.start_multi_process_pool(
+                    target_devices=["cpu"] * self.embed_processes
+                )
+                try:
+                    sorted_embeddings = self.embedding_model.encode_multi_process(
+                        sorted_texts, pool, batch_size=self.embed_batch_size
+                    )
+                finally:
+                    self.embedding_model.stop_multi_process_pool(pool)
+                # The pool does not normalize, so do it here to match encode()
+                norms = np.linalg.norm(sorted_embeddings, axis=1, keepdims=True)
+                sorted_embeddings = sorted_embeddings / np.maximum(norms, 1e-12)
+            else:
+                sorted_embeddings = self.embedding_model.encode(
+                    sorted_texts,
+                    batch_size=self.embed_batch_size,
+                    normalize_embeddings=True,
+                    show_progress_bar=False,
+                    convert_to_numpy=True
+                )
+        
+            # Scatter rows back to the caller's order
+            embeddings = np.empty_like(sorted_embeddings)
+            embeddings[order] = sorted_embeddings
+        metrics.increment("encoded_texts", len(texts))
+        return embeddings
+    
+    def delete_document(self, filename: str, chunk_ids: Optional[List[str]] = None):
+        """
+        Remove all chunks that belong to a document.
+        
+        Args:
+            filename (str): Name of the PDF file whose chunks should be removed
+            chunk_ids (Optional[List[str]]): Known chunk IDs for the file. When
+                not provided, chunks are located through their filename metadata.
+        """
+        if chunk_ids:
+            self.collection.delete(ids=chunk_ids)
+        elif chunk_ids is None:
+            self.collection.delete(where={"filename": filename})
+    
+    def reset_collection(self):
+        """
+        Delete every stored chunk and start over with an empty collection.
+        
+        Used when the embedding model or chunking settings change: chunks of the
+        old settings (including those of files deleted since) would otherwise
+        stay searchable, and ChromaDB rejects embeddings of a new size in a
+        collection created for the old one, so the collection is recreated.
+        """
+        self._ensure_loaded()
+        if self.backend == "numpy":
+            self._collection.clear()
         else:
-            # Fallback to text-based search
-            results = self.collection.query(
-                query_texts=[query],
-                n_results=n_results
+            self.client.delete_collection("aadhaar_documents")
+            self._open_chroma_collection(self.persist_directory)
+        self.lexical_index = None
+        if os.path.exists(self.lexical_index_path):
+            os.remove(self.lexical_index_path)
+    
+    def delete_stale_chunks(self, filename: str, keep_ids: List[str]):
+        """
+        Remove chunks of a document that are not part of its latest version.
+        
+        After a changed document has been upserted, any chunk IDs beyond its new
+        chunk count still hold text from the previous version and are deleted here.
+        
+        Args:
+            filename (str): Name of the PDF file
+            keep_ids (List[str]): Chunk IDs of the current version of the document
+        """
+        keep = set(keep_ids)
+        existing = self.collection.get(where={"filename": filename}, include=[])["ids"]
+        stale = [chunk_id for chunk_id in existing if chunk_id not in keep]
+        if stale:
+            self.collection.delete(ids=stale)
+    
+    def search(self, query: str, n_results: int = 5, mode: Optional[str] = None) -> List[Dict]:
+        """
+        Search for relevant document chunks.
+        
+        In "hybrid" mode, a wider candidate set is taken from both the vector
+        index and the BM25 lexical index and the two rankings are merged with
+        reciprocal rank fusion. "vector" mode uses BGE embeddings only.
+        
+        With a reranker, ``rerank_candidates`` chunks are retrieved and the
+        cross-encoder keeps at most ``n_results`` of them that clear its cutoff.
+        
+        Args:
+            query (str): User query
+            n_results (int): Maximum number of chunks to return
+            mode (Optional[str]): "vector" or "hybrid"; defaults to search_mode
+            
+        Returns:
+            List[Dict]: Results with keys id, content, metadata, distance
+                (None for chunks found only lexically), in hybrid mode score,
+                and with a reranker rerank_score
+        """
+        return self.search_many([query], n_results, mode)[0]
+    
+    def search_many(self, queries: List[str], n_results: int = 5, mode: Optional[str] = None,
+                    query_embeddings: Optional[np.ndarray] = None,
+                    batch_size: int = 256) -> List[List[Dict]]:
+        """
+        Search for the chunks relevant to many queries at once.
+        
+        Queries are embedded together (see ``embed_queries``) and sent to the
+        vector index ``batch_size`` at a time, so a large question set costs a
+        few matrix products instead of one index round-trip per question.
+        Chunks that only the lexical index found are fetched in a single call
+        for all queries.
+        
+        Args:
+            queries (List[str]): User queries
+            n_results (int): Number of chunks to return per query
+            mode (Optional[str]): "vector" or "hybrid"; defaults to search_mode
+            query_embeddings (Optional[np.ndarray]): Precomputed normalized
+                embeddings of the queries, one row per query
+            batch_size (int): Queries per vector index call
+            
+        Returns:
+            List[List[Dict]]: Results of each query, in the same form as ``search``
+        """
+        self._ensure_loaded()
+        if not queries:
+            return []
+        if self.reranker is None:
+            return self._retrieve_many(queries, n_results, mode, query_embeddings, batch_size)
+        
+        # Wide first stage, then one batched cross-encoder pass for every query
+        candidates = self._retrieve_many(
+            queries, max(n_results, self.rerank_candidates), mode, query_embeddings, batch_size
+        )
+        with timed("rerank"):
+            return self.reranker.rerank(queries, candidates, n_results)
+    
+    def _retrieve_many(self, queries: List[str], n_results: int, mode: Optional[str],
+                       query_embeddings: Optional[np.ndarray], batch_size: int) -> List[List[Dict]]:
+        """First retrieval stage of ``search_many``: vector or hybrid search"""
+        mode = mode or self.search_mode
+        hybrid = mode == "hybrid" and self.lexical_index is not None and len(self.lexical_index) > 0
+        candidates = n_results * 4 if hybrid else n_results
+        
+        if self.embedding_model and query_embeddings is None:
+            query_embeddings = self.embed_queries(queries)
+        
+        vector_results = []
+        for start in range(0, len(queries), batch_size):
+            batch_embeddings = None if query_embeddings is None else query_embeddings[start:start + batch_size]
+            vector_results.extend(
+                self._vector_search(queries[start:start + batch_size], batch_embeddings, candidates)
             )
+        if not hybrid:
+            return vector_results
+        
+        fused_rankings = []
+        missing = set()
+        for query, results in zip(queries, vector_results):
+            with timed("lexical_search"):
+                lexical_results = self.lexical_index.search(query, candidates)
+            fused = reciprocal_rank_fusion([
+                [result["id"] for result in results],
+                [chunk_id for chunk_id, _ in lexical_results]
+            ])[:n_results]
+            fused_rankings.append(fused)
+            found = {result["id"] for result in results}
+            missing.update(chunk_id for chunk_id, _ in fused if chunk_id not in found)
+        
+        # Chunks found only by BM25 still need their text and metadata
+        lexical_only = {}
+        if missing:
+            with timed("fetch_chunks"):
+                fetched = self.collection.get(ids=sorted(missing), include=["documents", "metadatas"])
+            for chunk_id, content, metadata in zip(fetched["ids"], fetched["documents"], fetched["metadatas"]):
+                lexical_only[chunk_id] = {"id": chunk_id, "content": content, "metadata": metadata, "distance": None}
+        
+        fused_results = []
+        for results, fused in zip(vector_results, fused_rankings):
+            by_id = {result["id"]: result for result in results}
+            fused_results.append([
+                dict(by_id.get(chunk_id) or lexical_only[chunk_id], score=score)
+                for chunk_id, score in fused
+                if chunk_id in by_id or chunk_id in lexical_only
+            ])
+        return fused_results
+    
+    def _vector_search(self, queries: List[str], query_embeddings: Optional[np.ndarray],
+                       n_results: int) -> List[List[Dict]]:
+        """Search the collection by embedding similarity only, for a batch of queries"""
+        collection = self.collection
+        with timed("vector_query"):
+            if query_embeddings is not None:
+                # BGE query embeddings, all queries in one call
+                results = collection.query(
+                    query_embeddings=query_embeddings.tolist(),
+                    n_results=n_results
+                )
+            else:
+                # Fallback to text-based search
+                results = collection.query(
+                    query_texts=queries,
+                    n_results=n_results
+                )
         
         # Format results
         formatted_results = []
-        for i in range(len(results['documents'][0])):
-            formatted_results.append({
-                "content": results['documents'][0][i],
-                "metadata": results['metadatas'][0][i],
-                "distance": results['distances'][0][i]
-            })
+        for q in range(len(results['documents'])):
+            formatted_results.append([
+                {
+                    "id": results['ids'][q][i],
+                    "content": results['documents'][q][i],
+                    "metadata": results['metadatas'][q][i],
+                    "distance": results['distances'][q][i]
+                }
+                for i in range(len(results['documents'][q]))
+            ])
         
         return formatted_results
     
+    def embed_query(self, query: str) -> np.ndarray:
+        """
+        Encode a query with the BGE model, using the query embedding cache.
+        
+        Args:
+            query (str): User query
+            
+        Returns:
+            np.ndarray: Normalized query embedding
+        """
+        return self.embed_queries([query])[0]
+    
+    def embed_queries(self, queries: List[str]) -> np.ndarray:
+        """
+        Encode many queries, using the query embedding cache.
+        
+        Queries missing from the cache are encoded together in one batched
+        ``embed_texts`` call (duplicates only once) and added to the cache.
+        
+        Args:
+            queries (List[str]): User queries
+            
+        Returns:
+            np.ndarray: Normalized query embeddings, one row per query
+        """
+        embeddings = [self.query_cache.get(query) for query in queries]
+        missing = list(dict.fromkeys(
+            query for query, embedding in zip(queries, embeddings) if embedding is None
+        ))
+        if missing:
+            encoded = dict(zip(missing, self.embed_texts(missing)))
+            for query, embedding in encoded.items():
+                self.query_cache.put(query, embedding)
+            embeddings = [
+                encoded[query] if embedding is None else embedding
+                for query, embedding in zip(queries, embeddings)
+            ]
+        return np.stack(embeddings).astype(np.float32, copy=False)
+    
+    def refresh_lexical_index(self, force: bool = False):
+        """
+        Rebuild the BM25 index from the chunks stored in the collection.
+        
+        Args:
+            force (bool): Rebuild even if the existing index covers the same
+                number of chunks as the collection
+        """
+        count = self.collection.count()
+        if not force and self.lexical_index is not None and len(self.lexical_index) == count:
+            return
+        
+        stored = self.collection.get(include=["documents"])
+        self.lexical_index = BM25Index.build(stored["ids"], stored["documents"])
+        self.lexical_index.save(self.lexical_index_path)
+        print(f"✅ Built lexical index over {len(self.lexical_index)} chunks")
+    
     def get_collection_info(self) -> Dict:
         """Get information about the collection"""
         count = self.collection.count()
         return {
             "total_documents": count,
-            "collection_name": self.collection.name
+            "collection_name": self.collection.name,
+            "backend": self.backend,
+            "embedding_backend": self.active_embedding_backend,
+            "search_mode": self.search_mode,
+            "lexical_index_chunks": len(self.lexical_index) if self.lexical_index is not None else 0,
+            "query_cache": self.query_cache.stats(),
+            "storage": self.collection.storage_stats() if self.backend == "numpy" else None,
+            "reranker": self.reranker.stats() if self.reranker is not None else None
         }
+    
+    def quantization_report(self, k: int = 10, sample_queries: int = 200) -> List[Dict]:
+        """
+        Compare index size and recall@k of float32, float16 and int8 storage.
+        
+        Uses the embeddings currently stored in the collection, so it works
+        with either backend and reflects the actual corpus.
+        
+        Args:
+            k (int): Number of neighbours compared
+            sample_queries (int): Number of synthetic queries
+        
+        Returns:
+            List[Dict]: One row per storage type (see numpy_store.quantization_report)
+        """
+        stored = self.collection.get(include=["embeddings"])
+        embeddings = stored.get("embeddings")
+        if embeddings is None or len(embeddings) == 0:
+            return []
+        rescore_factor = getattr(self.collection, "rescore_factor", 4)
+        return quantization_report(np.asarray(embeddings), k, sample_queries, rescore_factor)